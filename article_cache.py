@@ -0,0 +1,368 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Callable, Optional
+
+
+class ArticleCache:
+    """Bounded LRU cache of scraped articles with a TTL.
+
+    With backend='sqlite' every entry is also written to a SQLite file, so the
+    cache survives restarts and is shared by all worker processes on the host.
+
+    Entries may carry HTTP validators (ETag / Last-Modified). Expired entries
+    with validators are kept for revalidation_window seconds so they can be
+    revalidated with a conditional request instead of being re-downloaded.
+    Expiry follows each URL's effective TTL (see ttl_for).
+
+    The SQLite store also holds fetch leases: a worker about to fetch a URL
+    takes its lease, and other workers wait for the result to show up in the
+    cache instead of fetching the same page again.
+    """
+
+    def __init__(self,
+                 ttl_seconds: int = 3600,
+                 max_entries: int = 1000,
+                 enabled: bool = True,
+                 backend: str = 'memory',
+                 sqlite_path: str = None,
+                 warm_start: bool = True,
+                 revalidation_window: int = 86400,
+                 lease_seconds: float = 60):
+        """Create the cache; warm_start preloads fresh entries from the persistent store"""
+        if backend not in ('memory', 'sqlite'):
+            raise ValueError(f"Unknown cache backend: {backend}")
+
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self.backend = backend
+        self.sqlite_path = sqlite_path
+        self.revalidation_window = revalidation_window
+        self.lease_seconds = lease_seconds
+        # Optional per-URL freshness: ttl_policy(url) returns seconds, or None for the default TTL
+        self.ttl_policy: Optional[Callable[[str], Optional[float]]] = None
+        self._lease_owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+        self._entries = OrderedDict()  # url -> (cache_time, article_data, validators), oldest first
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._stats = {
+            'hits': 0,
+            'persistent_hits': 0,
+            'misses': 0,
+            'expirations': 0,
+            'evictions': 0,
+            'revalidations': 0,
+            'warm_loaded': 0,
+            'lease_waits': 0
+        }
+
+        if self.enabled and self.backend == 'sqlite':
+            self._init_store()
+            if warm_start:
+                self._warm_start()
+
+    @classmethod
+    def from_config(cls, cache_config: Dict[str, Any]) -> 'ArticleCache':
+        """Build a cache from a CACHE_CONFIG-style dict"""
+        return cls(
+            ttl_seconds=cache_config.get('ttl_seconds', 3600),
+            max_entries=cache_config.get('max_entries', 1000),
+            enabled=cache_config.get('enabled', True),
+            backend=cache_config.get('backend', 'memory'),
+            sqlite_path=cache_config.get('sqlite_path'),
+            warm_start=cache_config.get('warm_start', True),
+            revalidation_window=cache_config.get('revalidation_window', 86400),
+            lease_seconds=cache_config.get('fetch_lease_seconds', 60)
+        )
+
+    # Persistent store
+
+    def _connection(self) -> sqlite3.Connection:
+        """Get this thread's connection to the SQLite store"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.sqlite_path, timeout=10)
+            self._local.conn = conn
+        return conn
+
+    def _init_store(self):
+        directory = os.path.dirname(self.sqlite_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = self._connection()
+        # WAL lets readers in other processes proceed while one process writes
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS articles ('
+            'url TEXT PRIMARY KEY, cache_time REAL NOT NULL, data TEXT NOT NULL, validators TEXT, expires_at REAL)'
+        )
+        # Stores created before validators or per-URL expiry were tracked lack the columns
+        columns = [row[1] for row in conn.execute('PRAGMA table_info(articles)')]
+        if 'validators' not in columns:
+            conn.execute('ALTER TABLE articles ADD COLUMN validators TEXT')
+        if 'expires_at' not in columns:
+            conn.execute('ALTER TABLE articles ADD COLUMN expires_at REAL')
+        conn.execute('CREATE INDEX IF NOT EXISTS articles_cache_time ON articles (cache_time)')
+        conn.execute('CREATE INDEX IF NOT EXISTS articles_expires_at ON articles (expires_at)')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS fetch_leases (url TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)'
+        )
+        conn.commit()
+
+    def _warm_start(self):
+        """Load the most recent fresh entries from the store into memory"""
+        # Rows written before expiry was stored fall back to the default TTL
+        rows = self._connection().execute(
+            'SELECT url, cache_time, data, validators FROM articles WHERE COALESCE(expires_at, cache_time + ?) > ? '
+            'ORDER BY cache_time DESC LIMIT ?',
+            (self.ttl_seconds, time.time(), self.max_entries)
+        ).fetchall()
+
+        with self._lock:
+            # Insert oldest first so LRU order matches cache age
+            for url, cache_time, data, validators in reversed(rows):
+                self._entries[url] = (cache_time, json.loads(data), json.loads(validators or '{}'))
+            self._stats['warm_loaded'] = len(rows)
+
+    def _store_get(self, url: str) -> Optional[tuple]:
+        row = self._connection().execute(
+            'SELECT cache_time, data, validators FROM articles WHERE url = ?', (url,)
+        ).fetchone()
+        if row is None:
+            return None
+        return row[0], json.loads(row[1]), json.loads(row[2] or '{}')
+
+    def _store_set(self, url: str, entry: tuple):
+        cache_time, article_data, validators = entry
+        # Stored so the purge below can honour each URL's own TTL
+        expires_at = cache_time + self.ttl_for(url)
+        purge_before = time.time() - self.revalidation_window
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO articles (url, cache_time, data, validators, expires_at) VALUES (?, ?, ?, ?, ?)',
+                (url, cache_time, json.dumps(article_data, ensure_ascii=False), json.dumps(validators), expires_at)
+            )
+            # Drop rows past revalidation and keep the store within max_entries
+            conn.execute(
+                'DELETE FROM articles WHERE expires_at <= ? OR (expires_at IS NULL AND cache_time <= ?)',
+                (purge_before, purge_before - self.ttl_seconds)
+            )
+            conn.execute(
+                'DELETE FROM articles WHERE url IN ('
+                'SELECT url FROM articles ORDER BY cache_time DESC LIMIT -1 OFFSET ?)',
+                (self.max_entries,)
+            )
+
+    # Cache API
+
+    def ttl_for(self, url: str) -> float:
+        """Seconds an entry for url stays fresh"""
+        ttl = self.ttl_policy(url) if self.ttl_policy is not None else None
+        return ttl or self.ttl_seconds
+
+    def _is_fresh(self, url: str, cache_time: float, ttl: float = None) -> bool:
+        return time.time() - cache_time < (ttl or self.ttl_for(url))
+
+    def _is_revalidatable(self, url: str, entry: tuple, ttl: float = None) -> bool:
+        return bool(entry[2]) and time.time() - entry[0] < (ttl or self.ttl_for(url)) + self.revalidation_window
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        """Get a fresh article for url, or None"""
+        if not self.enabled:
+            return None
+
+        # Looked up before taking the lock, since the policy may read its own store
+        ttl = self.ttl_for(url)
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is not None:
+                if self._is_fresh(url, entry[0], ttl):
+                    self._entries.move_to_end(url)
+                    self._stats['hits'] += 1
+                    return entry[1]
+                # Keep expired entries that can still be revalidated
+                if not self._is_revalidatable(url, entry, ttl):
+                    del self._entries[url]
+                self._stats['expirations'] += 1
+
+        # Another process may have cached it since we last looked
+        if self.backend == 'sqlite':
+            entry = self._store_get(url)
+            if entry is not None and self._is_fresh(url, entry[0], ttl):
+                with self._lock:
+                    self._insert(url, entry)
+                    self._stats['persistent_hits'] += 1
+                return entry[1]
+
+        with self._lock:
+            self._stats['misses'] += 1
+        return None
+
+    def _insert(self, url: str, entry: tuple):
+        """Insert into memory, evicting least recently used entries (caller holds the lock)"""
+        self._entries[url] = entry
+        self._entries.move_to_end(url)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats['evictions'] += 1
+
+    def get_stale(self, url: str, include_fresh: bool = False) -> Optional[tuple]:
+        """Get (article_data, validators) for an expired entry that can be revalidated, or None
+
+        With include_fresh, entries that have not expired yet are returned too,
+        so they can be refreshed ahead of their expiry.
+        """
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(url)
+
+        if entry is None and self.backend == 'sqlite':
+            entry = self._store_get(url)
+
+        ttl = self.ttl_for(url)
+        if entry is None or not self._is_revalidatable(url, entry, ttl):
+            return None
+        if self._is_fresh(url, entry[0], ttl) and not include_fresh:
+            return None
+        return entry[1], entry[2]
+
+    def expires_at(self, url: str) -> Optional[float]:
+        """Unix time at which url's entry expires (possibly in the past), or None if it isn't cached"""
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(url)
+
+        # Another process may have refreshed it more recently
+        if self.backend == 'sqlite':
+            stored = self._store_get(url)
+            if stored is not None and (entry is None or stored[0] > entry[0]):
+                entry = stored
+
+        return entry[0] + self.ttl_for(url) if entry is not None else None
+
+    def set(self, url: str, article_data: Dict[str, Any], validators: Dict[str, str] = None):
+        """Cache article data (and its HTTP validators) with the current timestamp"""
+        if not self.enabled:
+            return
+
+        entry = (time.time(), article_data, validators or {})
+        with self._lock:
+            self._insert(url, entry)
+
+        if self.backend == 'sqlite':
+            self._store_set(url, entry)
+
+    def touch(self, url: str) -> bool:
+        """Restart an entry's TTL after the origin confirmed it is unchanged (HTTP 304)"""
+        if not self.enabled:
+            return False
+
+        with self._lock:
+            entry = self._entries.get(url)
+
+        if entry is None and self.backend == 'sqlite':
+            entry = self._store_get(url)
+        if entry is None:
+            return False
+
+        entry = (time.time(), entry[1], entry[2])
+        with self._lock:
+            self._insert(url, entry)
+            self._stats['revalidations'] += 1
+
+        if self.backend == 'sqlite':
+            self._store_set(url, entry)
+        return True
+
+    # Fetch leases
+
+    def acquire_lease(self, url: str) -> bool:
+        """Claim the right to fetch url; False while another worker holds an unexpired lease on it"""
+        if not self.enabled or self.backend != 'sqlite':
+            return True
+
+        now = time.time()
+        conn = self._connection()
+        with conn:
+            cursor = conn.execute(
+                'INSERT INTO fetch_leases (url, owner, expires_at) VALUES (?, ?, ?) '
+                'ON CONFLICT (url) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at '
+                'WHERE fetch_leases.expires_at < ? OR fetch_leases.owner = excluded.owner',
+                (url, self._lease_owner, now + self.lease_seconds, now)
+            )
+        return cursor.rowcount == 1
+
+    def release_lease(self, url: str):
+        if not self.enabled or self.backend != 'sqlite':
+            return
+        conn = self._connection()
+        with conn:
+            conn.execute('DELETE FROM fetch_leases WHERE url = ? AND owner = ?', (url, self._lease_owner))
+
+    def _lease_held(self, url: str) -> bool:
+        row = self._connection().execute(
+            'SELECT 1 FROM fetch_leases WHERE url = ? AND expires_at >= ?', (url, time.time())
+        ).fetchone()
+        return row is not None
+
+    def wait_for_lease(self, url: str, poll_interval: float = 0.1) -> Optional[Dict[str, Any]]:
+        """Wait while another worker fetches url, then return what it cached (None if it cached nothing)"""
+        with self._lock:
+            self._stats['lease_waits'] += 1
+
+        while True:
+            entry = self._store_get(url)
+            if entry is not None and self._is_fresh(url, entry[0]):
+                with self._lock:
+                    self._insert(url, entry)
+                    self._stats['persistent_hits'] += 1
+                return entry[1]
+            # Released without a result (the fetch failed) or expired (the worker died)
+            if not self._lease_held(url):
+                return None
+            time.sleep(poll_interval)
+
+    def clear(self):
+        """Remove every entry from memory and the persistent store"""
+        with self._lock:
+            self._entries.clear()
+        if self.enabled and self.backend == 'sqlite':
+            conn = self._connection()
+            with conn:
+                conn.execute('DELETE FROM articles')
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss/eviction counters and current size"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = len(self._entries)
+
+        lookups = stats['hits'] + stats['persistent_hits'] + stats['misses']
+        stats['hit_ratio'] = round((stats['hits'] + stats['persistent_hits']) / lookups, 3) if lookups else 0.0
+        stats['max_entries'] = self.max_entries
+        stats['ttl_seconds'] = self.ttl_seconds
+        stats['backend'] = self.backend
+        return stats
+
+    def close(self):
+        """Close this thread's connection to the persistent store"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
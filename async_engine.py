@@ -0,0 +1,353 @@
+import time
+import asyncio
+import threading
+from collections import defaultdict, deque
+from typing import List, Dict, Any, Callable
+from urllib.parse import urlparse
+
+from http_pool import (
+    DEFAULT_HEADERS, READ_CHUNK_BYTES, PageTooLargeError, conditional_headers, response_validators
+)
+from charsets import sniff_encoding
+from host_scheduler import RequestSlot, UnpacedSlot, INTERACTIVE, host_of, parse_retry_after
+from resilience import RetryPolicy, RETRYABLE_STATUSES
+
+# aiohttp is optional; the thread engine works without it
+try:
+    import aiohttp
+    # Network failures worth another attempt (resets, DNS hiccups, timeouts)
+    RETRYABLE_EXCEPTIONS = (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, asyncio.TimeoutError)
+except ImportError:
+    aiohttp = None
+
+
+class SharedFetchLimit:
+    """Limit on concurrent fetches shared by every engine in the process.
+
+    Works like an asyncio.Semaphore (async with limit: ...), except that the
+    engines holding and waiting for it may run on different event loops in
+    different threads. Waiters get a freed slot in arrival order.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._in_use = 0
+        # (loop, future) of each fetch waiting for a slot
+        self._waiters = deque()
+        self._lock = threading.Lock()
+
+    async def __aenter__(self):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._in_use < self.limit and not self._waiters:
+                self._in_use += 1
+                return self
+            waiter = loop.create_future()
+            self._waiters.append((loop, waiter))
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            with self._lock:
+                queued = (loop, waiter) in self._waiters
+                if queued:
+                    self._waiters.remove((loop, waiter))
+            # A slot handed over before the cancel arrived goes to the next waiter
+            # (if the handover is still on its way, _wake passes it on)
+            if not queued and waiter.done() and not waiter.cancelled():
+                self._release()
+            raise
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self._release()
+
+    def _release(self):
+        with self._lock:
+            while self._waiters:
+                loop, waiter = self._waiters.popleft()
+                try:
+                    # The slot passes straight to the waiter, so _in_use stays as it is
+                    loop.call_soon_threadsafe(self._wake, waiter)
+                    return
+                except RuntimeError:
+                    # Its event loop has been closed
+                    continue
+            self._in_use -= 1
+
+    def _wake(self, waiter):
+        if waiter.cancelled():
+            self._release()
+        else:
+            waiter.set_result(None)
+
+    def in_use(self) -> int:
+        with self._lock:
+            return self._in_use
+
+
+_shared_limit = None
+_shared_limit_lock = threading.Lock()
+
+
+def shared_fetch_limit(max_in_flight: int) -> SharedFetchLimit:
+    """The process-wide fetch limit, created with max_in_flight on first use"""
+    global _shared_limit
+    with _shared_limit_lock:
+        if _shared_limit is None:
+            _shared_limit = SharedFetchLimit(max_in_flight)
+        return _shared_limit
+
+
+class AsyncScrapeEngine:
+    """Fetches pages on one asyncio event loop and parses them in a separate worker pool.
+
+    Concurrency is bounded globally (max_in_flight) and per host (per_host_limit),
+    so thousands of URLs can be in flight on a single core without flooding one origin.
+    With a shared fetch_limit, the global bound covers every engine in the process.
+    """
+
+    def __init__(self,
+                 parse_func: Callable[[str, str], Dict[str, Any]],
+                 parse_executor,
+                 max_in_flight: int = 1000,
+                 per_host_limit: int = 8,
+                 timeout: float = 15,
+                 max_page_bytes: int = 0,
+                 host_scheduler=None,
+                 connect_timeout: float = None,
+                 read_timeout: float = None,
+                 retry_policy: RetryPolicy = None,
+                 circuit_breakers=None,
+                 priority: str = INTERACTIVE,
+                 fetch_limit: SharedFetchLimit = None):
+        """Set up the engine; parse_func(url, body, encoding) runs on parse_executor.
+
+        host_scheduler, if given, paces each host and adapts its concurrency
+        within per_host_limit. timeout bounds each attempt as a whole, while
+        connect_timeout and read_timeout bound connecting and each socket read.
+        Without a retry_policy every URL gets a single attempt; circuit_breakers,
+        if given, make requests to failing hosts fail fast. priority is the
+        host scheduler's priority class for every fetch of this engine.
+        fetch_limit, if given, replaces this engine's own max_in_flight bound,
+        so that concurrent scrapes share one budget.
+        """
+        if aiohttp is None:
+            raise ImportError("The async scraping engine requires aiohttp (pip install aiohttp)")
+
+        self.parse_func = parse_func
+        self.parse_executor = parse_executor
+        self.max_in_flight = max_in_flight
+        self.per_host_limit = per_host_limit
+        self.timeout = timeout
+        self.max_page_bytes = max_page_bytes
+        self.host_scheduler = host_scheduler
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.retry_policy = retry_policy or RetryPolicy(max_attempts=1)
+        self.circuit_breakers = circuit_breakers
+        self.priority = priority
+        self.fetch_limit = fetch_limit
+
+        self._loop = None
+        self._tasks = set()
+        self._cancelled = threading.Event()
+
+        # url -> ETag / Last-Modified of the fetched response
+        self.validators = {}
+        # url -> seconds until the response headers arrived (last attempt)
+        self.latencies = {}
+
+    def cancel(self):
+        """Cancel every pending fetch (safe to call from any thread)"""
+        self._cancelled.set()
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._cancel_tasks)
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def _cancel_tasks(self):
+        for task in list(self._tasks):
+            task.cancel()
+
+    def run(self,
+            urls: List[str],
+            cached_validators: Dict[str, Dict[str, str]] = None,
+            on_result: Callable[[Dict[str, Any]], None] = None) -> List[Dict[str, Any]]:
+        """Fetch and parse all URLs, blocking until they are done or cancelled"""
+        return asyncio.run(self.scrape(urls, cached_validators, on_result))
+
+    async def scrape(self,
+                     urls: List[str],
+                     cached_validators: Dict[str, Dict[str, str]] = None,
+                     on_result: Callable[[Dict[str, Any]], None] = None) -> List[Dict[str, Any]]:
+        """Fetch and parse all URLs concurrently, returning results in input order.
+
+        URLs with cached_validators are fetched conditionally; a 304 yields
+        {'url': url, 'not_modified': True} instead of parsed article data.
+        on_result, if given, is called with each result as soon as it completes.
+        """
+        cached_validators = cached_validators or {}
+        self._loop = asyncio.get_running_loop()
+        global_limit = self.fetch_limit or asyncio.Semaphore(self.max_in_flight)
+        host_limits = defaultdict(lambda: asyncio.Semaphore(self.per_host_limit))
+
+        # The semaphores do the limiting; the connector only keeps connections alive
+        connector = aiohttp.TCPConnector(limit=self.max_in_flight, limit_per_host=self.per_host_limit)
+        timeout = aiohttp.ClientTimeout(total=self.timeout, sock_connect=self.connect_timeout, sock_read=self.read_timeout)
+
+        async with aiohttp.ClientSession(headers=DEFAULT_HEADERS, connector=connector, timeout=timeout) as session:
+            tasks = [
+                asyncio.ensure_future(self._scrape_one(
+                    session, url, cached_validators.get(url), global_limit, host_limits[urlparse(url).hostname or '']
+                ))
+                for url in urls
+            ]
+            self._tasks.update(tasks)
+            if on_result is not None:
+                for url, task in zip(urls, tasks):
+                    task.add_done_callback(lambda task, url=url: on_result(self._task_result(url, task)))
+
+            # A cancel() that raced with task creation still has to take effect
+            if self._cancelled.is_set():
+                self._cancel_tasks()
+
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        return [self._task_result(url, task) for url, task in zip(urls, tasks)]
+
+    @staticmethod
+    def _task_result(url: str, task) -> Dict[str, Any]:
+        """Result of a finished task, with cancellation and errors turned into error dicts"""
+        if task.cancelled():
+            return {'url': url, 'error': 'Cancelled'}
+        if task.exception() is not None:
+            return {'url': url, 'error': str(task.exception())}
+        return task.result()
+
+    async def _scrape_one(self, session, url: str, validators, global_limit, host_limit) -> Dict[str, Any]:
+        """Fetch one page under the concurrency limits, then parse it off the event loop"""
+        print(f"Scraping {url}...")
+        headers = conditional_headers(validators) if validators else {}
+        try:
+            response, body = await self._get_with_retries(session, url, headers, global_limit, host_limit)
+            if validators and response.status == 304:
+                return {'url': url, 'not_modified': True}
+            self.validators[url] = response_validators(response.headers)
+
+            # The parse pool decodes the raw bytes with the sniffed charset
+            encoding = sniff_encoding(response.headers.get('Content-Type'), body)
+            return await self._loop.run_in_executor(self.parse_executor, self.parse_func, url, body, encoding)
+
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Timeouts have no message of their own
+            error = str(e) or type(e).__name__
+            print(f"Error scraping {url}: {error}")
+            return {'url': url, 'error': error}
+
+    async def _get(self, session, url: str, headers, global_limit, host_limit):
+        """One GET under the concurrency limits and host pacing, returning the response and its body.
+
+        304s and error statuses come back with an empty body instead of raising.
+        """
+        async with host_limit:
+            # Wait out the host's pacing before taking a global slot, so a slow-paced
+            # host can't hold global slots while nothing is being sent
+            with await self._host_slot(url) as slot:
+                async with global_limit:
+                    # The host's window adapts to its own latency, not to waiting for the global limit
+                    started = slot.started = time.monotonic()
+                    async with session.get(url, headers=headers) as response:
+                        self.latencies[url] = time.monotonic() - started
+                        if response.status == 304 or response.status >= 400:
+                            slot.record(response.status, response.headers.get('Retry-After'))
+                            return response, b''
+                        body = await self._read_body(response)
+                        slot.record(response.status)
+                        return response, body
+
+    async def _get_with_retries(self, session, url: str, headers, global_limit, host_limit):
+        """GET with jittered retries for transient failures, failing fast while the host's circuit is open
+
+        The concurrency limits are released while waiting to retry.
+        """
+        breaker = self.circuit_breakers.for_url(url) if self.circuit_breakers is not None else None
+        attempt = 0
+        while True:
+            if breaker is not None:
+                breaker.before_request(host_of(url))
+            retry_after = None
+            try:
+                response, body = await self._get(session, url, headers, global_limit, host_limit)
+            except RETRYABLE_EXCEPTIONS as e:
+                if breaker is not None:
+                    breaker.record_failure()
+                error = e
+            except asyncio.CancelledError:
+                if breaker is not None:
+                    breaker.abandon()
+                raise
+            except Exception:
+                # The host answered (e.g. the page was too large), so it is up
+                if breaker is not None:
+                    breaker.record_success()
+                raise
+            else:
+                if breaker is not None:
+                    if response.status >= 500:
+                        breaker.record_failure()
+                    else:
+                        breaker.record_success()
+                if response.status not in RETRYABLE_STATUSES:
+                    response.raise_for_status()
+                    return response, body
+                try:
+                    response.raise_for_status()
+                except aiohttp.ClientResponseError as e:
+                    error = e
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+
+            if not self.retry_policy.can_retry(attempt):
+                raise error
+            delay = self.retry_policy.delay(attempt, retry_after)
+            print(f"Retrying {url} in {delay:.1f}s after: {str(error) or type(error).__name__}")
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def _host_slot(self, url: str):
+        """Wait for the host scheduler's pacing without blocking the event loop"""
+        if self.host_scheduler is None or not self.host_scheduler.enabled:
+            return UnpacedSlot()
+
+        # The first request to a host may read its robots.txt, which blocks
+        limiter = await self._loop.run_in_executor(None, self.host_scheduler.limiter, url)
+        started = self._loop.time()
+        limiter.add_waiter(self.priority)
+        try:
+            while True:
+                wait = limiter.try_acquire(self.priority)
+                if not wait:
+                    break
+                await asyncio.sleep(wait)
+        finally:
+            limiter.remove_waiter(self.priority)
+        limiter.record_wait(self._loop.time() - started)
+        return RequestSlot(limiter, self.priority)
+
+    async def _read_body(self, response) -> bytes:
+        """Read a response body in chunks, aborting once it exceeds max_page_bytes"""
+        if self.max_page_bytes and response.content_length and response.content_length > self.max_page_bytes:
+            raise PageTooLargeError(f"Page is {response.content_length} bytes, limit is {self.max_page_bytes}")
+
+        chunks = []
+        received = 0
+        async for chunk in response.content.iter_chunked(READ_CHUNK_BYTES):
+            received += len(chunk)
+            if self.max_page_bytes and received > self.max_page_bytes:
+                raise PageTooLargeError(f"Page exceeds the {self.max_page_bytes} byte limit")
+            chunks.append(chunk)
+        return b''.join(chunks)
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# extraction_benchmark.py - Parse time per page: selector cascade vs single-pass extraction
+#
+# Usage:
+#   python benchmarks/extraction_benchmark.py                 # synthetic portal page
+#   python benchmarks/extraction_benchmark.py page1.html ...  # saved pages
+
+import os
+import sys
+import time
+import argparse
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from extraction import (
+    DEFAULT_EXTRACTOR, CONTENT_SELECTORS, DATE_SELECTORS, AUTHOR_SELECTORS, IMAGE_SELECTORS
+)
+
+
+def cascade_extract(soup, url):
+    """The previous extraction: one soup.select() walk per selector, in priority order"""
+    title = None
+    if soup.title:
+        title = soup.title.text.strip()
+    if not title or title.lower() in ['home', 'homepage', 'index']:
+        h1_tags = soup.find_all('h1')
+        if h1_tags:
+            title = h1_tags[0].text.strip()
+
+    content = ""
+    for selector in CONTENT_SELECTORS:
+        elements = soup.select(selector)
+        if elements:
+            paragraphs = elements[0].find_all('p')
+            if paragraphs:
+                content = " ".join([p.text.strip() for p in paragraphs])
+                break
+    if not content:
+        paragraphs = soup.find_all('p')
+        valid_paragraphs = [p.text.strip() for p in paragraphs if len(p.text.strip()) > 40]
+        content = " ".join(valid_paragraphs)
+
+    def first_value(selectors, element_value):
+        for selector in selectors:
+            elements = soup.select(selector)
+            if elements:
+                if elements[0].name == 'meta':
+                    return elements[0].get('content', '')
+                return element_value(elements[0])
+        return None
+
+    publish_date = first_value(DATE_SELECTORS, lambda el: el.text.strip())
+    author = first_value(AUTHOR_SELECTORS, lambda el: el.text.strip())
+    image_url = first_value(IMAGE_SELECTORS, lambda el: el.get('src', ''))
+    if image_url and not image_url.startswith(('http://', 'https://')):
+        image_url = urljoin(url, image_url)
+
+    return {
+        'title': title,
+        'content': content,
+        'publish_date': publish_date,
+        'author': author,
+        'image_url': image_url
+    }
+
+
+def synthetic_portal_page(sections=40, teasers=25):
+    """A large landing page: many teaser blocks, widgets and a sidebar, like our category pages"""
+    blocks = []
+    for s in range(sections):
+        teaser_html = "".join(
+            f'<div class="teaser"><a href="/news/{s}-{t}"><img src="/img/{s}-{t}.jpg"></a>'
+            f'<h3>Headline {s}-{t}</h3><span class="meta-date">2025-04-0{t % 9 + 1}</span>'
+            f'<p>Teaser text for story {s}-{t}, long enough to be kept by the paragraph fallback filter.</p></div>'
+            for t in range(teasers)
+        )
+        blocks.append(f'<section class="block block-{s}"><h2>Section {s}</h2>{teaser_html}</section>')
+
+    return (
+        '<html><head><title>Actualités - Portail</title>'
+        '<meta property="og:image" content="/logo.png"><meta name="author" content="Rédaction"></head>'
+        '<body><header><nav>' + "".join(f'<a href="/c/{i}">Cat {i}</a>' for i in range(60)) + '</nav></header>'
+        '<main><div class="post"><h1>À la une</h1>' + "".join(blocks) + '</div></main>'
+        '<aside class="sidebar">' + "".join(f'<div class="widget"><p>Widget {i}</p></div>' for i in range(50)) + '</aside>'
+        '<footer><p>© Portail</p></footer></body></html>'
+    )
+
+
+def time_extraction(extract, html, url, runs):
+    """Average milliseconds per page for parsing + extraction"""
+    start = time.perf_counter()
+    for _ in range(runs):
+        extract(BeautifulSoup(html, 'html.parser'), url)
+    return (time.perf_counter() - start) * 1000 / runs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark article extraction")
+    parser.add_argument('pages', nargs='*', help='Saved HTML pages (defaults to a synthetic portal page)')
+    parser.add_argument('--runs', '-r', type=int, default=10, help='Parses per page')
+    args = parser.parse_args()
+
+    pages = []
+    for path in args.pages:
+        with open(path, 'rb') as f:
+            pages.append((path, f.read().decode('utf-8', errors='replace')))
+    if not pages:
+        pages.append(('synthetic portal page', synthetic_portal_page()))
+
+    url = 'https://www.example.com/category/news/'
+    print(f"{'page':40} {'KB':>6} {'cascade ms':>11} {'single-pass ms':>15} {'speedup':>8}  same output")
+    for name, html in pages:
+        soup = BeautifulSoup(html, 'html.parser')
+        expected = cascade_extract(soup, url)
+        # The single-pass result also names the selectors it used
+        same = expected == {key: value for key, value in DEFAULT_EXTRACTOR.extract(soup, url).items() if key in expected}
+
+        cascade_ms = time_extraction(cascade_extract, html, url, args.runs)
+        single_ms = time_extraction(DEFAULT_EXTRACTOR.extract, html, url, args.runs)
+        print(f"{name[-40:]:40} {len(html) / 1024:6.0f} {cascade_ms:11.1f} {single_ms:15.1f} "
+              f"{cascade_ms / single_ms:7.2f}x  {'yes' if same else 'NO'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# parser_parity.py - Check that every parser backend yields identical article data
+#
+# Usage:
+#   python benchmarks/parser_parity.py                                # compare backends on tests/fixtures
+#   python benchmarks/parser_parity.py --fetch benchmarks/fixtures   # save pages from config.NEWS_SOURCES
+#   python benchmarks/parser_parity.py benchmarks/fixtures/*.html    # compare backends (exit 1 on mismatch)
+#
+# The saved fixtures are also checked by tests/test_parser_parity.py.
+
+import os
+import sys
+import glob
+import time
+import argparse
+from urllib.parse import urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from charsets import sniff_encoding
+from http_pool import DEFAULT_HEADERS
+from parsers import available_backends, get_parser_backend
+
+
+def fetch_fixtures(directory):
+    """Save the HTML of every configured source into directory"""
+    import requests
+
+    os.makedirs(directory, exist_ok=True)
+    urls = sorted({url for sources in config.NEWS_SOURCES.values() for url in sources})
+    for url in urls:
+        parsed = urlparse(url)
+        name = (parsed.hostname + parsed.path).strip('/').replace('/', '_') + '.html'
+        try:
+            response = requests.get(url, headers=DEFAULT_HEADERS, timeout=config.SCRAPER_CONFIG['timeout_seconds'])
+            response.raise_for_status()
+        except Exception as e:
+            print(f"Skipping {url}: {e}")
+            continue
+        with open(os.path.join(directory, name), 'wb') as f:
+            f.write(response.content)
+        print(f"Saved {url} -> {name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parser backend parity check")
+    parser.add_argument('pages', nargs='*', help='Saved HTML pages to compare')
+    parser.add_argument('--fetch', metavar='DIR', help='Download config.NEWS_SOURCES into DIR and exit')
+    parser.add_argument('--runs', '-r', type=int, default=5, help='Parses per page for the throughput figures')
+    args = parser.parse_args()
+
+    if args.fetch:
+        fetch_fixtures(args.fetch)
+        return 0
+    if not args.pages:
+        fixtures = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tests', 'fixtures')
+        args.pages = sorted(glob.glob(os.path.join(fixtures, '*.html')))
+
+    backends = available_backends()
+    reference = backends[-1]  # html.parser is always installed and always last
+    print(f"Backends: {', '.join(backends)} (reference: {reference})")
+
+    mismatches = 0
+    timings = {name: 0.0 for name in backends}
+    for path in args.pages:
+        with open(path, 'rb') as f:
+            html = f.read()
+        # Parsed from the raw bytes, like scraped pages
+        encoding = sniff_encoding(None, html)
+        url = 'https://fixture.invalid/' + os.path.basename(path)
+
+        expected = get_parser_backend(reference).extract(html, url, encoding)
+        for name in backends:
+            backend = get_parser_backend(name)
+            start = time.perf_counter()
+            for _ in range(args.runs):
+                fields = backend.extract(html, url, encoding)
+            timings[name] += (time.perf_counter() - start) / args.runs
+
+            if fields != expected:
+                mismatches += 1
+                for key in expected:
+                    if fields[key] != expected[key]:
+                        print(f"MISMATCH {os.path.basename(path)} [{name}] {key}: "
+                              f"{str(fields[key])[:80]!r} != {str(expected[key])[:80]!r}")
+
+    for name in backends:
+        print(f"{name:12} {len(args.pages) / timings[name]:8.1f} pages/s")
+    print('OK' if not mismatches else f"{mismatches} mismatching page/backend pairs")
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
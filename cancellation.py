@@ -0,0 +1,47 @@
+import threading
+import concurrent.futures
+from typing import Callable
+
+
+class CancelToken:
+    """Lets whoever started a scrape stop it from another thread (e.g. when the client went away).
+
+    Scrapes check the token between results and register on_cancel callbacks
+    to wake up the waits that would otherwise block until the next result.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self):
+        """Cancel the scrape and run the registered callbacks (only the first call does anything)"""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"Error in cancel callback: {str(e)}")
+
+    def on_cancel(self, callback: Callable[[], None]):
+        """Call callback when the token is cancelled, straight away if it already is"""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def as_future(self) -> concurrent.futures.Future:
+        """A Future that completes on cancellation, so waits on other futures can include it"""
+        future = concurrent.futures.Future()
+        self.on_cancel(lambda: future.set_result(None))
+        return future
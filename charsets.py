@@ -0,0 +1,76 @@
+import re
+import codecs
+from typing import Optional
+
+# How far into the body to look for a <meta> charset declaration (the HTML spec uses 1024)
+META_SNIFF_BYTES = 4096
+
+DEFAULT_ENCODING = 'utf-8'
+
+_BOMS = [
+    (codecs.BOM_UTF8, 'utf-8'),
+    (codecs.BOM_UTF16_LE, 'utf-16-le'),
+    (codecs.BOM_UTF16_BE, 'utf-16-be'),
+]
+
+_HEADER_CHARSET = re.compile(r'charset\s*=\s*["\']?([\w.:-]+)', re.IGNORECASE)
+# Matches both <meta charset="..."> and <meta http-equiv="Content-Type" content="text/html; charset=...">
+_META_CHARSET = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?\s*([\w.:-]+)', re.IGNORECASE)
+
+# Browsers decode these labels as windows-1252, and so should we
+_ENCODING_ALIASES = {
+    'iso-8859-1': 'windows-1252',
+    'latin-1': 'windows-1252',
+    'latin1': 'windows-1252',
+    'us-ascii': 'windows-1252',
+    'ascii': 'windows-1252',
+}
+
+
+def normalize_encoding(label: Optional[str]) -> Optional[str]:
+    """Canonical Python codec name for a charset label, or None if it is unknown"""
+    if not label:
+        return None
+    label = label.strip().lower()
+    label = _ENCODING_ALIASES.get(label, label)
+    try:
+        return codecs.lookup(label).name
+    except LookupError:
+        return None
+
+
+def charset_from_content_type(content_type: Optional[str]) -> Optional[str]:
+    """Charset declared in a Content-Type header, if any"""
+    if not content_type:
+        return None
+    match = _HEADER_CHARSET.search(content_type)
+    return normalize_encoding(match.group(1)) if match else None
+
+
+def charset_from_bom(body: bytes) -> Optional[str]:
+    """Charset indicated by a byte order mark, if any"""
+    for bom, encoding in _BOMS:
+        if body.startswith(bom):
+            return encoding
+    return None
+
+
+def charset_from_meta(body: bytes) -> Optional[str]:
+    """Charset declared by a <meta> tag near the start of the document, if any"""
+    match = _META_CHARSET.search(body[:META_SNIFF_BYTES])
+    return normalize_encoding(match.group(1).decode('ascii', errors='ignore')) if match else None
+
+
+def sniff_encoding(content_type: Optional[str], body: bytes) -> str:
+    """Pick the page encoding: HTTP header, then BOM, then <meta>, then UTF-8"""
+    return (
+        charset_from_content_type(content_type)
+        or charset_from_bom(body)
+        or charset_from_meta(body)
+        or DEFAULT_ENCODING
+    )
+
+
+def decode_html(body: bytes, encoding: str) -> str:
+    """Decode a page body once, replacing undecodable bytes and dropping any BOM"""
+    return body.decode(encoding, errors='replace').lstrip('\ufeff')
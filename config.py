@@ -88,4 +88,143 @@ CACHE_CONFIG = {
     'enabled': True,
     'ttl_seconds': 3600,  # Time-to-live: 1 hour
     'max_entries': 1000,  # Maximum cache entries
-}
\ No newline at end of file
+    'backend': 'sqlite',  # 'memory' (per process) or 'sqlite' (persistent, shared across processes)
+    'sqlite_path': 'cache/article_cache.sqlite3',
+    'warm_start': True,   # Preload fresh entries from the persistent store on startup
+    'revalidation_window': 86400,  # Keep expired entries with ETag/Last-Modified this long for conditional requests
+    'fetch_lease_seconds': 60,  # One worker fetches a URL at a time; others wait up to this long for its result
+}
+
+# HTTP connection pool configuration
+HTTP_POOL_CONFIG = {
+    'pool_connections': 20,  # Number of hosts to keep connection pools for
+    'default_pool_size': 5,  # Keep-alive connections per host (at least WORKER_POOL_CONFIG['max_workers_per_call'])
+}
+
+# Scraping configuration
+SCRAPER_CONFIG = {
+    'engine': 'thread',      # 'thread' (shared WorkerPool) or 'async' (asyncio + aiohttp on one pool thread)
+    'timeout_seconds': 15,   # Overall limit per attempt (async engine)
+    'connect_timeout_seconds': 3.05,  # DNS + TCP + TLS; a dead host fails after this
+    'read_timeout_seconds': 10,       # Max wait between bytes once connected
+    'parser_backend': 'auto',  # 'auto' (fastest installed), 'selectolax', 'lxml' or 'html.parser'
+    'structured_data': True,   # Take fields from JSON-LD / OpenGraph first; DOM selectors only fill the gaps
+    'max_page_bytes': 5 * 1024 * 1024,  # Abort pages larger than this (0 = no limit)
+    'deadline_seconds': None,  # Default time budget for a whole scrape; unfinished sources are marked timed out
+}
+
+# Process-wide worker pool shared by all requests (an async scrape takes one slot for its event loop)
+WORKER_POOL_CONFIG = {
+    'max_workers': 32,             # Threads in the pool; the cap on concurrent thread-engine fetches
+    'max_queued': 64,              # Extra slots requests may reserve beyond the running ones
+    'max_workers_per_call': 16,    # Upper bound for a request's max_workers
+    'interactive_workers': 4,      # Extra threads (and slots) only interactive scrapes may use
+}
+
+# Asyncio engine configuration (used when SCRAPER_CONFIG['engine'] == 'async')
+ASYNC_ENGINE_CONFIG = {
+    'max_in_flight': 1000,         # Limit on concurrent fetches across all async scrapes in the process
+    'per_host_limit': 8,           # Concurrent fetches per host
+    'parse_executor': 'process',   # 'process' or 'thread' pool for HTML parsing
+    'parse_workers': 4,            # Number of parsing workers
+}
+
+
+# Per-source change rate, latency and failure tracking (adaptive revisit intervals and fetch order)
+SOURCE_STATS_CONFIG = {
+    'adaptive_revisit': True,      # Cache freshness per source from its stats instead of CACHE_CONFIG's fixed TTL
+    'sqlite_path': 'cache/source_stats.sqlite3',
+    'min_revisit_seconds': 300,    # Bounds for a source's revisit interval (new sources start at the cache TTL)
+    'max_revisit_seconds': 86400,
+    'speedup_factor': 0.5,         # Interval multiplier when the content changed since the last fetch
+    'backoff_factor': 1.5,         # Interval multiplier when it did not
+    'slow_latency_seconds': 5.0,   # Slower sources are revisited proportionally less often
+    'smoothing': 0.3,              # Weight of the newest sample in the latency and failure-rate averages
+}
+
+# Learned per-site extraction profiles: the selector that wins each field on a site is tried first there
+EXTRACTION_PROFILE_CONFIG = {
+    'enabled': True,
+    'sqlite_path': 'cache/extraction_profiles.sqlite3',
+    'min_hits': 3,         # Wins a selector needs on a site before it is tried first
+    'verify_every': 20,    # Every Nth page of a site runs the full selector lists to catch layout changes
+    # Hand-written selectors tried first, e.g. {'example.com': {'content': ['.article-body'], 'author': []}};
+    # an empty list means the site has no such field
+    'overrides': {},
+}
+
+# Lightweight article versions: fetch a site's AMP (or print) pages instead of the full ones once known
+LIGHT_VARIANT_CONFIG = {
+    'enabled': True,
+    'sqlite_path': 'cache/light_variants.sqlite3',
+    'min_hits': 2,         # Full pages whose AMP link follows a URL pattern before the site's new articles use it
+    'max_failures': 3,     # Failed or empty variant fetches in a row before a site's pattern is given up
+    'max_pages': 5000,     # Per-article AMP links remembered for refreshes
+    # Pattern to use per site regardless of what was learned, e.g. {'example.com': 'print-query'};
+    # see light_variants.VARIANT_PATTERNS
+    'sites': {},
+}
+
+# Refresh-ahead cache warmer: re-scrapes NEWS_SOURCES before their cache entries expire.
+# Other scrapers and worker processes only benefit with the sqlite cache backend.
+WARMER_CONFIG = {
+    'enabled': True,
+    'topics': None,                # NEWS_SOURCES topics to keep warm (None = all)
+    'refresh_ahead_seconds': 300,  # Refresh this long before an entry expires
+    'spread_seconds': 120,         # Per-source offset window, so refreshes don't come due together
+    'check_interval_seconds': 15,  # How often due sources are looked for
+    'max_refreshes_per_check': 3,  # Refreshed one after another, never in a burst
+    'failure_backoff_seconds': 300,  # Wait before retrying a source whose refresh failed
+}
+
+# Background job configuration (/api/jobs)
+JOBS_CONFIG = {
+    'workers': 4,                  # Jobs run concurrently per web worker process
+    'sqlite_path': 'cache/jobs.sqlite3',  # Job state and results, shared by all web workers
+    'result_ttl_seconds': 86400,   # Finished jobs are purged after this long
+    'heartbeat_seconds': 30,       # Unfinished jobs without a heartbeat for 3x this are failed on startup
+}
+
+# Server-side store for scrape results (referenced by result_set_id)
+RESULT_STORE_CONFIG = {
+    'sqlite_path': 'cache/results.sqlite3',
+    'ttl_seconds': 86400,   # Result sets expire after this long
+    'snippet_length': 200,  # Characters of content included in each preview
+}
+
+# Category page crawling (discover article links instead of scraping listing pages as articles)
+CRAWLER_CONFIG = {
+    'max_pages_per_source': 5,     # Pagination depth per category page
+    'max_articles_per_source': 30, # New articles taken from one category per crawl
+    'sqlite_path': 'cache/crawl_seen.sqlite3',  # Article URLs already scraped, kept across runs
+}
+
+# Per-host request scheduling: token-bucket pacing plus an AIMD concurrency window
+HOST_SCHEDULER_CONFIG = {
+    'enabled': True,
+    'requests_per_second': 4.0,    # Pacing per host (lowered further by robots.txt Crawl-delay)
+    'burst': 4,                    # Requests a host may receive back to back
+    'initial_concurrency': 2,      # Starting concurrent requests per host
+    'min_concurrency': 1,
+    'max_concurrency': 8,          # Upper bound the window can grow to
+    'slow_latency_seconds': 5.0,   # Responses slower than this shrink the window like a 429
+    'decrease_factor': 0.5,        # Multiplicative decrease on 429/503, failures and slow responses
+    'respect_robots': True,        # Honour Crawl-delay / Request-rate from robots.txt
+    # Share of each host's window held back for a priority class and the ones above it:
+    # bulk work never fills the last quarter (interactive only) or the quarter before it (scheduled)
+    'reserved_share': {'interactive': 0.25, 'scheduled': 0.25},
+}
+
+# Retries for connection errors, timeouts and 429/5xx responses
+RETRY_CONFIG = {
+    'max_attempts': 3,             # Including the first attempt
+    'backoff_base_seconds': 0.5,   # Full jitter: wait random(0, base * 2^attempt)
+    'backoff_max_seconds': 8.0,
+}
+
+# Per-host circuit breaker: fail fast while a host is down, probe it again later
+CIRCUIT_BREAKER_CONFIG = {
+    'failure_threshold': 3,        # Consecutive failures that open the circuit
+    'reset_timeout_seconds': 30,   # Wait before letting a probe request through
+    'max_reset_timeout_seconds': 300,  # Cap for the timeout, which doubles after each failed probe
+}
@@ -0,0 +1,163 @@
+import os
+import re
+import time
+import sqlite3
+import threading
+from typing import List, Dict, Any, Callable, Iterable, Optional, Tuple
+from urllib.parse import urlsplit
+
+from parsers import get_parser_backend
+from urls import canonicalize_url, same_site
+
+# Path segments of listing, taxonomy and utility pages, which are never articles
+NON_ARTICLE_PATH = re.compile(
+    r'/(category|categorie|categories|tag|tags|author|auteur|page|feed|rss|search|recherche|'
+    r'wp-content|wp-admin|wp-json|wp-login\.php|login|contact|about|privacy)(/|$)'
+    r'|\.(jpe?g|png|gif|webp|svg|ico|pdf|css|js|xml|json|zip|mp3|mp4)$',
+    re.IGNORECASE
+)
+
+# An article's last path segment is usually a slug of several words (possibly percent-encoded),
+# or contains an id or date
+ARTICLE_SLUG = re.compile(r'[\w%]+(?:-[\w%]+){2,}|\d{3,}')
+
+# Link text of "next page" controls on sites without rel="next"
+NEXT_PAGE_TEXTS = {'next', 'next page', 'older posts', 'older', 'suivant', 'page suivante', '»', '›', 'التالي'}
+
+
+def looks_like_article(url: str, category_url: str) -> bool:
+    """Heuristic: an internal link whose path ends in a slug or id and isn't a listing page"""
+    if not same_site(url, category_url):
+        return False
+    path = urlsplit(url).path
+    if path.rstrip('/') == urlsplit(category_url).path.rstrip('/') or NON_ARTICLE_PATH.search(path):
+        return False
+    last_segment = path.rstrip('/').rsplit('/', 1)[-1]
+    return bool(ARTICLE_SLUG.search(last_segment))
+
+
+def _is_next_page_link(link: Dict[str, Any]) -> bool:
+    if 'next' in [rel.lower() for rel in link['rel']]:
+        return True
+    text = link['text'].strip().lower().rstrip(' »›>').strip()
+    return text in NEXT_PAGE_TEXTS or link['text'].strip() in NEXT_PAGE_TEXTS
+
+
+class SeenStore:
+    """Persistent set of article URLs that have already been scraped, per source"""
+
+    def __init__(self, sqlite_path: str):
+        self.sqlite_path = sqlite_path
+        self._local = threading.local()
+
+        directory = os.path.dirname(sqlite_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = self._connection()
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS crawl_seen (url TEXT PRIMARY KEY, source TEXT, first_seen REAL NOT NULL)'
+        )
+        conn.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Get this thread's connection to the seen store"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.sqlite_path, timeout=10)
+            self._local.conn = conn
+        return conn
+
+    def seen(self, urls: Iterable[str]) -> set:
+        """The subset of urls that have been seen before"""
+        urls = list(urls)
+        if not urls:
+            return set()
+        rows = self._connection().execute(
+            f"SELECT url FROM crawl_seen WHERE url IN ({', '.join('?' * len(urls))})", urls
+        ).fetchall()
+        return {url for (url,) in rows}
+
+    def add(self, urls: Iterable[str], source: str = None):
+        conn = self._connection()
+        with conn:
+            conn.executemany(
+                'INSERT OR IGNORE INTO crawl_seen (url, source, first_seen) VALUES (?, ?, ?)',
+                [(url, source, time.time()) for url in urls]
+            )
+
+
+class CategoryCrawler:
+    """Discovers new article links on category pages.
+
+    Pages are read newest first: links are collected page by page following
+    rel="next" / "Next" controls, and paging stops at the first page that
+    contains an article link that was already scraped, since everything after
+    it is older.
+    """
+
+    def __init__(self,
+                 fetch_page: Callable[[str], Tuple[bytes, str]],
+                 seen_store: SeenStore,
+                 max_pages: int = 5,
+                 max_articles: int = 30,
+                 parser_backend: str = 'auto'):
+        """Set up the crawler; fetch_page(url) returns the raw body and its encoding"""
+        self.fetch_page = fetch_page
+        self.seen_store = seen_store
+        self.max_pages = max_pages
+        self.max_articles = max_articles
+        self.parser_backend = parser_backend
+
+    def parse_listing(self, body: bytes, page_url: str, encoding: str = None,
+                      category_url: str = None) -> Tuple[List[str], Optional[str]]:
+        """Canonical article links (in page order) and the next page URL of one listing page"""
+        category_url = category_url or page_url
+        links = get_parser_backend(self.parser_backend).extract_links(body, page_url, encoding)
+
+        article_urls = []
+        next_page = None
+        for link in links:
+            url = canonicalize_url(link['href'], page_url)
+            if url is None:
+                continue
+            if next_page is None and _is_next_page_link(link) and same_site(url, page_url):
+                next_page = url
+            elif looks_like_article(url, category_url) and url not in article_urls:
+                article_urls.append(url)
+
+        return article_urls, next_page
+
+    def discover(self, category_url: str, fetch_page: Callable[[str], Tuple[bytes, str]] = None) -> List[str]:
+        """Article URLs on the category's pages that have not been scraped yet, newest first
+
+        fetch_page, if given, replaces the crawler's own fetcher for this call.
+        """
+        fetch_page = fetch_page or self.fetch_page
+        category_url = canonicalize_url(category_url) or category_url
+        new_urls = []
+        visited_pages = set()
+        page_url = category_url
+
+        while page_url and page_url not in visited_pages and len(visited_pages) < self.max_pages:
+            visited_pages.add(page_url)
+            print(f"Crawling {page_url}...")
+            body, encoding = fetch_page(page_url)
+            article_urls, next_page = self.parse_listing(body, page_url, encoding, category_url)
+
+            seen = self.seen_store.seen(article_urls)
+            for url in article_urls:
+                if url not in seen and url not in new_urls:
+                    new_urls.append(url)
+
+            # Reached articles we already have: the rest of the listing is older
+            if seen or len(new_urls) >= self.max_articles:
+                break
+            page_url = next_page
+
+        return new_urls[:self.max_articles]
+
+    def mark_seen(self, urls: Iterable[str], source: str = None):
+        """Record scraped article URLs so later crawls stop when they reach them"""
+        self.seen_store.add(urls, source)
@@ -0,0 +1,338 @@
+import re
+from typing import List, Dict, Any, Optional, Tuple
+from urllib.parse import urljoin
+
+from bs4 import Tag
+
+# Selectors for each field, in priority order
+CONTENT_SELECTORS = [
+    'article', '.article', '.post', '.content', '.entry-content',
+    '.post-content', '.article-content', 'main', '#content',
+    '.story-body', '.story', '.news-article', '.news-content'
+]
+
+DATE_SELECTORS = [
+    'time', '.date', '.published', '.post-date', '.article-date',
+    'meta[property="article:published_time"]', 'meta[name="date"]',
+    '.byline time', '.meta-date', '.entry-date'
+]
+
+AUTHOR_SELECTORS = [
+    '.author', '.byline', '.article-author', '.entry-author',
+    'meta[name="author"]', '.writer', '.post-author'
+]
+
+IMAGE_SELECTORS = [
+    'meta[property="og:image"]',
+    'meta[name="twitter:image"]',
+    '.featured-image img',
+    '.article-featured-image img',
+    '.post-thumbnail img',
+    'article img:first-of-type',
+    '.entry-content img:first-of-type'
+]
+
+# Selector lists by field; extraction profiles and the 'selectors' result use these field names
+FIELD_SELECTORS = {
+    'content': CONTENT_SELECTORS,
+    'date': DATE_SELECTORS,
+    'author': AUTHOR_SELECTORS,
+    'image': IMAGE_SELECTORS
+}
+
+# Key of each field in the extracted data
+FIELD_KEYS = {'content': 'content', 'date': 'publish_date', 'author': 'author', 'image': 'image_url'}
+
+# Titles that say nothing about the page, so the first <h1> is used instead
+GENERIC_TITLES = ['home', 'homepage', 'index']
+
+# Fallback paragraphs shorter than this are likely UI elements
+MIN_FALLBACK_PARAGRAPH_LENGTH = 40
+
+_COMPOUND_PATTERN = re.compile(
+    r'^(?P<tag>[a-zA-Z][\w-]*)?'
+    r'(?P<rest>(?:[.#][\w-]+|\[[\w:-]+="[^"]*"\])*)'
+    r'(?P<first_of_type>:first-of-type)?$'
+)
+_PART_PATTERN = re.compile(r'([.#])([\w-]+)|\[([\w:-]+)="([^"]*)"\]')
+
+
+class _Compound:
+    """One compound selector such as meta[name="author"] or img:first-of-type"""
+
+    def __init__(self, text: str):
+        match = _COMPOUND_PATTERN.match(text)
+        if not match:
+            raise ValueError(f"Unsupported selector: {text}")
+
+        self.tag = match.group('tag')
+        self.classes = []
+        self.id = None
+        self.attrs = {}
+        self.first_of_type = bool(match.group('first_of_type'))
+
+        for prefix, name, attr, value in _PART_PATTERN.findall(match.group('rest')):
+            if prefix == '.':
+                self.classes.append(name)
+            elif prefix == '#':
+                self.id = name
+            else:
+                self.attrs[attr] = value
+
+    def matches(self, element: Tag) -> bool:
+        if self.tag and element.name != self.tag:
+            return False
+        if self.classes:
+            element_classes = element.get('class') or []
+            if not all(cls in element_classes for cls in self.classes):
+                return False
+        if self.id and element.get('id') != self.id:
+            return False
+        for attr, value in self.attrs.items():
+            if element.get(attr) != value:
+                return False
+        if self.first_of_type:
+            for sibling in element.previous_siblings:
+                if isinstance(sibling, Tag) and sibling.name == element.name:
+                    return False
+        return True
+
+
+class CompiledSelector:
+    """A CSS selector limited to the subset used by the extraction rules.
+
+    Supports tag, .class, #id, [attr="value"], :first-of-type and the
+    descendant combinator, which covers every selector in this module.
+    """
+
+    def __init__(self, selector: str):
+        self.selector = selector
+        self.compounds = [_Compound(part) for part in selector.split()]
+        self.key = self.compounds[-1]
+
+    def matches(self, element: Tag) -> bool:
+        if not self.key.matches(element):
+            return False
+
+        # Remaining compounds must match ancestors, innermost first
+        ancestors = element.parents
+        for compound in reversed(self.compounds[:-1]):
+            for ancestor in ancestors:
+                if isinstance(ancestor, Tag) and compound.matches(ancestor):
+                    break
+            else:
+                return False
+        return True
+
+
+class SinglePassExtractor:
+    """Collects title, content, date, author and image candidates in one walk of the tree.
+
+    Selectors are dispatched by tag name, class and id of their rightmost
+    compound, so each element is only checked against selectors it could match.
+    The first match of every selector is kept and the winner for each field is
+    chosen afterwards with the same priority order as the selector lists.
+    An empty selector list means the field is not looked for at all.
+    """
+
+    def __init__(self,
+                 content_selectors: List[str] = None,
+                 date_selectors: List[str] = None,
+                 author_selectors: List[str] = None,
+                 image_selectors: List[str] = None):
+        self.fields = {
+            'content': [CompiledSelector(s) for s in _or_default(content_selectors, CONTENT_SELECTORS)],
+            'date': [CompiledSelector(s) for s in _or_default(date_selectors, DATE_SELECTORS)],
+            'author': [CompiledSelector(s) for s in _or_default(author_selectors, AUTHOR_SELECTORS)],
+            'image': [CompiledSelector(s) for s in _or_default(image_selectors, IMAGE_SELECTORS)]
+        }
+
+        self._by_tag = {}
+        self._by_class = {}
+        self._by_id = {}
+        self._universal = []
+        for selectors in self.fields.values():
+            for selector in selectors:
+                key = selector.key
+                if key.id:
+                    self._by_id.setdefault(key.id, []).append(selector)
+                elif key.classes:
+                    self._by_class.setdefault(key.classes[0], []).append(selector)
+                elif key.tag:
+                    self._by_tag.setdefault(key.tag, []).append(selector)
+                else:
+                    self._universal.append(selector)
+
+    def _candidate_selectors(self, element: Tag) -> List[CompiledSelector]:
+        candidates = list(self._universal)
+        candidates.extend(self._by_tag.get(element.name, ()))
+        for cls in element.get('class') or ():
+            candidates.extend(self._by_class.get(cls, ()))
+        element_id = element.get('id')
+        if element_id:
+            candidates.extend(self._by_id.get(element_id, ()))
+        return candidates
+
+    def collect(self, soup) -> Dict[str, Any]:
+        """Walk the tree once and record the first match of each selector"""
+        first_matches = {}
+        content_roots = {}  # id(element) -> paragraphs inside it
+        paragraphs = []
+        title_element = None
+        h1_element = None
+        content_selectors = set(self.fields['content'])
+
+        for element in soup.descendants:
+            if not isinstance(element, Tag):
+                continue
+
+            name = element.name
+            if name == 'title' and title_element is None:
+                title_element = element
+            elif name == 'h1' and h1_element is None:
+                h1_element = element
+            elif name == 'p':
+                paragraphs.append(element)
+                if content_roots:
+                    for parent in element.parents:
+                        if id(parent) in content_roots:
+                            content_roots[id(parent)].append(element)
+
+            for selector in self._candidate_selectors(element):
+                if selector in first_matches or not selector.matches(element):
+                    continue
+                first_matches[selector] = element
+                if selector in content_selectors:
+                    content_roots.setdefault(id(element), [])
+
+        return {
+            'first_matches': first_matches,
+            'content_roots': content_roots,
+            'paragraphs': paragraphs,
+            'title_element': title_element,
+            'h1_element': h1_element
+        }
+
+    def extract(self, soup, url: str, profile: Dict[str, List[str]] = None) -> Dict[str, Any]:
+        """Extract title, content, publish_date, author and image_url (None when not found)
+
+        'selectors' in the result names the selector each field came from (None
+        when none matched). With a profile (field -> selectors to try first, an
+        empty list for fields the site does not have), the tree is first walked
+        with the profile's selectors, and the full lists for fields without an
+        entry. Fields the profile misses are listed in 'fallbacks' and come
+        from a second walk with the full selector lists.
+        """
+        if not profile:
+            fields = self._extract_fields(self.collect(soup), url)
+            fields['fallbacks'] = []
+            return fields
+
+        extractor = compile_profile(profile)
+        fields = extractor._extract_fields(extractor.collect(soup), url)
+        fallbacks = [field for field in self.fields if profile.get(field) and fields['selectors'][field] is None]
+        if fallbacks:
+            full = self._extract_fields(self.collect(soup), url)
+            for field in fallbacks:
+                fields[FIELD_KEYS[field]] = full[FIELD_KEYS[field]]
+                fields['selectors'][field] = full['selectors'][field]
+        fields['fallbacks'] = fallbacks
+        return fields
+
+    def _extract_fields(self, collected: Dict[str, Any], url: str) -> Dict[str, Any]:
+        first_matches = collected['first_matches']
+        selectors = {}
+
+        # Title: <title>, or the first <h1> when the title is missing or generic
+        title = None
+        if collected['title_element'] is not None:
+            title = collected['title_element'].text.strip()
+        if not title or title.lower() in GENERIC_TITLES:
+            if collected['h1_element'] is not None:
+                title = collected['h1_element'].text.strip()
+
+        # Content: paragraphs of the first element matched by the best selector that has any
+        content = ""
+        selectors['content'] = None
+        for selector in self.fields['content']:
+            element = first_matches.get(selector)
+            if element is None:
+                continue
+            root_paragraphs = collected['content_roots'][id(element)]
+            if root_paragraphs:
+                content = " ".join([_paragraph_text(p) for p in root_paragraphs])
+                selectors['content'] = selector.selector
+                break
+
+        if not content:
+            texts = [_paragraph_text(p) for p in collected['paragraphs']]
+            content = " ".join([text for text in texts if len(text) > MIN_FALLBACK_PARAGRAPH_LENGTH])
+
+        publish_date, selectors['date'] = self._best_value(first_matches, self.fields['date'],
+                                                           lambda el: el.text.strip())
+        author, selectors['author'] = self._best_value(first_matches, self.fields['author'], lambda el: el.text.strip())
+        image_url, selectors['image'] = self._best_value(first_matches, self.fields['image'],
+                                                         lambda el: el.get('src', ''))
+
+        # Handle relative URLs
+        if image_url and not image_url.startswith(('http://', 'https://')):
+            image_url = urljoin(url, image_url)
+
+        return {
+            'title': title,
+            'content': content,
+            'publish_date': publish_date,
+            'author': author,
+            'image_url': image_url,
+            'selectors': selectors
+        }
+
+    @staticmethod
+    def _best_value(first_matches, selectors: List[CompiledSelector], element_value) -> Tuple[Optional[str], Optional[str]]:
+        """Value and selector of the highest priority matched selector; <meta> elements use their content attribute"""
+        for selector in selectors:
+            element = first_matches.get(selector)
+            if element is not None:
+                if element.name == 'meta':
+                    return element.get('content', ''), selector.selector
+                return element_value(element), selector.selector
+        return None, None
+
+
+def _paragraph_text(paragraph: Tag) -> str:
+    """Text of a <p> without the text of <p> elements nested in it.
+
+    HTML5 parsers close an open <p> when the next one starts; html.parser
+    nests them instead, which would repeat the inner paragraphs' text.
+    """
+    if paragraph.find('p') is None:
+        return paragraph.text.strip()
+    return ''.join(text for text in paragraph.strings if text.find_parent('p') is paragraph).strip()
+
+
+def _or_default(selectors: Optional[List[str]], default: List[str]) -> List[str]:
+    return default if selectors is None else selectors
+
+
+# Compiled once per process and shared by every parse
+DEFAULT_EXTRACTOR = SinglePassExtractor()
+
+# Extractors compiled from extraction profiles, kept per process
+MAX_COMPILED_PROFILES = 256
+_compiled_profiles = {}
+
+
+def compile_profile(profile: Dict[str, List[str]]) -> SinglePassExtractor:
+    """Extractor that looks for a profile's selectors (the full list for fields without an entry)"""
+    key = tuple(sorted((field, tuple(selectors)) for field, selectors in profile.items()))
+    extractor = _compiled_profiles.get(key)
+    if extractor is None:
+        if len(_compiled_profiles) >= MAX_COMPILED_PROFILES:
+            _compiled_profiles.clear()
+        extractor = _compiled_profiles[key] = SinglePassExtractor(
+            content_selectors=profile.get('content'),
+            date_selectors=profile.get('date'),
+            author_selectors=profile.get('author'),
+            image_selectors=profile.get('image')
+        )
+    return extractor
@@ -0,0 +1,187 @@
+import os
+import time
+import sqlite3
+import threading
+from typing import Dict, Any, List, Optional
+
+from extraction import FIELD_SELECTORS, CompiledSelector
+from urls import site_of
+
+# How long profiles read from the store are trusted before re-reading changes made by other processes
+RELOAD_SECONDS = 60
+
+
+class ExtractionProfiles:
+    """Learns which selector yields each field on each site, so later pages try that selector first.
+
+    Every parse records the selector each field came from ('' when none
+    matched). Once a selector has won min_hits times on a site and more often
+    than any other, it becomes the site's profile for that field; a field that
+    usually matches nothing is marked absent and not looked for. Hand-written
+    overrides (site -> field -> selectors) are tried before the learned ones.
+    Every verify_every-th page of a site is parsed without its profile, so
+    selectors that stopped working are noticed.
+
+    Counts live in a SQLite file shared by all worker processes.
+    """
+
+    def __init__(self,
+                 sqlite_path: str,
+                 min_hits: int = 3,
+                 verify_every: int = 20,
+                 overrides: Dict[str, Dict[str, List[str]]] = None):
+        self.sqlite_path = sqlite_path
+        self.min_hits = min_hits
+        self.verify_every = verify_every
+        self.overrides = self._valid_overrides(overrides or {})
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._profiles = {}  # site -> (loaded_at, profile), read from the store on demand
+        self._pages = {}     # site -> profile lookups in this process, for the verification pages
+
+        directory = os.path.dirname(sqlite_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = self._connection()
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS selector_hits ('
+            'site TEXT NOT NULL, field TEXT NOT NULL, selector TEXT NOT NULL, hits INTEGER NOT NULL DEFAULT 0, '
+            'PRIMARY KEY (site, field, selector))'
+        )
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS site_pages ('
+            'site TEXT PRIMARY KEY, pages INTEGER NOT NULL DEFAULT 0, '
+            'profiled INTEGER NOT NULL DEFAULT 0, fallbacks INTEGER NOT NULL DEFAULT 0)'
+        )
+        conn.commit()
+
+    @classmethod
+    def from_config(cls, profile_config: Dict[str, Any]) -> 'ExtractionProfiles':
+        """Build the profile store from an EXTRACTION_PROFILE_CONFIG-style dict"""
+        return cls(
+            profile_config.get('sqlite_path', 'cache/extraction_profiles.sqlite3'),
+            min_hits=profile_config.get('min_hits', 3),
+            verify_every=profile_config.get('verify_every', 20),
+            overrides=profile_config.get('overrides')
+        )
+
+    @staticmethod
+    def _valid_overrides(overrides: Dict[str, Dict[str, List[str]]]) -> Dict[str, Dict[str, List[str]]]:
+        """Overrides keyed like the learned profiles, without fields or selectors the extractor can't use"""
+        valid = {}
+        for site, fields in overrides.items():
+            for field, selectors in fields.items():
+                if field not in FIELD_SELECTORS:
+                    print(f"Ignoring extraction override for unknown field '{field}' on {site}")
+                    continue
+                usable = []
+                for selector in selectors:
+                    try:
+                        CompiledSelector(selector)
+                    except ValueError as e:
+                        print(f"Ignoring extraction override on {site}: {str(e)}")
+                        continue
+                    usable.append(selector)
+                # An empty list says the site has no such field; one left empty by bad selectors says nothing
+                if usable or not selectors:
+                    valid.setdefault(site_of(f'http://{site}/'), {})[field] = usable
+        return valid
+
+    def _connection(self) -> sqlite3.Connection:
+        """Get this thread's connection to the profile store"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.sqlite_path, timeout=10)
+            self._local.conn = conn
+        return conn
+
+    def _learned(self, site: str) -> Dict[str, List[str]]:
+        """Winning selector per field of a site ([] for fields that usually match nothing)"""
+        hits = {}
+        for field, selector, count in self._connection().execute(
+                'SELECT field, selector, hits FROM selector_hits WHERE site = ?', (site,)):
+            hits.setdefault(field, {})[selector] = count
+
+        learned = {}
+        for field, counts in hits.items():
+            selector, count = max(counts.items(), key=lambda item: item[1])
+            # A tie means the site has no clear winner yet
+            if count >= self.min_hits and list(counts.values()).count(count) == 1:
+                learned[field] = [selector] if selector else []
+        return learned
+
+    def profile(self, site: str) -> Dict[str, List[str]]:
+        """The compiled profile of a site: field -> selectors to try first (overrides, then the learned one)"""
+        with self._lock:
+            loaded = self._profiles.get(site)
+        if loaded is not None and time.monotonic() - loaded[0] < RELOAD_SECONDS:
+            return loaded[1]
+
+        profile = {field: list(selectors) for field, selectors in self._learned(site).items()}
+        for field, selectors in self.overrides.get(site, {}).items():
+            profile[field] = list(dict.fromkeys(selectors + profile.get(field, []))) if selectors else []
+        with self._lock:
+            self._profiles[site] = (time.monotonic(), profile)
+        return profile
+
+    def profile_for(self, url: str) -> Optional[Dict[str, List[str]]]:
+        """Profile to parse url with, or None to run the full selector lists (no profile yet, or a verification page)"""
+        site = site_of(url)
+        with self._lock:
+            pages = self._pages[site] = self._pages.get(site, 0) + 1
+        if self.verify_every and pages % self.verify_every == 0:
+            return None
+        return self.profile(site) or None
+
+    def record(self, url: str, selectors: Dict[str, Optional[str]], fallbacks: List[str], profiled: bool):
+        """Record the selector each field of a parsed page came from (None when none matched)"""
+        site = site_of(url)
+        conn = self._connection()
+        with conn:
+            conn.executemany(
+                'INSERT INTO selector_hits (site, field, selector, hits) VALUES (?, ?, ?, 1) '
+                'ON CONFLICT (site, field, selector) DO UPDATE SET hits = hits + 1',
+                [(site, field, selector or '') for field, selector in selectors.items()]
+            )
+            conn.execute(
+                'INSERT INTO site_pages (site, pages, profiled, fallbacks) VALUES (?, 1, ?, ?) '
+                'ON CONFLICT (site) DO UPDATE SET pages = pages + 1, profiled = profiled + excluded.profiled, '
+                'fallbacks = fallbacks + excluded.fallbacks',
+                (site, int(profiled), len(fallbacks))
+            )
+        if fallbacks or not profiled:
+            # Still learning, or the profile missed: rebuild it from the counts on the next lookup
+            with self._lock:
+                self._profiles.pop(site, None)
+
+    def hit_rates(self) -> Dict[str, Any]:
+        """Share of pages each selector supplied its field on, over all sites, zero-hit selectors included.
+
+        Selectors that never win are candidates for pruning. A page counts
+        for the selector its value came from, so once a site has a profile its
+        other selectors stop collecting hits there.
+        """
+        totals = {field: {selector: 0 for selector in selectors} for field, selectors in FIELD_SELECTORS.items()}
+        for field, selector, hits in self._connection().execute(
+                'SELECT field, selector, SUM(hits) FROM selector_hits GROUP BY field, selector'):
+            totals.setdefault(field, {})[selector] = hits
+
+        rates = {}
+        for field, counts in totals.items():
+            pages = sum(counts.values())
+            rates[field] = {
+                selector or '(no match)': {'hits': hits, 'rate': round(hits / pages, 3) if pages else 0.0}
+                for selector, hits in sorted(counts.items(), key=lambda item: -item[1])
+            }
+        return rates
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Per-selector hit rates plus each site's profile and how often it was used and missed"""
+        sites = {}
+        for site, pages, profiled, fallbacks in self._connection().execute(
+                'SELECT site, pages, profiled, fallbacks FROM site_pages ORDER BY pages DESC'):
+            sites[site] = {'pages': pages, 'profiled': profiled, 'fallbacks': fallbacks,
+                           'profile': self.profile(site)}
+        return {'hit_rates': self.hit_rates(), 'sites': sites}
@@ -1,4 +1,4 @@
-from flask import Flask, render_template, request, jsonify, send_file
+from flask import Flask, Response, render_template, request, jsonify, send_file, stream_with_context
 import os
 import json
 import time
@@ -8,7 +8,14 @@ import markdown
 import tempfile
 from pathlib import Path
 
-from news_scraper import NewsScraperAndGenerator
+from news_scraper import NewsScraperAndGenerator, remaining_deadline
+from jobs import JobManager
+from result_store import ResultStore
+from warmer import CacheWarmer, configured_urls
+from planner import plan_sources
+from host_scheduler import INTERACTIVE, BULK, PRIORITIES
+from worker_pool import PoolSaturatedError, shared_worker_pool
+from cancellation import CancelToken
 import config
 
 # Setup logging
@@ -28,6 +35,25 @@ app = Flask(__name__)
 # Global scraper cache
 scraper_cache = {}
 
+# Background jobs; state and results live in SQLite so any worker can serve them
+job_manager = JobManager.from_config(config.JOBS_CONFIG)
+
+# Scraped articles stay server-side; clients get a result set id and previews
+result_store = ResultStore.from_config(config.RESULT_STORE_CONFIG)
+
+# Scrapes running in this process that a client can cancel, by request id
+# (the result set id for streamed scrapes, a client-chosen 'request_id' otherwise)
+active_scrapes = {}
+
+# Re-scrapes the configured sources before their cache entries expire (scraping needs no API key)
+cache_warmer = CacheWarmer.from_config(
+    NewsScraperAndGenerator('', config.OPENAI_MODEL),
+    config.WARMER_CONFIG,
+    configured_urls(config.NEWS_SOURCES, config.WARMER_CONFIG.get('topics'))
+)
+if config.WARMER_CONFIG['enabled']:
+    cache_warmer.start()
+
 def get_scraper(api_key):
     """Get or create a scraper instance using the provided API key"""
     if api_key in scraper_cache:
@@ -37,7 +63,9 @@ def get_scraper(api_key):
     else:
         # Create new instance
         logger.info(f"Creating new scraper for API key ending in ...{api_key[-4:]}")
-        scraper = NewsScraperAndGenerator(api_key, config.OPENAI_MODEL)
+        # Every scraper shares the warmer's host scheduler, so interactive fetches go ahead of its refreshes
+        scraper = NewsScraperAndGenerator(api_key, config.OPENAI_MODEL,
+                                          host_scheduler=cache_warmer.scraper.host_scheduler)
         scraper_cache[api_key] = scraper
         return scraper
 
@@ -54,6 +82,153 @@ def get_sources_by_topic(topic):
     else:
         return config.NEWS_SOURCES.get(topic, [])
 
+def matches_keyword(article, search_keyword):
+    """Check whether a successfully scraped article mentions the keyword in its title or content
+    
+    Partial articles (previews) are matched on their description instead of the content.
+    """
+    if 'error' in article:
+        return False
+    
+    keyword = search_keyword.lower()
+    title = article.get('title', '').lower()
+    content = article.get('content', article.get('description', '')).lower()
+    return keyword in title or keyword in content
+
+def get_max_workers(data):
+    """Parallelism requested by the client, capped so one request can't take over the shared worker pool"""
+    max_workers = int(data.get('max_workers', 5))
+    return max(1, min(max_workers, config.WORKER_POOL_CONFIG['max_workers_per_call']))
+
+def pool_saturated_response(e):
+    """503 telling the client to retry shortly, for requests that found the worker pool full"""
+    logger.warning(f"Rejected scrape: {e}")
+    response = jsonify({'error': str(e)})
+    response.headers['Retry-After'] = '5'
+    return response, 503
+
+class InvalidParameterError(ValueError):
+    """Raised for a malformed request parameter; answered with a 400"""
+    pass
+
+def get_deadline(data):
+    """Time budget in seconds for a scrape request, falling back to SCRAPER_CONFIG's default"""
+    deadline = data.get('deadline')
+    if deadline in (None, ''):
+        return config.SCRAPER_CONFIG['deadline_seconds']
+    try:
+        deadline = float(deadline)
+    except (TypeError, ValueError):
+        raise InvalidParameterError('Deadline must be a number of seconds')
+    # NaN fails this check too
+    if not deadline > 0 or deadline == float('inf'):
+        raise InvalidParameterError('Deadline must be a positive number of seconds')
+    return deadline
+
+def run_scrape(scraper, urls, search_keyword='', max_workers=5, engine=None, crawl=False, deadline=None, job=None,
+               priority=INTERACTIVE, cancel=None, preview=False):
+    """Scrape the URLs, apply keyword filtering and store the articles as a result set
+    
+    With crawl, the URLs are category pages and only articles not scraped before are fetched.
+    With a deadline (seconds), sources still pending when it expires are returned as timed out.
+    Returns the result set id and article previews; job, if given, gets progress and can cancel.
+    cancel, a CancelToken, stops the scrape early and keeps the articles finished so far.
+    Variants of the same URL are fetched once; see planner.SourcePlan.
+    With preview, only each page's <head> is read and the articles are partial
+    until promoted through /api/results/<result_set_id>/<index>/full.
+    """
+    started = time.monotonic()
+    plan = plan_sources(urls)
+    logger.info(f"Planned {plan.summary()}")
+    urls = plan.urls
+    if crawl:
+        urls = scraper.discover_article_urls(urls, max_workers=max_workers, deadline=deadline, priority=priority,
+                                             cancel=cancel)
+        articles = scraper.iter_scrape_new_articles(urls, max_workers=max_workers, engine=engine,
+                                                    deadline=remaining_deadline(started, deadline), priority=priority,
+                                                    cancel=cancel, preview=preview)
+    else:
+        articles = scraper.iter_scrape_multiple_sources(urls, max_workers=max_workers, engine=engine, deadline=deadline,
+                                                        priority=priority, cancel=cancel, preview=preview)
+    
+    results = []
+    try:
+        for article in articles:
+            results.append(plan.annotate(article))
+            if job is not None:
+                job.check_cancelled()
+                job.report_progress({'completed': len(results), 'total_urls': len(urls)})
+    finally:
+        # Stops the fetches still pending when the job was cancelled
+        articles.close()
+    
+    # Apply keyword filtering if specified
+    if search_keyword:
+        results = [article for article in results if matches_keyword(article, search_keyword)]
+    
+    # Count valid articles
+    valid_articles = [a for a in results if 'error' not in a]
+    timed_out = [a for a in results if a.get('timed_out')]
+    
+    result_set_id = result_store.save(results)
+    
+    return {
+        'result_set_id': result_set_id,
+        'total': len(valid_articles),
+        'timed_out': len(timed_out),
+        'cancelled': cancel is not None and cancel.cancelled,
+        'results': [result_store.preview(article, index) for index, article in enumerate(results)]
+    }
+
+def resolve_scraped_data(data):
+    """Articles to generate from: the stored result set named by result_set_id, or inline scraped_data
+    
+    Returns None when the result set is unknown or has expired.
+    """
+    result_set_id = data.get('result_set_id')
+    if result_set_id:
+        return result_store.get_articles(result_set_id)
+    return data.get('scraped_data', [])
+
+def run_generate(scraper, scraped_data, data):
+    """Generate an article from scraped data using the request's template and overrides"""
+    template = data.get('template', 'telecom_news')
+    
+    # Get template settings
+    template_config = config.ARTICLE_TEMPLATES.get(template, {})
+    
+    # Use custom values or fall back to template defaults
+    topic = data.get('topic', '') or template_config.get('topic', '')
+    audience = data.get('audience', '') or template_config.get('audience', 'general')
+    tone = data.get('tone', '') or template_config.get('tone', 'professional')
+    max_length = int(data.get('max_length', 800)) or template_config.get('max_length', 800)
+    include_images = data.get('include_images', True)
+    
+    # Generate article
+    result = scraper.generate_article_for_orange(
+        scraped_data,
+        topic=topic,
+        audience=audience,
+        tone=tone,
+        max_length=max_length,
+        include_images=include_images
+    )
+    
+    # Prepare HTML content
+    content = result.get('content', '')
+    
+    # Use Python-Markdown to convert to HTML
+    try:
+        html_content = markdown.markdown(content)
+    except Exception as e:
+        logger.error(f"Error converting markdown to HTML: {e}")
+        html_content = f"<p>Error rendering HTML: {str(e)}</p><pre>{content}</pre>"
+    
+    return {
+        'article': result,
+        'html_content': html_content
+    }
+
 @app.route('/')
 def index():
     """Render the main application page"""
@@ -109,6 +284,48 @@ def get_template_defaults():
         logger.exception(f"Error getting template defaults: {e}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/stats', methods=['GET'])
+def get_stats():
+    """API endpoint to get connection pool, article cache and per-host scheduler stats for each active scraper,
+    plus the shared worker pool's usage and the configured sources' change rate, latency and revisit interval"""
+    try:
+        connection_stats = {}
+        cache_stats = {}
+        host_stats = {}
+        for api_key, scraper in scraper_cache.items():
+            connection_stats[f"...{api_key[-4:]}"] = scraper.get_connection_stats()
+            cache_stats[f"...{api_key[-4:]}"] = scraper.get_cache_stats()
+            host_stats[f"...{api_key[-4:]}"] = scraper.get_host_stats()
+        
+        return jsonify({
+            'success': True,
+            'connection_pool': connection_stats,
+            'article_cache': cache_stats,
+            'hosts': host_stats,
+            'worker_pool': shared_worker_pool(config.WORKER_POOL_CONFIG).stats(),
+            'sources': cache_warmer.scraper.get_source_stats(configured_urls(config.NEWS_SOURCES)),
+            'extraction': cache_warmer.scraper.get_extraction_stats(),
+            'light_variants': cache_warmer.scraper.get_light_variant_stats()
+        })
+        
+    except Exception as e:
+        logger.exception(f"Error getting stats: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/warmer', methods=['GET'])
+def get_warmer_status():
+    """API endpoint to get the cache warmer's schedule and last run"""
+    try:
+        return jsonify({
+            'success': True,
+            'enabled': config.WARMER_CONFIG['enabled'],
+            **cache_warmer.status()
+        })
+    
+    except Exception as e:
+        logger.exception(f"Error getting warmer status: {e}")
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/scrape', methods=['POST'])
 def scrape_news():
     """API endpoint to scrape news sources"""
@@ -123,7 +340,13 @@ def scrape_news():
         topic = data.get('topic', 'all')
         custom_urls = data.get('custom_urls', [])
         search_keyword = data.get('search_keyword', '')
-        max_workers = int(data.get('max_workers', 5))
+        max_workers = get_max_workers(data)
+        engine = data.get('engine') or config.SCRAPER_CONFIG['engine']
+        crawl = bool(data.get('crawl', False))
+        preview = bool(data.get('preview', False))
+        deadline = get_deadline(data)
+        # Optional id under which the client can cancel this scrape via /api/scrape/<request_id>/cancel
+        request_id = data.get('request_id')
         
         # Validate API key
         if not api_key:
@@ -149,106 +372,386 @@ def scrape_news():
         logger.info(f"Scraping URLs: {urls}")
         
         # Perform scraping
+        cancel = CancelToken()
+        if request_id:
+            active_scrapes[request_id] = cancel
         try:
-            results = scraper.scrape_multiple_sources(urls, max_workers=max_workers)
-            
-            # Apply keyword filtering if specified
-            if search_keyword:
-                filtered_results = []
-                for article in results:
-                    if 'error' in article:
-                        continue
-                    
-                    title = article.get('title', '').lower()
-                    content = article.get('content', '').lower()
-                    
-                    if search_keyword.lower() in title or search_keyword.lower() in content:
-                        filtered_results.append(article)
-                
-                results = filtered_results
-            
-            # Count valid articles
-            valid_articles = [a for a in results if 'error' not in a]
+            scrape_result = run_scrape(scraper, urls, search_keyword, max_workers, engine, crawl, deadline,
+                                       cancel=cancel, preview=preview)
             
             # Return results
             return jsonify({
                 'success': True,
-                'total': len(valid_articles),
-                'results': results
+                **scrape_result
             })
         
+        except PoolSaturatedError as e:
+            return pool_saturated_response(e)
         except Exception as e:
             logger.exception(f"Error during scraping execution: {e}")
             return jsonify({'error': f'Error during scraping: {str(e)}'}), 500
+        finally:
+            if request_id:
+                active_scrapes.pop(request_id, None)
+        
+    except InvalidParameterError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.exception(f"Error during scraping: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/scrape/stream', methods=['POST'])
+def scrape_news_stream():
+    """API endpoint to scrape news sources, streaming each article as NDJSON as soon as it completes
+    
+    Emits one JSON object per line: a 'start' event with the number of URLs to
+    scrape (after discovery when crawling category pages) and the result set id, an 'article' event with a preview of each scraped source
+    (in completion order) and a final 'summary'.
+    
+    The scrape stops when the client disconnects or posts to
+    /api/scrape/<result_set_id>/cancel; the summary then says 'cancelled'.
+    With 'preview', only each page's <head> is read and the articles are marked 'partial'.
+    """
+    try:
+        # Get request data
+        data = request.json
+        logger.info(f"Received streaming scrape request with data: {data}")
+        
+        api_key = data.get('api_key', '')
+        topic = data.get('topic', 'all')
+        custom_urls = data.get('custom_urls', [])
+        search_keyword = data.get('search_keyword', '')
+        max_workers = get_max_workers(data)
+        engine = data.get('engine') or config.SCRAPER_CONFIG['engine']
+        crawl = bool(data.get('crawl', False))
+        preview_only = bool(data.get('preview', False))
+        deadline = get_deadline(data)
+        
+        # Validate API key
+        if not api_key:
+            return jsonify({'error': 'API key is required'}), 400
+        
+        scraper = get_scraper(api_key)
+        
+        # Determine sources
+        urls = custom_urls if custom_urls else get_sources_by_topic(topic)
+        if not urls:
+            return jsonify({'error': 'No sources specified'}), 400
         
+        logger.info(f"Streaming scrape of URLs: {urls}")
+        plan = plan_sources(urls)
+        logger.info(f"Planned {plan.summary()}")
+        urls = plan.urls
+        
+        # Reject up front rather than failing after the stream has started
+        if shared_worker_pool(config.WORKER_POOL_CONFIG).saturated():
+            raise PoolSaturatedError('All scraping workers are busy, try again shortly')
+        
+    except PoolSaturatedError as e:
+        return pool_saturated_response(e)
+    except InvalidParameterError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         logger.exception(f"Error during scraping: {e}")
         return jsonify({'error': str(e)}), 500
+    
+    def generate():
+        started = time.monotonic()
+        completed = 0
+        stored = 0
+        total = 0
+        timed_out = 0
+        result_set_id = result_store.create()
+        cancel = CancelToken()
+        active_scrapes[result_set_id] = cancel
+        articles = None
+        
+        try:
+            # With crawl, the URLs are category pages: find their new articles first
+            if crawl:
+                article_urls = scraper.discover_article_urls(urls, max_workers=max_workers, deadline=deadline,
+                                                             cancel=cancel)
+                articles = scraper.iter_scrape_new_articles(article_urls, max_workers=max_workers, engine=engine,
+                                                            deadline=remaining_deadline(started, deadline),
+                                                            cancel=cancel, preview=preview_only)
+            else:
+                article_urls = urls
+                articles = scraper.iter_scrape_multiple_sources(urls, max_workers=max_workers, engine=engine,
+                                                                deadline=deadline, cancel=cancel, preview=preview_only)
+            
+            yield json.dumps({'type': 'start', 'total_urls': len(article_urls), 'result_set_id': result_set_id}) + '\n'
+            
+            for article in articles:
+                # A cancel sent to another worker process only reaches us through the result store
+                if result_store.is_cancel_requested(result_set_id):
+                    cancel.cancel()
+                    break
+                completed += 1
+                article = plan.annotate(article)
+                # Filtered-out articles still count towards progress
+                if search_keyword and not matches_keyword(article, search_keyword):
+                    preview = None
+                else:
+                    result_store.add(result_set_id, stored, article)
+                    preview = result_store.preview(article, stored)
+                    stored += 1
+                    if 'error' not in article:
+                        total += 1
+                    elif article.get('timed_out'):
+                        timed_out += 1
+                yield json.dumps({'type': 'article', 'completed': completed, 'article': preview}, ensure_ascii=False) + '\n'
+        except Exception as e:
+            logger.exception(f"Error during streaming scrape: {e}")
+            yield json.dumps({'type': 'error', 'error': f'Error during scraping: {str(e)}'}) + '\n'
+            return
+        finally:
+            # Also runs when the client disconnects and the server closes this generator:
+            # closing the scrape cancels the fetches nobody is waiting for any more
+            active_scrapes.pop(result_set_id, None)
+            if articles is not None:
+                articles.close()
+        
+        if cancel.cancelled:
+            logger.info(f"Streaming scrape {result_set_id} cancelled after {completed} articles")
+        yield json.dumps({
+            'type': 'summary', 'success': True, 'completed': completed, 'total': total, 'timed_out': timed_out,
+            'cancelled': cancel.cancelled, 'preview': preview_only, 'result_set_id': result_set_id
+        }) + '\n'
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='application/x-ndjson',
+        # Ask reverse proxies not to buffer the stream
+        headers={'X-Accel-Buffering': 'no', 'Cache-Control': 'no-cache'}
+    )
+
+@app.route('/api/scrape/<request_id>/cancel', methods=['POST'])
+def cancel_scrape(request_id):
+    """API endpoint to stop a running scrape, keeping the articles it already finished
+    
+    request_id is the result set id of a streamed scrape or the 'request_id'
+    sent with /api/scrape.
+    """
+    try:
+        cancel = active_scrapes.get(request_id)
+        # Streamed scrapes running in another worker process see the flag in the result store
+        flagged = result_store.request_cancel(request_id)
+        if cancel is None and not flagged:
+            return jsonify({'error': 'Scrape not found'}), 404
+        if cancel is not None:
+            cancel.cancel()
+        
+        logger.info(f"Cancellation requested for scrape {request_id}")
+        return jsonify({
+            'success': True,
+            'request_id': request_id
+        })
+        
+    except Exception as e:
+        logger.exception(f"Error cancelling scrape {request_id}: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/results/<result_set_id>/<int:index>', methods=['GET'])
+def get_result_article(result_set_id, index):
+    """API endpoint to get one full article of a stored result set"""
+    try:
+        article = result_store.get_article(result_set_id, index)
+        if article is None:
+            return jsonify({'error': 'Article not found or result set expired'}), 404
+        
+        return jsonify({
+            'success': True,
+            'article': article
+        })
+        
+    except Exception as e:
+        logger.exception(f"Error getting stored article: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/results/<result_set_id>/<int:index>/full', methods=['POST'])
+def promote_result_article(result_set_id, index):
+    """API endpoint to turn a partial (preview) article of a stored result set into the full article
+    
+    Scrapes the article's URL, replaces the stored preview with the result
+    and returns it. Articles that are already complete are returned as they are.
+    """
+    try:
+        data = request.json or {}
+        api_key = data.get('api_key', '')
+        if not api_key:
+            return jsonify({'error': 'API key is required'}), 400
+        
+        article = result_store.get_article(result_set_id, index)
+        if article is None:
+            return jsonify({'error': 'Article not found or result set expired'}), 404
+        
+        if article.get('partial'):
+            scraper = get_scraper(api_key)
+            full_article = scraper.scrape_article(article['url'])
+            if 'error' in full_article:
+                return jsonify({'error': f"Error scraping article: {full_article['error']}"}), 502
+            # Keep the URLs the preview was requested under
+            if article.get('requested_urls'):
+                full_article = dict(full_article, requested_urls=article['requested_urls'])
+            result_store.add(result_set_id, index, full_article)
+            article = full_article
+            logger.info(f"Promoted preview {result_set_id}/{index} to the full article")
+        
+        return jsonify({
+            'success': True,
+            'article': article,
+            'preview': result_store.preview(article, index)
+        })
+        
+    except Exception as e:
+        logger.exception(f"Error promoting stored article: {e}")
+        return jsonify({'error': str(e)}), 500
 
 @app.route('/api/generate', methods=['POST'])
 def generate_article():
-    """API endpoint to generate an article from scraped data"""
+    """API endpoint to generate an article from a stored result set (or inline scraped data)"""
     try:
         # Get request data
         data = request.json
         api_key = data.get('api_key', '')
-        scraped_data = data.get('scraped_data', [])
-        template = data.get('template', 'telecom_news')
-        custom_topic = data.get('topic', '')
-        audience = data.get('audience', '')
-        tone = data.get('tone', '')
-        max_length = int(data.get('max_length', 800))
-        include_images = data.get('include_images', True)
         
         # Validate API key
         if not api_key:
             return jsonify({'error': 'API key is required'}), 400
-            
+        
         # Validate scraped data
+        scraped_data = resolve_scraped_data(data)
+        if scraped_data is None:
+            return jsonify({'error': 'Result set not found or expired, please scrape again'}), 404
         if not scraped_data:
             return jsonify({'error': 'Scraped data is required'}), 400
             
         # Get scraper
         scraper = get_scraper(api_key)
         
-        # Get template settings
-        template_config = config.ARTICLE_TEMPLATES.get(template, {})
+        # Generate article
+        generation = run_generate(scraper, scraped_data, data)
         
-        # Use custom values or fall back to template defaults
-        topic = custom_topic or template_config.get('topic', '')
-        audience = audience or template_config.get('audience', 'general')
-        tone = tone or template_config.get('tone', 'professional')
-        max_length = max_length or template_config.get('max_length', 800)
+        # Return result
+        return jsonify({
+            'success': True,
+            **generation
+        })
         
-        # Generate article
-        result = scraper.generate_article_for_orange(
-            scraped_data,
-            topic=topic,
-            audience=audience,
-            tone=tone,
-            max_length=max_length,
-            include_images=include_images
-        )
+    except Exception as e:
+        logger.exception(f"Error during article generation: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/jobs', methods=['POST'])
+def submit_job():
+    """API endpoint to queue a scrape or generate job and return its id straight away
+    
+    Takes the same fields as /api/scrape or /api/generate plus 'type', and for
+    scrapes an optional fetch 'priority' (default 'bulk'). Poll
+    /api/jobs/<job_id> for progress and the result.
+    """
+    try:
+        # Get request data
+        data = request.json
+        job_type = data.get('type', '')
+        api_key = data.get('api_key', '')
         
-        # Prepare HTML content
-        content = result.get('content', '')
+        if job_type not in ('scrape', 'generate'):
+            return jsonify({'error': "Job type must be 'scrape' or 'generate'"}), 400
         
-        # Use Python-Markdown to convert to HTML
-        try:
-            html_content = markdown.markdown(content)
-        except Exception as e:
-            logger.error(f"Error converting markdown to HTML: {e}")
-            html_content = f"<p>Error rendering HTML: {str(e)}</p><pre>{content}</pre>"
+        # Validate API key
+        if not api_key:
+            return jsonify({'error': 'API key is required'}), 400
+        
+        scraper = get_scraper(api_key)
+        
+        # The stored params are shown when polling, so they never include the API key
+        params = {key: value for key, value in data.items() if key not in ('api_key', 'scraped_data')}
+        
+        if job_type == 'scrape':
+            custom_urls = data.get('custom_urls', [])
+            urls = custom_urls if custom_urls else get_sources_by_topic(data.get('topic', 'all'))
+            if not urls:
+                return jsonify({'error': 'No sources specified'}), 400
+            
+            search_keyword = data.get('search_keyword', '')
+            max_workers = get_max_workers(data)
+            engine = data.get('engine') or config.SCRAPER_CONFIG['engine']
+            crawl = bool(data.get('crawl', False))
+            preview = bool(data.get('preview', False))
+            deadline = get_deadline(data)
+            # Background jobs yield to interactive scrapes unless asked otherwise
+            priority = data.get('priority', BULK)
+            if priority not in PRIORITIES:
+                return jsonify({'error': f"Priority must be one of: {', '.join(PRIORITIES)}"}), 400
+            params['urls'] = urls
+            params['priority'] = priority
+            
+            def handler(job):
+                return run_scrape(scraper, urls, search_keyword, max_workers, engine, crawl, deadline, job=job,
+                                  priority=priority, preview=preview)
+        else:
+            scraped_data = resolve_scraped_data(data)
+            if scraped_data is None:
+                return jsonify({'error': 'Result set not found or expired, please scrape again'}), 404
+            if not scraped_data:
+                return jsonify({'error': 'Scraped data is required'}), 400
+            
+            params['scraped_articles'] = len(scraped_data)
+            
+            def handler(job):
+                return run_generate(scraper, scraped_data, data)
+        
+        job_id = job_manager.submit(job_type, params, handler)
+        logger.info(f"Queued {job_type} job {job_id}")
+        
+        return jsonify({
+            'success': True,
+            'job_id': job_id,
+            'status': 'queued',
+            'status_url': f'/api/jobs/{job_id}'
+        }), 202
+        
+    except InvalidParameterError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.exception(f"Error submitting job: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """API endpoint to get a job's status, progress and result"""
+    try:
+        job = job_manager.get(job_id)
+        if job is None:
+            return jsonify({'error': 'Job not found'}), 404
         
-        # Return result
         return jsonify({
             'success': True,
-            'article': result,
-            'html_content': html_content
+            'job': job
         })
         
     except Exception as e:
-        logger.exception(f"Error during article generation: {e}")
+        logger.exception(f"Error getting job {job_id}: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    """API endpoint to cancel a queued or running job"""
+    try:
+        if not job_manager.cancel(job_id):
+            if job_manager.get(job_id) is None:
+                return jsonify({'error': 'Job not found'}), 404
+            return jsonify({'error': 'Job has already finished'}), 409
+        
+        logger.info(f"Cancellation requested for job {job_id}")
+        return jsonify({
+            'success': True,
+            'job_id': job_id
+        })
+        
+    except Exception as e:
+        logger.exception(f"Error cancelling job {job_id}: {e}")
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/download', methods=['POST'])
@@ -14,6 +14,9 @@ from pathlib import Path
 import markdown
 
 from news_scraper import NewsScraperAndGenerator
+from warmer import CacheWarmer
+from planner import plan_sources
+from host_scheduler import INTERACTIVE, PRIORITIES
 import config
 
 # Setup logging
@@ -45,8 +48,8 @@ class OrangeNewsScraper:
         """Initialize the scraper only when needed"""
         if self.scraper is None:
             self.scraper = NewsScraperAndGenerator(self.api_key, self.model_name)
-            # We're not using the persistent cache as it's causing issues
-            # Just rely on the built-in in-memory cache
+            # The article cache follows CACHE_CONFIG, so with the sqlite backend
+            # fresh articles from previous runs are reused
         return self.scraper
     
     def shutdown(self):
@@ -66,13 +69,30 @@ class OrangeNewsScraper:
         else:
             return config.NEWS_SOURCES.get(topic, [])
     
+    def warm_cache(self, topic: str = 'all', sources: List[str] = None):
+        """Keep the sources' cache entries fresh, refreshing each shortly before it expires, until interrupted"""
+        scraper = self.initialize_scraper()
+        urls = sources or self.get_sources_by_topic(topic)
+        warmer = CacheWarmer.from_config(scraper, config.WARMER_CONFIG, urls)
+        logger.info(f"Keeping {len(warmer.urls)} sources warm (Ctrl+C to stop)")
+        
+        while True:
+            last_run = warmer.run_once()
+            if last_run['due']:
+                logger.info(f"Refreshed {last_run['refreshed']} sources, {last_run['failed']} failed")
+            time.sleep(warmer.check_interval_seconds)
+    
     def scrape_news(self, 
                    topic: str = 'all', 
                    sources: List[str] = None, 
                    search_keyword: str = None,
                    max_workers: int = 5,
+                   engine: str = None,
+                   crawl: bool = False,
+                   deadline: float = None,
+                   priority: str = INTERACTIVE,
                    verbose: bool = False) -> List[Dict[str, Any]]:
-        """Scrape news from specified sources"""
+        """Scrape news from specified sources (with crawl, only new articles found on the category pages)"""
         # Initialize scraper
         scraper = self.initialize_scraper()
         
@@ -86,10 +106,35 @@ class OrangeNewsScraper:
             logger.warning("No sources to scrape")
             return []
         
-        logger.info(f"Starting to scrape {len(urls_to_scrape)} sources with {max_workers} workers")
+        # Fetch each distinct source once, however many variants of its URL were listed
+        plan = plan_sources(urls_to_scrape)
+        urls_to_scrape = plan.urls
+        
+        engine = engine or config.SCRAPER_CONFIG['engine']
+        logger.info(f"Starting to scrape {plan.summary()} with the {engine} engine ({max_workers} workers)")
         
         # Perform scraping
-        results = scraper.scrape_multiple_sources(urls_to_scrape, max_workers=max_workers)
+        if crawl:
+            results = scraper.crawl_sources(urls_to_scrape, max_workers=max_workers, engine=engine, deadline=deadline,
+                                            priority=priority)
+            logger.info(f"Crawling found {len(results)} new articles")
+        else:
+            results = scraper.scrape_multiple_sources(urls_to_scrape, max_workers=max_workers, engine=engine,
+                                                      deadline=deadline, priority=priority)
+            results = [plan.annotate(article) for article in results]
+        
+        timed_out = [article['url'] for article in results if article.get('timed_out')]
+        if timed_out:
+            logger.warning(f"{len(timed_out)} sources did not finish within the {deadline:g}s deadline: {', '.join(timed_out)}")
+        
+        if verbose:
+            stats = scraper.get_connection_stats()
+            logger.info(f"Connection pool: {stats['requests']} requests over {stats['connections']} connections "
+                        f"(reuse ratio {stats['reuse_ratio']}, avg connect {stats['connect_time_avg_ms']} ms)")
+            cache_stats = scraper.get_cache_stats()
+            logger.info(f"Article cache: {cache_stats['hits'] + cache_stats['persistent_hits']} hits, "
+                        f"{cache_stats['misses']} misses, {cache_stats['evictions']} evictions, "
+                        f"{cache_stats['size']} entries")
         
         # Apply keyword filtering if specified
         if search_keyword:
@@ -265,6 +310,14 @@ def main():
     # Advanced options
     parser.add_argument('--api-key', help='OpenAI API Key (overrides environment variable)')
     parser.add_argument('--workers', '-w', type=int, default=5, help='Number of parallel workers for scraping')
+    parser.add_argument('--engine', choices=['thread', 'async'], help='Scraping engine (overrides SCRAPER_CONFIG)')
+    parser.add_argument('--crawl', action='store_true', help='Treat sources as category pages and scrape only their new articles')
+    parser.add_argument('--deadline', type=float, default=config.SCRAPER_CONFIG['deadline_seconds'],
+                        help='Time budget in seconds for scraping; unfinished sources are skipped')
+    parser.add_argument('--priority', choices=PRIORITIES, default=INTERACTIVE,
+                        help="Fetch priority class; use 'bulk' for batch runs sharing hosts with interactive use")
+    parser.add_argument('--warm', action='store_true',
+                        help='Keep the cache of the selected sources warm until interrupted instead of generating an article')
     parser.add_argument('--audience', help='Target audience (overrides template default)')
     parser.add_argument('--tone', help='Article tone (overrides template default)')
     parser.add_argument('--max-length', type=int, help='Maximum article length in words (overrides template default)')
@@ -276,12 +329,20 @@ def main():
     app = OrangeNewsScraper(api_key=args.api_key)
     
     try:
+        if args.warm:
+            app.warm_cache(topic=args.topic, sources=args.sources)
+            return
+        
         # Step 1: Scrape news sources
         scraped_data = app.scrape_news(
             topic=args.topic,
             sources=args.sources,
             search_keyword=args.search,
             max_workers=args.workers,
+            engine=args.engine,
+            crawl=args.crawl,
+            deadline=args.deadline,
+            priority=args.priority,
             verbose=args.verbose
         )
         
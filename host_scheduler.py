@@ -0,0 +1,392 @@
+import time
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Any, Callable, Optional
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+
+# Statuses that mean the origin wants us to slow down
+THROTTLE_STATUSES = (429, 503)
+
+# How often a waiting request re-checks a host that is at its concurrency limit
+POLL_INTERVAL_SECONDS = 0.05
+
+# Longest Retry-After we are willing to honour before giving up on the host for this round
+MAX_RETRY_AFTER_SECONDS = 60
+
+# Priority classes of fetches, highest first
+INTERACTIVE = 'interactive'  # a user is waiting for the result
+SCHEDULED = 'scheduled'      # periodic refreshes, such as the cache warmer
+BULK = 'bulk'                # batch scrapes and crawls
+PRIORITIES = (INTERACTIVE, SCHEDULED, BULK)
+
+
+def host_of(url: str) -> str:
+    return (urlparse(url).hostname or '').lower()
+
+
+def interleave_by_host(urls: List[str]) -> List[str]:
+    """Reorder URLs round-robin across hosts, so workers spread over origins instead of queueing on one"""
+    by_host = OrderedDict()
+    for url in urls:
+        by_host.setdefault(host_of(url), []).append(url)
+
+    ordered = []
+    queues = list(by_host.values())
+    while queues:
+        for queue in queues:
+            ordered.append(queue.pop(0))
+        queues = [queue for queue in queues if queue]
+    return ordered
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds from a Retry-After header given in seconds (HTTP dates are ignored)"""
+    if value and value.strip().isdigit():
+        return min(float(value.strip()), MAX_RETRY_AFTER_SECONDS)
+    return None
+
+
+class TokenBucket:
+    """Paces requests to rate per second, allowing bursts of up to burst requests"""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_take(self, now: float) -> float:
+        """Take a token and return 0, or return the seconds until one is available"""
+        self._refill(now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def set_rate(self, rate: float, burst: float):
+        self._refill(time.monotonic())
+        self.rate = rate
+        self.burst = burst
+        self.tokens = min(self.tokens, burst)
+
+
+class HostLimiter:
+    """Token-bucket pacing plus an AIMD concurrency window for one host.
+
+    The window grows by one request per window's worth of fast successes and
+    is cut by decrease_factor when a response is throttled (429/503), fails,
+    or takes longer than slow_latency_seconds.
+
+    Each request has a priority class. reserved_share[priority] is the part of
+    the window that only that class and higher ones may use, so a burst of bulk
+    fetches always leaves room for interactive ones. A request also never
+    takes a slot or token while a higher class is waiting for this host.
+    """
+
+    def __init__(self,
+                 rate: float,
+                 burst: float,
+                 initial_concurrency: int,
+                 min_concurrency: int,
+                 max_concurrency: int,
+                 slow_latency_seconds: float,
+                 decrease_factor: float,
+                 reserved_share: Optional[Dict[str, float]] = None):
+        self.bucket = TokenBucket(rate, burst)
+        self.concurrency = float(initial_concurrency)
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.slow_latency_seconds = slow_latency_seconds
+        self.decrease_factor = decrease_factor
+        self.reserved_share = reserved_share or {}
+
+        self.in_flight = 0
+        self.in_flight_by_priority = {priority: 0 for priority in PRIORITIES}
+        self.waiting = {priority: 0 for priority in PRIORITIES}
+        self.paused_until = 0.0
+        self.crawl_delay = None
+        self.ready = threading.Event()  # set once robots.txt has been applied
+        self._last_decrease = 0.0
+        self._lock = threading.Lock()
+        self._stats = {'requests': 0, 'throttled': 0, 'slow': 0, 'failed': 0, 'cancelled': 0, 'wait_time': 0.0}
+
+    def _limit_for(self, priority: str) -> int:
+        """Slots of the window a priority class may fill: all of it minus what higher classes reserve"""
+        higher = PRIORITIES[:PRIORITIES.index(priority)]
+        reserved = sum(self.reserved_share.get(other, 0) for other in higher)
+        return max(1, int(int(self.concurrency) * (1 - reserved)))
+
+    def try_acquire(self, priority: str = INTERACTIVE) -> float:
+        """Take a request slot and return 0, or return how long to wait before trying again"""
+        with self._lock:
+            now = time.monotonic()
+            if now < self.paused_until:
+                return self.paused_until - now
+            # Higher classes go first
+            if any(self.waiting[other] for other in PRIORITIES[:PRIORITIES.index(priority)]):
+                return POLL_INTERVAL_SECONDS
+            if self.in_flight >= self._limit_for(priority):
+                return POLL_INTERVAL_SECONDS
+            wait = self.bucket.try_take(now)
+            if wait:
+                return wait
+            self.in_flight += 1
+            self.in_flight_by_priority[priority] += 1
+            self._stats['requests'] += 1
+            return 0.0
+
+    def add_waiter(self, priority: str):
+        """Announce a request that is waiting for a slot, so lower classes let it go first"""
+        with self._lock:
+            self.waiting[priority] += 1
+
+    def remove_waiter(self, priority: str):
+        with self._lock:
+            self.waiting[priority] -= 1
+
+    def acquire(self, priority: str = INTERACTIVE):
+        """Block until a request slot is available"""
+        started = time.monotonic()
+        self.add_waiter(priority)
+        try:
+            while True:
+                wait = self.try_acquire(priority)
+                if not wait:
+                    break
+                time.sleep(wait)
+        finally:
+            self.remove_waiter(priority)
+        self.record_wait(time.monotonic() - started)
+
+    def record_wait(self, seconds: float):
+        """Count time a request spent waiting for this host's pacing or window"""
+        with self._lock:
+            self._stats['wait_time'] += seconds
+
+    def release(self, latency: float, status: Optional[int] = None, failed: bool = False,
+                retry_after: Optional[float] = None, priority: str = INTERACTIVE, cancelled: bool = False):
+        """Free the slot and adapt the window to how the request went
+
+        A cancelled request (deadline or user cancel) says nothing about the
+        host, so it leaves the window as it is.
+        """
+        with self._lock:
+            self.in_flight -= 1
+            self.in_flight_by_priority[priority] -= 1
+            if cancelled:
+                self._stats['cancelled'] += 1
+                return
+            now = time.monotonic()
+
+            throttled = status in THROTTLE_STATUSES
+            slow = latency > self.slow_latency_seconds
+            if throttled:
+                self._stats['throttled'] += 1
+                if retry_after:
+                    self.paused_until = max(self.paused_until, now + retry_after)
+            elif failed:
+                self._stats['failed'] += 1
+            elif slow:
+                self._stats['slow'] += 1
+
+            if throttled or failed or slow:
+                # Cut at most once per round trip, so a burst of bad responses is one signal
+                if now - self._last_decrease > latency:
+                    self.concurrency = max(self.min_concurrency, self.concurrency * self.decrease_factor)
+                    self._last_decrease = now
+            else:
+                self.concurrency = min(self.max_concurrency, self.concurrency + 1 / self.concurrency)
+
+    def apply_crawl_delay(self, crawl_delay: Optional[float]):
+        """Never send requests faster than robots.txt asks"""
+        if not crawl_delay:
+            return
+        with self._lock:
+            self.crawl_delay = crawl_delay
+            rate = 1 / crawl_delay
+            if rate < self.bucket.rate:
+                self.bucket.set_rate(rate, 1)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update({
+                'concurrency_limit': round(self.concurrency, 2),
+                'in_flight': self.in_flight,
+                'in_flight_by_priority': dict(self.in_flight_by_priority),
+                'waiting': dict(self.waiting),
+                'rate_per_second': round(self.bucket.rate, 3),
+                'crawl_delay': self.crawl_delay,
+                'wait_time': round(stats['wait_time'], 3)
+            })
+            return stats
+
+
+class RobotsCache:
+    """Parsed robots.txt per host, fetched once per process"""
+
+    def __init__(self, fetch_text: Callable[[str], Optional[str]], user_agent: str = '*'):
+        """fetch_text(robots_url) returns the robots.txt body, or None if there is none"""
+        self.fetch_text = fetch_text
+        self.user_agent = user_agent
+        self._parsers = {}  # host -> RobotFileParser, or None when the host has no robots.txt
+        self._lock = threading.Lock()
+
+    def crawl_delay(self, url: str) -> Optional[float]:
+        """Crawl-delay (or the interval implied by Request-rate) for the URL's host"""
+        parser = self._parser(url)
+        if parser is None:
+            return None
+
+        delay = parser.crawl_delay(self.user_agent)
+        if delay:
+            return float(delay)
+        request_rate = parser.request_rate(self.user_agent)
+        if request_rate and request_rate.requests:
+            return request_rate.seconds / request_rate.requests
+        return None
+
+    def _parser(self, url: str) -> Optional[RobotFileParser]:
+        parsed = urlparse(url)
+        host = host_of(url)
+        with self._lock:
+            if host in self._parsers:
+                return self._parsers[host]
+
+        parser = None
+        try:
+            text = self.fetch_text(f"{parsed.scheme}://{parsed.netloc}/robots.txt")
+            if text:
+                parser = RobotFileParser()
+                parser.parse(text.splitlines())
+        except Exception as e:
+            print(f"Could not read robots.txt for {host}: {str(e)}")
+
+        with self._lock:
+            self._parsers[host] = parser
+        return parser
+
+
+class RequestSlot:
+    """One in-flight request to a host; record() the outcome before leaving the with block"""
+
+    def __init__(self, limiter: HostLimiter, priority: str = INTERACTIVE):
+        self.limiter = limiter
+        self.priority = priority
+        self.started = time.monotonic()
+        self._recorded = False
+
+    def record(self, status: Optional[int] = None, retry_after: Optional[str] = None):
+        self.limiter.release(time.monotonic() - self.started, status, retry_after=parse_retry_after(retry_after),
+                             priority=self.priority)
+        self._recorded = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if not self._recorded:
+            cancelled = exc_type is not None and issubclass(exc_type, asyncio.CancelledError)
+            self.limiter.release(time.monotonic() - self.started, failed=exc_type is not None and not cancelled,
+                                 priority=self.priority, cancelled=cancelled)
+        return False
+
+
+class UnpacedSlot:
+    """Stand-in slot used when the scheduler is disabled"""
+
+    def record(self, status: Optional[int] = None, retry_after: Optional[str] = None):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+class HostScheduler:
+    """Per-host request pacing shared by the thread and asyncio engines"""
+
+    def __init__(self,
+                 enabled: bool = True,
+                 requests_per_second: float = 4.0,
+                 burst: float = 4,
+                 initial_concurrency: int = 2,
+                 min_concurrency: int = 1,
+                 max_concurrency: int = 8,
+                 slow_latency_seconds: float = 5.0,
+                 decrease_factor: float = 0.5,
+                 reserved_share: Optional[Dict[str, float]] = None,
+                 robots: Optional[RobotsCache] = None):
+        self.enabled = enabled
+        self.limiter_settings = {
+            'rate': requests_per_second,
+            'burst': burst,
+            'initial_concurrency': initial_concurrency,
+            'min_concurrency': min_concurrency,
+            'max_concurrency': max_concurrency,
+            'slow_latency_seconds': slow_latency_seconds,
+            'decrease_factor': decrease_factor,
+            'reserved_share': reserved_share
+        }
+        self.robots = robots
+        self._limiters = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, scheduler_config: Dict[str, Any], robots: Optional[RobotsCache] = None) -> 'HostScheduler':
+        """Build a scheduler from a HOST_SCHEDULER_CONFIG-style dict"""
+        return cls(
+            enabled=scheduler_config.get('enabled', True),
+            requests_per_second=scheduler_config.get('requests_per_second', 4.0),
+            burst=scheduler_config.get('burst', 4),
+            initial_concurrency=scheduler_config.get('initial_concurrency', 2),
+            min_concurrency=scheduler_config.get('min_concurrency', 1),
+            max_concurrency=scheduler_config.get('max_concurrency', 8),
+            slow_latency_seconds=scheduler_config.get('slow_latency_seconds', 5.0),
+            decrease_factor=scheduler_config.get('decrease_factor', 0.5),
+            reserved_share=scheduler_config.get('reserved_share'),
+            robots=robots if scheduler_config.get('respect_robots', True) else None
+        )
+
+    def limiter(self, url: str) -> HostLimiter:
+        """Get the limiter for the URL's host, reading its robots.txt the first time (blocking)"""
+        host = host_of(url)
+        with self._lock:
+            limiter = self._limiters.get(host)
+            created = limiter is None
+            if created:
+                limiter = self._limiters[host] = HostLimiter(**self.limiter_settings)
+
+        if not created:
+            limiter.ready.wait()
+            return limiter
+
+        # Outside the lock: a slow robots.txt must not hold up other hosts
+        try:
+            if self.robots is not None:
+                limiter.apply_crawl_delay(self.robots.crawl_delay(url))
+        finally:
+            limiter.ready.set()
+        return limiter
+
+    def slot(self, url: str, priority: str = INTERACTIVE):
+        """Wait for the host's pacing and concurrency window, then return a slot to use with 'with'"""
+        if not self.enabled:
+            return UnpacedSlot()
+        limiter = self.limiter(url)
+        limiter.acquire(priority)
+        return RequestSlot(limiter, priority)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current window, rate and throttling counters per host"""
+        with self._lock:
+            limiters = dict(self._limiters)
+        return {host: limiter.snapshot() for host, limiter in limiters.items()}
@@ -0,0 +1,237 @@
+import re
+import threading
+import time
+from typing import Dict, Any, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3 import PoolManager
+from urllib3.connection import HTTPConnection, HTTPSConnection
+
+# Headers sent with every scraping request to mimic a browser
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept-Language': 'en-US,en;q=0.9,fr-FR;q=0.8,fr;q=0.7,ar;q=0.6',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8'
+}
+
+
+# Body chunk size when streaming pages
+READ_CHUNK_BYTES = 64 * 1024
+
+# Smaller chunks for head-only reads, so little of the body is downloaded past </head>
+HEAD_CHUNK_BYTES = 8 * 1024
+
+# Tags that end a page's <head>; <body> also ends it when </head> was left out.
+# The tag name must end there, so <body-wrapper> or <bodyfoo> don't count
+HEAD_END_PATTERN = re.compile(rb'</head[\s/>]|<body[\s/>]', re.IGNORECASE)
+# Longest match minus one: how far back a match may start in already-searched data
+HEAD_END_OVERLAP = len(b'</head>') - 1
+
+
+class PageTooLargeError(Exception):
+    """Raised when a page body exceeds the configured size limit"""
+    pass
+
+
+def read_body(response: requests.Response, max_bytes: int) -> bytes:
+    """Stream a response body, aborting once it exceeds max_bytes (0 disables the limit)"""
+    declared = response.headers.get('Content-Length')
+    if max_bytes and declared and declared.isdigit() and int(declared) > max_bytes:
+        response.close()
+        raise PageTooLargeError(f"Page is {declared} bytes, limit is {max_bytes}")
+
+    chunks = []
+    received = 0
+    for chunk in response.iter_content(chunk_size=READ_CHUNK_BYTES):
+        received += len(chunk)
+        if max_bytes and received > max_bytes:
+            response.close()
+            raise PageTooLargeError(f"Page exceeds the {max_bytes} byte limit")
+        chunks.append(chunk)
+    return b''.join(chunks)
+
+
+def find_head_end(data: bytes, start: int = 0) -> int:
+    """Offset of the first tag ending the <head> in data at or after start, or -1"""
+    match = HEAD_END_PATTERN.search(data, start)
+    return match.start() if match else -1
+
+
+def read_head(response: requests.Response, max_bytes: int) -> bytes:
+    """Stream a response only until its <head> section is complete, then close the connection.
+
+    Returns the bytes before the end of the head, or the whole body when it
+    has no head end (such pages are short, or raise PageTooLargeError past
+    max_bytes like read_body). Closing drops the connection instead of
+    returning it to the pool, so the rest of the body is never downloaded.
+    """
+    chunks = []
+    received = 0
+    try:
+        for chunk in response.iter_content(chunk_size=HEAD_CHUNK_BYTES):
+            # A marker may straddle the previous chunk boundary
+            searched = max(received - HEAD_END_OVERLAP, 0)
+            chunks.append(chunk)
+            received += len(chunk)
+            head = b''.join(chunks)
+            end = find_head_end(head, searched)
+            if end != -1:
+                return head[:end]
+            if max_bytes and received > max_bytes:
+                raise PageTooLargeError(f"Page exceeds the {max_bytes} byte limit")
+        return b''.join(chunks)
+    finally:
+        response.close()
+
+
+def conditional_headers(validators: Dict[str, str]) -> Dict[str, str]:
+    """Build If-None-Match / If-Modified-Since headers from cached validators"""
+    headers = {}
+    if validators.get('etag'):
+        headers['If-None-Match'] = validators['etag']
+    if validators.get('last_modified'):
+        headers['If-Modified-Since'] = validators['last_modified']
+    return headers
+
+
+def response_validators(headers) -> Dict[str, str]:
+    """Extract the ETag / Last-Modified validators from response headers"""
+    validators = {}
+    if headers.get('ETag'):
+        validators['etag'] = headers['ETag']
+    if headers.get('Last-Modified'):
+        validators['last_modified'] = headers['Last-Modified']
+    return validators
+
+
+class ConnectionPoolStats:
+    """Thread-safe per-host counters for requests, new connections and connect time."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hosts = {}
+
+    def _host_entry(self, host: str) -> Dict[str, Any]:
+        return self._hosts.setdefault(host, {'requests': 0, 'connections': 0, 'connect_time': 0.0})
+
+    def record_request(self, host: str):
+        """Count a request sent to host"""
+        with self._lock:
+            self._host_entry(host)['requests'] += 1
+
+    def record_connect(self, host: str, seconds: float):
+        """Count a newly opened connection (DNS + TCP + TLS) to host"""
+        with self._lock:
+            entry = self._host_entry(host)
+            entry['connections'] += 1
+            entry['connect_time'] += seconds
+
+    @staticmethod
+    def _summarize(requests_count: int, connections: int, connect_time: float) -> Dict[str, Any]:
+        reused = max(requests_count - connections, 0)
+        return {
+            'requests': requests_count,
+            'connections': connections,
+            'reused': reused,
+            'reuse_ratio': round(reused / requests_count, 3) if requests_count else 0.0,
+            'connect_time_total_ms': round(connect_time * 1000, 1),
+            'connect_time_avg_ms': round(connect_time * 1000 / connections, 1) if connections else 0.0
+        }
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return totals and per-host stats"""
+        with self._lock:
+            hosts = {host: dict(entry) for host, entry in self._hosts.items()}
+
+        per_host = {
+            host: self._summarize(entry['requests'], entry['connections'], entry['connect_time'])
+            for host, entry in hosts.items()
+        }
+        totals = self._summarize(
+            sum(entry['requests'] for entry in hosts.values()),
+            sum(entry['connections'] for entry in hosts.values()),
+            sum(entry['connect_time'] for entry in hosts.values())
+        )
+        totals['hosts'] = per_host
+        return totals
+
+
+class _TimedConnectMixin:
+    """Times connect() and reports it to the pool stats"""
+
+    def __init__(self, *args, pool_stats: Optional[ConnectionPoolStats] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pool_stats = pool_stats
+
+    def connect(self):
+        start = time.perf_counter()
+        super().connect()
+        if self.pool_stats is not None:
+            self.pool_stats.record_connect(self.host, time.perf_counter() - start)
+
+
+class _TimedHTTPConnection(_TimedConnectMixin, HTTPConnection):
+    pass
+
+
+class _TimedHTTPSConnection(_TimedConnectMixin, HTTPSConnection):
+    pass
+
+
+class _InstrumentedPoolManager(PoolManager):
+    """PoolManager whose per-host pools create timed connections"""
+
+    def __init__(self, *args, pool_stats: Optional[ConnectionPoolStats] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pool_stats = pool_stats
+
+    def _new_pool(self, scheme, host, port, request_context=None):
+        pool = super()._new_pool(scheme, host, port, request_context=request_context)
+        pool.ConnectionCls = _TimedHTTPSConnection if scheme == 'https' else _TimedHTTPConnection
+        pool.conn_kw['pool_stats'] = self.pool_stats
+        return pool
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter keeping keep-alive connections per host and recording pool stats"""
+
+    def __init__(self, pool_stats: ConnectionPoolStats, **kwargs):
+        # init_poolmanager() is called from HTTPAdapter.__init__, so set stats first
+        self.pool_stats = pool_stats
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        self._pool_connections = connections
+        self._pool_maxsize = maxsize
+        self._pool_block = block
+        self.poolmanager = _InstrumentedPoolManager(
+            num_pools=connections,
+            maxsize=maxsize,
+            block=block,
+            pool_stats=self.pool_stats,
+            **pool_kwargs
+        )
+
+    def send(self, request, **kwargs):
+        self.pool_stats.record_request(urlparse(request.url).hostname or '')
+        return super().send(request, **kwargs)
+
+
+def create_pooled_session(max_workers: int,
+                          pool_stats: ConnectionPoolStats,
+                          pool_connections: int = 20) -> requests.Session:
+    """Create a session with a per-host pool of max_workers keep-alive connections."""
+    session = requests.Session()
+    session.headers.update(DEFAULT_HEADERS)
+
+    adapter = PooledHTTPAdapter(
+        pool_stats,
+        pool_connections=pool_connections,
+        pool_maxsize=max_workers,
+        pool_block=False
+    )
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
@@ -0,0 +1,260 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+import concurrent.futures
+from typing import Dict, Any, Callable, List, Optional
+
+# Job states
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+
+FINISHED_STATES = (SUCCEEDED, FAILED, CANCELLED)
+UNFINISHED_STATES = (QUEUED, RUNNING)
+
+
+class JobCancelled(Exception):
+    """Raised inside a job handler when cancellation has been requested"""
+    pass
+
+
+class JobStore:
+    """SQLite table of jobs, shared by every worker process on the host"""
+
+    def __init__(self, sqlite_path: str):
+        self.sqlite_path = sqlite_path
+        self._local = threading.local()
+
+        directory = os.path.dirname(sqlite_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = self._connection()
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS jobs ('
+            'id TEXT PRIMARY KEY, type TEXT NOT NULL, status TEXT NOT NULL, params TEXT, '
+            'result TEXT, error TEXT, progress TEXT, cancel_requested INTEGER NOT NULL DEFAULT 0, '
+            'created_at REAL NOT NULL, started_at REAL, finished_at REAL, heartbeat_at REAL)'
+        )
+        # Stores created before heartbeats were recorded lack the column
+        columns = [row[1] for row in conn.execute('PRAGMA table_info(jobs)')]
+        if 'heartbeat_at' not in columns:
+            conn.execute('ALTER TABLE jobs ADD COLUMN heartbeat_at REAL')
+        conn.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Get this thread's connection to the job store"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.sqlite_path, timeout=10)
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    def create(self, job_id: str, job_type: str, params: Dict[str, Any]):
+        now = time.time()
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                'INSERT INTO jobs (id, type, status, params, created_at, heartbeat_at) VALUES (?, ?, ?, ?, ?, ?)',
+                (job_id, job_type, QUEUED, json.dumps(params, ensure_ascii=False), now, now)
+            )
+
+    def update(self, job_id: str, **fields):
+        """Update columns of a job; result and progress are stored as JSON"""
+        for key in ('result', 'progress'):
+            if key in fields:
+                fields[key] = json.dumps(fields[key], ensure_ascii=False)
+
+        assignments = ', '.join(f'{key} = ?' for key in fields)
+        conn = self._connection()
+        with conn:
+            conn.execute(f'UPDATE jobs SET {assignments} WHERE id = ?', (*fields.values(), job_id))
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        row = self._connection().execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        if row is None:
+            return None
+
+        job = dict(row)
+        for key in ('params', 'result', 'progress'):
+            job[key] = json.loads(job[key]) if job[key] else None
+        job['cancel_requested'] = bool(job['cancel_requested'])
+        return job
+
+    def request_cancel(self, job_id: str) -> bool:
+        """Flag a job for cancellation; False if it does not exist or already finished"""
+        conn = self._connection()
+        with conn:
+            cursor = conn.execute(
+                f"UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status NOT IN ({', '.join('?' * len(FINISHED_STATES))})",
+                (job_id, *FINISHED_STATES)
+            )
+        return cursor.rowcount > 0
+
+    def is_cancel_requested(self, job_id: str) -> bool:
+        row = self._connection().execute('SELECT cancel_requested FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        return bool(row and row[0])
+
+    def heartbeat(self, job_ids: List[str]):
+        """Record that the process holding these queued or running jobs is still alive"""
+        if not job_ids:
+            return
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                f"UPDATE jobs SET heartbeat_at = ? WHERE id IN ({', '.join('?' * len(job_ids))})",
+                (time.time(), *job_ids)
+            )
+
+    def fail_stale(self, older_than: float) -> int:
+        """Mark unfinished jobs without a heartbeat since older_than as failed: the process holding them died"""
+        conn = self._connection()
+        with conn:
+            cursor = conn.execute(
+                f"UPDATE jobs SET status = ?, error = ?, finished_at = ? "
+                f"WHERE status IN ({', '.join('?' * len(UNFINISHED_STATES))}) "
+                "AND COALESCE(heartbeat_at, started_at, created_at) < ?",
+                (FAILED, 'Interrupted: the worker process running this job stopped', time.time(),
+                 *UNFINISHED_STATES, older_than)
+            )
+        return cursor.rowcount
+
+    def purge(self, older_than: float):
+        """Delete finished jobs that finished before the given timestamp"""
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                f"DELETE FROM jobs WHERE finished_at < ? AND status IN ({', '.join('?' * len(FINISHED_STATES))})",
+                (older_than, *FINISHED_STATES)
+            )
+
+
+class JobContext:
+    """Handed to a running job so it can report progress and notice cancellation"""
+
+    def __init__(self, store: JobStore, job_id: str):
+        self.store = store
+        self.job_id = job_id
+
+    def is_cancelled(self) -> bool:
+        return self.store.is_cancel_requested(self.job_id)
+
+    def check_cancelled(self):
+        """Raise JobCancelled if cancellation was requested (from any worker process)"""
+        if self.is_cancelled():
+            raise JobCancelled()
+
+    def report_progress(self, progress: Dict[str, Any]):
+        self.store.update(self.job_id, progress=progress)
+
+
+class JobManager:
+    """Runs submitted jobs on a local worker pool and records their state in a JobStore.
+
+    Status, results and cancellation go through the store, so any web worker
+    can serve them regardless of which worker runs the job.
+
+    Every heartbeat_seconds the manager records that its queued and running
+    jobs are still held. On startup and at every heartbeat, unfinished jobs
+    whose heartbeat is more than three intervals old are marked failed, so
+    jobs of a process that died don't stay 'running' forever.
+    """
+
+    def __init__(self, store: JobStore, max_workers: int = 4, result_ttl_seconds: int = 86400,
+                 heartbeat_seconds: float = 30):
+        self.store = store
+        self.result_ttl_seconds = result_ttl_seconds
+        self.heartbeat_seconds = heartbeat_seconds
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self._futures = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+        self._fail_stale()
+        self._heartbeat_thread = threading.Thread(target=self._heartbeat_loop, name='job-heartbeat', daemon=True)
+        self._heartbeat_thread.start()
+
+    @classmethod
+    def from_config(cls, jobs_config: Dict[str, Any]) -> 'JobManager':
+        """Build a job manager from a JOBS_CONFIG-style dict"""
+        return cls(
+            JobStore(jobs_config.get('sqlite_path', 'cache/jobs.sqlite3')),
+            max_workers=jobs_config.get('workers', 4),
+            result_ttl_seconds=jobs_config.get('result_ttl_seconds', 86400),
+            heartbeat_seconds=jobs_config.get('heartbeat_seconds', 30)
+        )
+
+    def _fail_stale(self):
+        interrupted = self.store.fail_stale(time.time() - 3 * self.heartbeat_seconds)
+        if interrupted:
+            print(f"Marked {interrupted} jobs left unfinished by a stopped worker as failed")
+
+    def _heartbeat_loop(self):
+        while not self._stop.wait(self.heartbeat_seconds):
+            with self._lock:
+                job_ids = list(self._futures)
+            try:
+                self.store.heartbeat(job_ids)
+                self._fail_stale()
+            except sqlite3.Error as e:
+                print(f"Could not record job heartbeat: {str(e)}")
+
+    def submit(self, job_type: str, params: Dict[str, Any], handler: Callable[[JobContext], Any]) -> str:
+        """Queue handler(context) as a job; params are stored for display and must not hold secrets"""
+        self.store.purge(time.time() - self.result_ttl_seconds)
+
+        job_id = uuid.uuid4().hex
+        self.store.create(job_id, job_type, params)
+
+        future = self._executor.submit(self._run, job_id, handler)
+        with self._lock:
+            self._futures[job_id] = future
+        future.add_done_callback(lambda _: self._forget(job_id))
+        return job_id
+
+    def _forget(self, job_id: str):
+        with self._lock:
+            self._futures.pop(job_id, None)
+
+    def _run(self, job_id: str, handler: Callable[[JobContext], Any]):
+        context = JobContext(self.store, job_id)
+        if context.is_cancelled():
+            self.store.update(job_id, status=CANCELLED, finished_at=time.time())
+            return
+
+        self.store.update(job_id, status=RUNNING, started_at=time.time())
+        try:
+            result = handler(context)
+        except JobCancelled:
+            self.store.update(job_id, status=CANCELLED, finished_at=time.time())
+        except Exception as e:
+            self.store.update(job_id, status=FAILED, error=str(e), finished_at=time.time())
+        else:
+            self.store.update(job_id, status=SUCCEEDED, result=result, finished_at=time.time())
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get a job's status, progress and (once finished) result"""
+        return self.store.get(job_id)
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a job; queued jobs never start and running jobs stop at their next check"""
+        if not self.store.request_cancel(job_id):
+            return False
+
+        # A job still waiting in this process's queue can be dropped right away
+        with self._lock:
+            future = self._futures.get(job_id)
+        if future is not None and future.cancel():
+            self.store.update(job_id, status=CANCELLED, finished_at=time.time())
+        return True
+
+    def shutdown(self):
+        self._stop.set()
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,240 @@
+import os
+import time
+import sqlite3
+import threading
+from typing import List, Dict, Any, Optional
+from urllib.parse import urlsplit, urlunsplit
+
+from urls import canonicalize_url, site_of, source_key
+
+
+# URL patterns CMSs use for the light versions of an article: name -> (where, what is added).
+# AMP patterns are learned from <link rel="amphtml">; print ones need a site override in LIGHT_VARIANT_CONFIG.
+VARIANT_PATTERNS = {
+    'amp-path': ('path', '/amp'),          # WordPress AMP plugin: /2024/05/story/amp/
+    'amp-query': ('query', 'amp=1'),
+    'amp-output': ('query', 'outputType=amp'),
+    'print-path': ('path', '/print'),
+    'print-query': ('query', 'print=1'),
+}
+
+
+def build_variant_url(url: str, pattern: str) -> str:
+    """URL of the light version of the article at url under one of VARIANT_PATTERNS"""
+    where, added = VARIANT_PATTERNS[pattern]
+    parts = urlsplit(url)
+    if where == 'path':
+        return urlunsplit((parts.scheme, parts.netloc, parts.path.rstrip('/') + added + '/', parts.query, ''))
+    query = f"{parts.query}&{added}" if parts.query else added
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, query, ''))
+
+
+def is_variant_url(url: str) -> bool:
+    """Whether url already looks like the light version of an article under any of VARIANT_PATTERNS"""
+    parts = urlsplit(url)
+    for where, added in VARIANT_PATTERNS.values():
+        if where == 'path' and parts.path.rstrip('/').endswith(added):
+            return True
+        if where == 'query' and added in parts.query.split('&'):
+            return True
+    return False
+
+
+class LightVariants:
+    """Remembers which lightweight version (AMP or print) of a site's articles can be fetched instead.
+
+    Full pages announce their AMP version with <link rel="amphtml">. The link
+    is kept for that article, so refreshes fetch the AMP page directly, and
+    when it follows one of VARIANT_PATTERNS the pattern counts a hit for the
+    site. Once a pattern has min_hits on a site, new articles there are
+    fetched through it too. Sites can also be given a pattern by hand
+    (site -> pattern name), which is how print versions are used.
+
+    A variant that fails or yields no article counts a failure and the full
+    page is fetched instead; after max_failures the site's pattern is no
+    longer used, and a failed per-article link is forgotten.
+
+    State lives in a SQLite file shared by all worker processes.
+    """
+
+    def __init__(self,
+                 sqlite_path: str,
+                 min_hits: int = 2,
+                 max_failures: int = 3,
+                 max_pages: int = 5000,
+                 sites: Dict[str, str] = None):
+        self.sqlite_path = sqlite_path
+        self.min_hits = min_hits
+        self.max_failures = max_failures
+        self.max_pages = max_pages
+        self.sites = self._valid_sites(sites or {})
+        self._local = threading.local()
+
+        directory = os.path.dirname(sqlite_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = self._connection()
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS page_variants ('
+            'url TEXT PRIMARY KEY, variant_url TEXT NOT NULL, updated_at REAL NOT NULL)'
+        )
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS site_patterns ('
+            'site TEXT NOT NULL, pattern TEXT NOT NULL, hits INTEGER NOT NULL DEFAULT 0, '
+            'failures INTEGER NOT NULL DEFAULT 0, PRIMARY KEY (site, pattern))'
+        )
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS site_fetches ('
+            'site TEXT PRIMARY KEY, variant_fetches INTEGER NOT NULL DEFAULT 0, fallbacks INTEGER NOT NULL DEFAULT 0)'
+        )
+        conn.execute('CREATE INDEX IF NOT EXISTS page_variants_updated ON page_variants (updated_at)')
+        conn.commit()
+
+    @classmethod
+    def from_config(cls, variant_config: Dict[str, Any]) -> 'LightVariants':
+        """Build the variant store from a LIGHT_VARIANT_CONFIG-style dict"""
+        return cls(
+            variant_config.get('sqlite_path', 'cache/light_variants.sqlite3'),
+            min_hits=variant_config.get('min_hits', 2),
+            max_failures=variant_config.get('max_failures', 3),
+            max_pages=variant_config.get('max_pages', 5000),
+            sites=variant_config.get('sites')
+        )
+
+    @staticmethod
+    def _valid_sites(sites: Dict[str, str]) -> Dict[str, str]:
+        """Site overrides keyed like the learned patterns, without unknown pattern names"""
+        valid = {}
+        for site, pattern in sites.items():
+            if pattern not in VARIANT_PATTERNS:
+                print(f"Ignoring light variant override for {site}: unknown pattern '{pattern}'")
+                continue
+            valid[site_of(f'http://{site}/')] = pattern
+        return valid
+
+    def _connection(self) -> sqlite3.Connection:
+        """Get this thread's connection to the variant store"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.sqlite_path, timeout=10)
+            self._local.conn = conn
+        return conn
+
+    def _site_pattern(self, site: str) -> Optional[str]:
+        """The site's override, or its most frequent learned pattern once it has min_hits and still works"""
+        if site in self.sites:
+            return self.sites[site]
+        row = self._connection().execute(
+            'SELECT pattern FROM site_patterns WHERE site = ? AND hits >= ? AND failures < ? '
+            'ORDER BY hits DESC LIMIT 1',
+            (site, self.min_hits, self.max_failures)
+        ).fetchone()
+        return row[0] if row else None
+
+    def variant_for(self, url: str, guess: bool = True) -> Optional[str]:
+        """URL of a light version of the article at url to fetch instead, or None
+
+        Without guess, only a link the page itself announced is returned, not
+        one built from the site's pattern.
+        """
+        row = self._connection().execute('SELECT variant_url FROM page_variants WHERE url = ?', (url,)).fetchone()
+        if row is not None:
+            return row[0]
+
+        if not guess:
+            return None
+        pattern = self._site_pattern(site_of(url))
+        if pattern is None or is_variant_url(url):
+            return None
+        return build_variant_url(url, pattern)
+
+    @staticmethod
+    def _patterns_of(url: str, variant_url: str) -> List[str]:
+        """Names of the patterns that turn url into variant_url"""
+        key = source_key(variant_url)
+        return [pattern for pattern in VARIANT_PATTERNS if source_key(build_variant_url(url, pattern)) == key]
+
+    def learn(self, url: str, amphtml: Optional[str]):
+        """Remember the AMP link found on the full page of url, crediting the patterns it follows"""
+        variant_url = canonicalize_url(amphtml) if amphtml else None
+        if variant_url is None or source_key(variant_url) == source_key(url):
+            return
+
+        patterns = self._patterns_of(url, variant_url)
+        site = site_of(url)
+        conn = self._connection()
+        given_up = conn.execute(
+            "SELECT COUNT(*) FROM site_patterns WHERE site = ? AND failures >= ? "
+            f"AND pattern IN ({', '.join('?' * len(patterns))})",
+            (site, self.max_failures, *patterns)
+        ).fetchone()[0]
+        with conn:
+            # Links following a pattern that keeps failing on the site would only fail again
+            if not given_up:
+                conn.execute(
+                    'INSERT OR REPLACE INTO page_variants (url, variant_url, updated_at) VALUES (?, ?, ?)',
+                    (url, variant_url, time.time())
+                )
+            conn.executemany(
+                'INSERT INTO site_patterns (site, pattern, hits) VALUES (?, ?, 1) '
+                'ON CONFLICT (site, pattern) DO UPDATE SET hits = hits + 1',
+                [(site, pattern) for pattern in patterns]
+            )
+            # Keep the per-article links within max_pages, newest first
+            conn.execute(
+                'DELETE FROM page_variants WHERE url IN ('
+                'SELECT url FROM page_variants ORDER BY updated_at DESC LIMIT -1 OFFSET ?)',
+                (self.max_pages,)
+            )
+
+    def record_success(self, url: str, variant_url: str):
+        """Count a variant of url that yielded an article, clearing its patterns' failures (unless given up on)"""
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                'INSERT INTO site_fetches (site, variant_fetches) VALUES (?, 1) '
+                'ON CONFLICT (site) DO UPDATE SET variant_fetches = variant_fetches + 1',
+                (site_of(url),)
+            )
+            conn.executemany(
+                'UPDATE site_patterns SET failures = 0 WHERE site = ? AND pattern = ? AND failures < ?',
+                [(site_of(url), pattern, self.max_failures) for pattern in self._patterns_of(url, variant_url)]
+            )
+
+    def record_failure(self, url: str, variant_url: str):
+        """Count a variant of url that failed: forget it as url's link and charge the site's patterns"""
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                'INSERT INTO site_fetches (site, fallbacks) VALUES (?, 1) '
+                'ON CONFLICT (site) DO UPDATE SET fallbacks = fallbacks + 1',
+                (site_of(url),)
+            )
+            conn.execute('DELETE FROM page_variants WHERE url = ?', (url,))
+            conn.executemany(
+                'UPDATE site_patterns SET failures = failures + 1 WHERE site = ? AND pattern = ?',
+                [(site_of(url), pattern) for pattern in self._patterns_of(url, variant_url)]
+            )
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Per site: variant fetches, fallbacks to the full page and the URL patterns seen; plus overall totals"""
+        sites = {}
+        for site, variant_fetches, fallbacks in self._connection().execute(
+                'SELECT site, variant_fetches, fallbacks FROM site_fetches'):
+            sites[site] = {'variant_fetches': variant_fetches, 'fallbacks': fallbacks, 'patterns': {}}
+        for site, pattern, hits, failures in self._connection().execute(
+                'SELECT site, pattern, hits, failures FROM site_patterns ORDER BY hits DESC'):
+            entry = sites.setdefault(site, {'variant_fetches': 0, 'fallbacks': 0, 'patterns': {}})
+            entry['patterns'][pattern] = {'hits': hits, 'failures': failures}
+        for site, entry in sites.items():
+            entry['pattern_in_use'] = self._site_pattern(site)
+
+        return {
+            'variant_fetches': sum(entry['variant_fetches'] for entry in sites.values()),
+            'fallbacks': sum(entry['fallbacks'] for entry in sites.values()),
+            'known_pages': self._connection().execute('SELECT COUNT(*) FROM page_variants').fetchone()[0],
+            'overrides': dict(self.sites),
+            'sites': sites
+        }
@@ -1,11 +1,36 @@
 import os
 import time
+import queue
+import threading
+import functools
 import concurrent.futures
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Union, Iterator, Callable, Tuple
 import requests
-from bs4 import BeautifulSoup
 import random
 import json
+from urllib.parse import urljoin
+
+import config
+from http_pool import (
+    ConnectionPoolStats, create_pooled_session,
+    conditional_headers, response_validators, read_body, read_head
+)
+from charsets import sniff_encoding
+from async_engine import AsyncScrapeEngine, shared_fetch_limit
+from article_cache import ArticleCache
+from singleflight import SingleFlight
+from cancellation import CancelToken
+from worker_pool import shared_worker_pool
+from source_stats import SourceStats, content_hash
+from extraction_profiles import ExtractionProfiles
+from light_variants import LightVariants
+from parsers import get_parser_backend
+from crawler import CategoryCrawler, SeenStore, looks_like_article
+from urls import source_key
+from host_scheduler import (
+    HostScheduler, RobotsCache, INTERACTIVE, SCHEDULED, interleave_by_host, host_of, parse_retry_after
+)
+from resilience import RetryPolicy, CircuitBreakers, RETRYABLE_STATUSES
 
 # Try to load dotenv if it's installed
 try:
@@ -14,196 +39,832 @@ try:
 except ImportError:
     pass
 
+# Network failures worth another attempt (connection resets, DNS hiccups, timeouts)
+RETRYABLE_EXCEPTIONS = (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError)
+
+# Placeholder content of articles whose page yielded no text
+NO_CONTENT = 'No content could be extracted from this page.'
+
+def timed_out_result(url: str, deadline: float) -> Dict[str, Any]:
+    """Result for a source that did not finish before the deadline"""
+    return {'url': url, 'error': f'Timed out: not finished within the {deadline:g}s deadline', 'timed_out': True}
+
+def remaining_deadline(started: float, deadline: float = None) -> float:
+    """What is left of a deadline (in seconds) that started at the given time.monotonic()"""
+    if deadline is None:
+        return None
+    return max(deadline - (time.monotonic() - started), 0)
+
+def parse_article_html(url: str, html: Union[str, bytes], encoding: str = None,
+                       profile: Dict[str, List[str]] = None) -> Dict[str, Any]:
+    """Extract article data from a page's HTML or raw bytes (module-level so it can run in a worker process)
+    
+    profile is the site's extraction profile (see ExtractionProfiles). The
+    selectors that were used and the page's AMP link come back under
+    'extraction', which the scraper removes before the article is cached.
+    """
+    # Parse with the configured backend (every backend yields the same fields)
+    fields = get_parser_backend(config.SCRAPER_CONFIG['parser_backend']).extract(
+        html, url, encoding, profile, structured_data=config.SCRAPER_CONFIG['structured_data']
+    )
+    
+    # Create article data
+    article_data = {
+        'url': url,
+        'title': fields['title'] or 'Untitled Article',
+        'content': fields['content'] or NO_CONTENT,
+        'publish_date': fields['publish_date'] or 'Unknown',
+        'author': fields['author'] or 'Unknown',
+        'image_url': fields['image_url'],
+        'extraction': {'selectors': fields['selectors'], 'fallbacks': fields['fallbacks'], 'profiled': bool(profile),
+                       'amphtml': fields['amphtml']}
+    }
+    
+    return article_data
+
+def parse_article_head(url: str, html: Union[str, bytes], encoding: str = None) -> Dict[str, Any]:
+    """Extract a partial article from the <head> of a page: title, description, date, author and image
+    
+    The result has no content and is marked 'partial'; scrape the URL to get the full article.
+    """
+    fields = get_parser_backend(config.SCRAPER_CONFIG['parser_backend']).extract_head(html, url, encoding)
+    
+    return {
+        'url': url,
+        'title': fields['title'] or 'Untitled Article',
+        'description': fields['description'] or '',
+        'publish_date': fields['publish_date'] or 'Unknown',
+        'author': fields['author'] or 'Unknown',
+        'image_url': fields['image_url'],
+        'partial': True
+    }
+
+def preview_cache_key(url: str) -> str:
+    """Article cache key of url's preview, kept apart from its full article"""
+    return f'preview:{url}'
+
+def parse_profiled_html(profiles: Dict[str, Dict[str, List[str]]], url: str, html: Union[str, bytes],
+                        encoding: str = None) -> Dict[str, Any]:
+    """parse_article_html with the extraction profile looked up in profiles (url -> profile)"""
+    return parse_article_html(url, html, encoding, profiles.get(url))
+
+
 class NewsScraperAndGenerator:
     """A class to scrape news articles and generate custom content for Orange Tunisia."""
     
-    def __init__(self, openai_api_key: str, model_name: str = "gpt-3.5-turbo"):
-        """Initialize the scraper and generator with API key and model name."""
+    def __init__(self, openai_api_key: str, model_name: str = "gpt-3.5-turbo", host_scheduler: HostScheduler = None):
+        """Initialize the scraper and generator with API key and model name.
+        
+        Pass another scraper's host_scheduler to make both share each host's
+        capacity, so their fetch priorities are weighed against each other.
+        """
         self.openai_api_key = openai_api_key
         self.model_name = model_name
-        self.article_cache = {}  # Simple in-memory cache for articles
+        self.article_cache = ArticleCache.from_config(config.CACHE_CONFIG)
+        # Concurrent scrapes of the same URL share one fetch
+        self._inflight = SingleFlight()
+        
+        # Change rate, latency and failures per source; they set each source's freshness and fetch order
+        self.source_stats = SourceStats.from_config(config.SOURCE_STATS_CONFIG,
+                                                    initial_revisit=self.article_cache.ttl_seconds)
+        if config.SOURCE_STATS_CONFIG['adaptive_revisit']:
+            self.article_cache.ttl_policy = self.source_stats.revisit_interval
+        
+        # Which selector finds each field on each site, so parsing tries it first
+        self.extraction_profiles = None
+        if config.EXTRACTION_PROFILE_CONFIG['enabled']:
+            self.extraction_profiles = ExtractionProfiles.from_config(config.EXTRACTION_PROFILE_CONFIG)
+        
+        # Which sites' articles can be fetched through their lighter AMP or print versions
+        self.light_variants = None
+        if config.LIGHT_VARIANT_CONFIG['enabled']:
+            self.light_variants = LightVariants.from_config(config.LIGHT_VARIANT_CONFIG)
+        # Configured sources are category pages, which a site's article URL pattern doesn't fit
+        self._source_keys = {source_key(url) for sources in config.NEWS_SOURCES.values() for url in sources}
+        
+        # Keep-alive connection pool shared by all scraping threads
+        self.pool_stats = ConnectionPoolStats()
+        # Sized once for the largest call, so it never has to be replaced while requests are using it
+        self._pool_size = max(config.HTTP_POOL_CONFIG['default_pool_size'],
+                              config.WORKER_POOL_CONFIG['max_workers_per_call'])
+        self.session = create_pooled_session(
+            self._pool_size,
+            self.pool_stats,
+            pool_connections=config.HTTP_POOL_CONFIG['pool_connections']
+        )
+        
+        # Separate connect and read timeouts, so a dead host fails in seconds
+        self._timeouts = (config.SCRAPER_CONFIG['connect_timeout_seconds'], config.SCRAPER_CONFIG['read_timeout_seconds'])
+        self.retry_policy = RetryPolicy.from_config(config.RETRY_CONFIG)
+        self.circuit_breakers = CircuitBreakers.from_config(config.CIRCUIT_BREAKER_CONFIG)
+        
+        # Per-host pacing, adaptive concurrency and priority classes, shared by both engines
+        self.host_scheduler = host_scheduler or HostScheduler.from_config(
+            config.HOST_SCHEDULER_CONFIG,
+            robots=RobotsCache(self._fetch_robots_txt)
+        )
+        
+        # Thread-engine workers come from one bounded pool shared by every scraper in the process
+        self.worker_pool = shared_worker_pool(config.WORKER_POOL_CONFIG)
+        
+        # Parsing pool for the async engine, created on first use
+        self._parse_executor = None
+        self._crawler = None
+        self._crawl_sources = {}  # discovered article URL -> category page it was found on
+    
+    def get_connection_stats(self) -> Dict[str, Any]:
+        """Get connection pool stats (reuse ratio, connect time) overall and per host"""
+        stats = self.pool_stats.snapshot()
+        stats['pool_size'] = self._pool_size
+        return stats
+    
+    def get_host_stats(self) -> Dict[str, Any]:
+        """Get per-host scheduler state (concurrency window, pacing rate, throttled responses) and circuit state"""
+        stats = self.host_scheduler.snapshot()
+        for host, breaker_stats in self.circuit_breakers.snapshot().items():
+            stats.setdefault(host, {})['circuit'] = breaker_stats
+        return stats
+    
+    def get_source_stats(self, urls: List[str] = None) -> Dict[str, Any]:
+        """Get per-source change counts, latency, failure rate and revisit interval"""
+        return self.source_stats.snapshot(urls)
+    
+    def get_extraction_stats(self) -> Dict[str, Any]:
+        """Per-selector hit rates and each site's extraction profile"""
+        if self.extraction_profiles is None:
+            return {'enabled': False}
+        return {'enabled': True, **self.extraction_profiles.snapshot()}
+    
+    def _profile_for(self, url: str) -> Dict[str, List[str]]:
+        return self.extraction_profiles.profile_for(url) if self.extraction_profiles is not None else None
+    
+    def get_light_variant_stats(self) -> Dict[str, Any]:
+        """Get light variant fetches, fallbacks to the full page and each site's learned URL patterns"""
+        if self.light_variants is None:
+            return {'enabled': False}
+        return dict(self.light_variants.snapshot(), enabled=True)
+    
+    def _record_extraction(self, url: str, article_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Learn from the selectors a parse used and the page's AMP link, and drop them from the article data"""
+        extraction = article_data.pop('extraction', None)
+        if extraction is None:
+            return article_data
+        if self.extraction_profiles is not None:
+            self.extraction_profiles.record(url, extraction['selectors'], extraction['fallbacks'],
+                                            extraction['profiled'])
+        if self.light_variants is not None:
+            self.light_variants.learn(url, extraction['amphtml'])
+        return article_data
+    
+    def _fetch_robots_txt(self, robots_url: str) -> str:
+        """Fetch a host's robots.txt; a missing one means no crawl-delay"""
+        response = self.session.get(robots_url, timeout=self._timeouts)
+        return response.text if response.status_code == 200 else None
     
     def get_cached_article(self, url: str) -> Dict[str, Any]:
-        """Get article from cache if it exists and is not older than 1 hour"""
-        if url in self.article_cache:
-            cache_time, article_data = self.article_cache[url]
-            # Check if cache is still fresh (less than 1 hour old)
-            if time.time() - cache_time < 3600:  # 3600 seconds = 1 hour
-                print(f"Using cached data for {url}")
-                return article_data
-        return None
+        """Get article from cache if it exists and is still within CACHE_CONFIG's TTL"""
+        article_data = self.article_cache.get(url)
+        if article_data:
+            print(f"Using cached data for {url}")
+        return article_data
+    
+    def cache_article(self, url: str, article_data: Dict[str, Any], validators: Dict[str, str] = None):
+        """Cache article data with current timestamp and the response's HTTP validators"""
+        self.article_cache.set(url, article_data, validators)
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get article cache stats (hits, misses, evictions, size) and how many fetches were coalesced"""
+        stats = self.article_cache.stats()
+        stats['single_flight'] = self._inflight.stats()
+        return stats
     
-    def cache_article(self, url: str, article_data: Dict[str, Any]):
-        """Cache article data with current timestamp"""
-        self.article_cache[url] = (time.time(), article_data)
+    def scrape_article(self, url: str, priority: str = INTERACTIVE) -> Dict[str, Any]:
+        """Scrape an article from a URL
+        
+        Concurrent calls for the same URL share one fetch: within this process
+        they wait on the thread already fetching it, and across worker
+        processes on the cache's fetch lease. priority is the host scheduler's
+        class for the fetch ('interactive', 'scheduled' or 'bulk').
+        """
+        return self._inflight.do(url, lambda: self._scrape_article_once(url, priority))
     
-    def scrape_article(self, url: str) -> Dict[str, Any]:
-        """Scrape an article from a URL"""
+    def _scrape_article_once(self, url: str, priority: str = INTERACTIVE) -> Dict[str, Any]:
+        """Serve url from the cache, or fetch it unless another worker process already is"""
         # Check cache first
         cached_article = self.get_cached_article(url)
         if cached_article:
             return cached_article
         
+        if not self.article_cache.acquire_lease(url):
+            print(f"Waiting for another worker fetching {url}...")
+            article_data = self.article_cache.wait_for_lease(url)
+            if article_data:
+                return article_data
+            # It failed or gave up: try ourselves
+        
         try:
-            # Set up headers to mimic a browser request
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-                'Accept-Language': 'en-US,en;q=0.9,fr-FR;q=0.8,fr;q=0.7,ar;q=0.6',
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8'
-            }
-            
-            # Try to fetch the URL with a timeout
-            response = requests.get(url, headers=headers, timeout=15)
-            
-            # Set proper encoding
-            if response.encoding == 'ISO-8859-1':
-                response.encoding = 'utf-8'
-                
-            response.raise_for_status()
-            
-            # Parse HTML with BeautifulSoup
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Extract title - try different methods
-            title = None
-            if soup.title:
-                title = soup.title.text.strip()
-            
-            # Try h1 tags if title is still None or too generic
-            if not title or title.lower() in ['home', 'homepage', 'index']:
-                h1_tags = soup.find_all('h1')
-                if h1_tags:
-                    title = h1_tags[0].text.strip()
+            return self._fetch_article(url, priority=priority)
+        finally:
+            self.article_cache.release_lease(url)
+    
+    def refresh_article(self, url: str, priority: str = SCHEDULED) -> Dict[str, Any]:
+        """Re-fetch an article even if its cache entry is still fresh (used to refresh ahead of expiry)"""
+        def refresh():
+            if not self.article_cache.acquire_lease(url):
+                # Another worker process is fetching it right now: its result is just as new
+                article_data = self.article_cache.wait_for_lease(url)
+                if article_data:
+                    return article_data
+            try:
+                return self._fetch_article(url, revalidate_fresh=True, priority=priority)
+            finally:
+                self.article_cache.release_lease(url)
+        
+        return self._inflight.do(url, refresh)
+    
+    def preview_article(self, url: str, priority: str = INTERACTIVE) -> Dict[str, Any]:
+        """Scrape only the metadata in a page's <head>, returning a partial article
+        
+        The page is streamed and the connection closed as soon as its head is
+        complete, so the body is never downloaded. A fresh full article in the
+        cache is returned instead, since it costs nothing; otherwise the
+        preview is cached under its own key and never stands in for the full
+        article. Concurrent previews of the same URL share one fetch.
+        """
+        cached_article = self.get_cached_article(url)
+        if cached_article:
+            return cached_article
+        
+        key = preview_cache_key(url)
+        return self._inflight.do(key, lambda: self.article_cache.get(key) or self._fetch_preview(url, priority))
+    
+    def _fetch_preview(self, url: str, priority: str = INTERACTIVE) -> Dict[str, Any]:
+        """Download the head of a page, parse it and cache the partial article"""
+        try:
+            response, head = self._get_with_retries(url, priority=priority, head_only=True)
+            encoding = sniff_encoding(response.headers.get('Content-Type'), head)
+            article_data = parse_article_head(url, head, encoding)
+            self.cache_article(preview_cache_key(url), article_data)
+            return article_data
+        
+        except Exception as e:
+            print(f"Error previewing {url}: {str(e)}")
+            return {'url': url, 'error': str(e)}
+    
+    def _fetch_article(self, url: str, revalidate_fresh: bool = False, priority: str = INTERACTIVE) -> Dict[str, Any]:
+        """Download, parse and cache an article, revalidating a stale cache entry when possible
+        
+        When the site's lighter AMP or print version is known (see LightVariants),
+        that is fetched instead, falling back to the full page if it fails.
+        """
+        # An expired entry with validators can be revalidated instead of re-downloaded
+        stale = self.article_cache.get_stale(url, include_fresh=revalidate_fresh)
+        
+        variant_url = self._light_variant_for(url)
+        if variant_url is not None:
+            article_data = self._fetch_light_variant(url, variant_url, stale, priority)
+            if article_data is not None:
+                return article_data
+        
+        # Validators of a variant's response don't apply to the full page
+        headers = conditional_headers(stale[1]) if stale and 'variant_url' not in stale[1] else {}
+        
+        try:
+            response, body = self._get_with_retries(url, headers, priority)
+            latency = response.elapsed.total_seconds()
             
-            # Extract content - try multiple selectors that could contain the main article
-            content_selectors = [
-                'article', '.article', '.post', '.content', '.entry-content',
-                '.post-content', '.article-content', 'main', '#content',
-                '.story-body', '.story', '.news-article', '.news-content'
-            ]
+            # Unchanged since we cached it: extend the TTL and skip parsing
+            if stale and response.status_code == 304:
+                print(f"Not modified, reusing cached data for {url}")
+                self.source_stats.record_success(url, latency)
+                self.article_cache.touch(url)
+                return stale[0]
             
-            content = ""
-            for selector in content_selectors:
-                elements = soup.select(selector)
-                if elements:
-                    # Get all paragraphs from the first matching element
-                    paragraphs = elements[0].find_all('p')
-                    if paragraphs:
-                        content = " ".join([p.text.strip() for p in paragraphs])
-                        break
+            # Parse the raw bytes, decoded with the charset from the header, BOM or <meta> tag
+            encoding = sniff_encoding(response.headers.get('Content-Type'), body)
+            article_data = self._record_extraction(url, parse_article_html(url, body, encoding, self._profile_for(url)))
             
-            # If no content found with specific selectors, get all paragraphs
-            if not content:
-                paragraphs = soup.find_all('p')
-                # Filter out very short paragraphs that could be UI elements
-                valid_paragraphs = [p.text.strip() for p in paragraphs if len(p.text.strip()) > 40]
-                content = " ".join(valid_paragraphs)
+            # Cache the result along with its validators
+            self.source_stats.record_success(url, latency, content_hash(article_data))
+            self.cache_article(url, article_data, response_validators(response.headers))
             
-            # Try to extract publish date
-            publish_date = None
-            date_selectors = [
-                'time', '.date', '.published', '.post-date', '.article-date',
-                'meta[property="article:published_time"]', 'meta[name="date"]',
-                '.byline time', '.meta-date', '.entry-date'
-            ]
+            return article_data
+        
+        except Exception as e:
+            print(f"Error scraping {url}: {str(e)}")
+            self.source_stats.record_failure(url)
+            return {'url': url, 'error': str(e)}
+    
+    def _light_variant_for(self, url: str) -> str:
+        """URL of a light version to fetch instead of url, or None
+        
+        The site's URL pattern is only guessed for pages that look like
+        articles, the way the crawler tells them apart, and are not configured
+        sources; other pages only use a light version they announced themselves.
+        """
+        if self.light_variants is None:
+            return None
+        guess = source_key(url) not in self._source_keys and looks_like_article(url, urljoin(url, '/'))
+        return self.light_variants.variant_for(url, guess=guess)
+    
+    def _fetch_light_variant(self, url: str, variant_url: str, stale: Tuple[Dict[str, Any], Dict[str, str]] = None,
+                             priority: str = INTERACTIVE) -> Dict[str, Any]:
+        """Download, parse and cache the light version of an article, or return None when it fails or is empty
+        
+        The article keeps url, the canonical one, as its 'url'; 'variant_url'
+        says where it was read from. Variant pages are laid out differently
+        from the site's full pages, so they neither use nor train its
+        extraction profile.
+        """
+        headers = conditional_headers(stale[1]) if stale and stale[1].get('variant_url') == variant_url else {}
+        try:
+            response, body = self._get_with_retries(variant_url, headers, priority)
+            latency = response.elapsed.total_seconds()
             
-            for selector in date_selectors:
-                elements = soup.select(selector)
-                if elements:
-                    date_element = elements[0]
-                    if date_element.name == 'meta':
-                        publish_date = date_element.get('content', '')
-                    else:
-                        publish_date = date_element.text.strip()
-                    break
+            if headers and response.status_code == 304:
+                print(f"Not modified, reusing cached data for {url}")
+                self.source_stats.record_success(url, latency)
+                self.article_cache.touch(url)
+                return stale[0]
             
-            # Try to extract author
-            author = None
-            author_selectors = [
-                '.author', '.byline', '.article-author', '.entry-author',
-                'meta[name="author"]', '.writer', '.post-author'
-            ]
+            encoding = sniff_encoding(response.headers.get('Content-Type'), body)
+            article_data = parse_article_html(variant_url, body, encoding)
+            del article_data['extraction']
+        except Exception as e:
+            print(f"Light version {variant_url} failed, fetching the full page: {str(e)}")
+            self.light_variants.record_failure(url, variant_url)
+            return None
+        
+        if article_data['content'] == NO_CONTENT:
+            print(f"No article in light version {variant_url}, fetching the full page")
+            self.light_variants.record_failure(url, variant_url)
+            return None
+        
+        article_data['url'] = url
+        article_data['variant_url'] = variant_url
+        self.light_variants.record_success(url, variant_url)
+        self.source_stats.record_success(url, latency, content_hash(article_data))
+        validators = response_validators(response.headers)
+        if validators:
+            validators['variant_url'] = variant_url
+        self.cache_article(url, article_data, validators)
+        return article_data
+    
+    def _get(self, url: str, headers: Dict[str, str] = None, priority: str = INTERACTIVE,
+             head_only: bool = False) -> Tuple[requests.Response, bytes]:
+        """One GET under the host's pacing, returning the (closed) response and its body.
+        
+        The body is streamed so oversized pages are aborted early; 304s and error
+        statuses come back with an empty body instead of raising. With head_only,
+        reading stops once the page's <head> is complete (see read_head).
+        """
+        with self.host_scheduler.slot(url, priority) as slot, \
+                self.session.get(url, headers=headers, stream=True, timeout=self._timeouts) as response:
+            if response.status_code == 304 or response.status_code >= 400:
+                slot.record(response.status_code, response.headers.get('Retry-After'))
+                return response, b''
+            read = read_head if head_only else read_body
+            body = read(response, config.SCRAPER_CONFIG['max_page_bytes'])
+            slot.record(response.status_code)
+        return response, body
+    
+    def _get_with_retries(self, url: str, headers: Dict[str, str] = None, priority: str = INTERACTIVE,
+                          head_only: bool = False) -> Tuple[requests.Response, bytes]:
+        """GET with jittered retries for transient failures, failing fast while the host's circuit is open
+        
+        Raises HTTPError for error statuses that are not retried or still fail on the last attempt.
+        """
+        breaker = self.circuit_breakers.for_url(url)
+        attempt = 0
+        while True:
+            breaker.before_request(host_of(url))
+            retry_after = None
+            try:
+                response, body = self._get(url, headers, priority, head_only)
+            except RETRYABLE_EXCEPTIONS as e:
+                breaker.record_failure()
+                error = e
+            except Exception:
+                # The host answered (e.g. the page was too large), so it is up
+                breaker.record_success()
+                raise
+            else:
+                if response.status_code >= 500:
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+                if response.status_code not in RETRYABLE_STATUSES:
+                    response.raise_for_status()
+                    return response, body
+                try:
+                    response.raise_for_status()
+                except requests.HTTPError as e:
+                    error = e
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
             
-            for selector in author_selectors:
-                elements = soup.select(selector)
-                if elements:
-                    author_element = elements[0]
-                    if author_element.name == 'meta':
-                        author = author_element.get('content', '')
-                    else:
-                        author = author_element.text.strip()
+            if not self.retry_policy.can_retry(attempt):
+                raise error
+            delay = self.retry_policy.delay(attempt, retry_after)
+            print(f"Retrying {url} in {delay:.1f}s after: {str(error)}")
+            time.sleep(delay)
+            attempt += 1
+    
+    def fetch_page(self, url: str, priority: str = INTERACTIVE) -> Tuple[bytes, str]:
+        """Fetch a page through the pooled session, returning its raw body and sniffed encoding"""
+        response, body = self._get_with_retries(url, priority=priority)
+        return body, sniff_encoding(response.headers.get('Content-Type'), body)
+    
+    def _get_crawler(self) -> CategoryCrawler:
+        """Create the category crawler on first use"""
+        if self._crawler is None:
+            self._crawler = CategoryCrawler(
+                self.fetch_page,
+                SeenStore(config.CRAWLER_CONFIG['sqlite_path']),
+                max_pages=config.CRAWLER_CONFIG['max_pages_per_source'],
+                max_articles=config.CRAWLER_CONFIG['max_articles_per_source'],
+                parser_backend=config.SCRAPER_CONFIG['parser_backend']
+            )
+        return self._crawler
+    
+    def discover_article_urls(self, category_urls: List[str], max_workers: int = 5, deadline: float = None,
+                              priority: str = INTERACTIVE, cancel: CancelToken = None) -> List[str]:
+        """Crawl category pages in parallel and return the article URLs not scraped before
+        
+        With a deadline (seconds), category pages still being crawled when it expires are skipped;
+        once cancel is cancelled, so are the ones not crawled yet.
+        """
+        crawler = self._get_crawler()
+        discovered = {}
+        
+        batch = self.worker_pool.batch(max_workers, priority)
+        fetch_page = functools.partial(self.fetch_page, priority=priority)
+        future_to_url = {batch.submit(crawler.discover, url, fetch_page): url for url in category_urls}
+        stop = cancel.as_future() if cancel is not None else None
+        crawled = 0
+        try:
+            for future in concurrent.futures.as_completed(list(future_to_url) + ([stop] if stop else []),
+                                                          timeout=deadline):
+                if future is stop:
+                    print(f"Crawl cancelled with {len(future_to_url) - crawled} category pages unfinished")
                     break
-            
-            # Try to extract main image
-            image_url = None
-            image_selectors = [
-                'meta[property="og:image"]',
-                'meta[name="twitter:image"]',
-                '.featured-image img',
-                '.article-featured-image img',
-                '.post-thumbnail img',
-                'article img:first-of-type',
-                '.entry-content img:first-of-type'
-            ]
-            
-            for selector in image_selectors:
-                elements = soup.select(selector)
-                if elements:
-                    image_element = elements[0]
-                    if image_element.name == 'meta':
-                        image_url = image_element.get('content', '')
-                    else:
-                        image_url = image_element.get('src', '')
-                    
-                    # Handle relative URLs
-                    if image_url and not image_url.startswith(('http://', 'https://')):
-                        from urllib.parse import urljoin
-                        image_url = urljoin(url, image_url)
-                    
+                crawled += 1
+                category_url = future_to_url[future]
+                try:
+                    discovered[category_url] = future.result()
+                except Exception as e:
+                    print(f"Error crawling {category_url}: {str(e)}")
+                # Only the cancel future is left
+                if crawled == len(future_to_url):
                     break
-            
-            # Create article data
-            article_data = {
-                'url': url,
-                'title': title or 'Untitled Article',
-                'content': content or 'No content could be extracted from this page.',
-                'publish_date': publish_date or 'Unknown',
-                'author': author or 'Unknown',
-                'image_url': image_url
-            }
-            
-            # Cache the result
-            self.cache_article(url, article_data)
-            
-            return article_data
+        except concurrent.futures.TimeoutError:
+            print(f"Deadline of {deadline:g}s reached while crawling {len(category_urls) - len(discovered)} category pages")
+        finally:
+            batch.close()
         
-        except Exception as e:
-            print(f"Error scraping {url}: {str(e)}")
-            return {'url': url, 'error': str(e)}
+        # Keep the order of the sources; an article listed by several sources is fetched once
+        article_urls = []
+        for category_url in category_urls:
+            for url in discovered.get(category_url, []):
+                if url not in article_urls:
+                    article_urls.append(url)
+                    self._crawl_sources[url] = category_url
+        
+        print(f"Discovered {len(article_urls)} new articles on {len(category_urls)} category pages")
+        return article_urls
+    
+    def iter_scrape_new_articles(self, article_urls: List[str], max_workers: int = 5, engine: str = None,
+                                 deadline: float = None, priority: str = INTERACTIVE,
+                                 cancel: CancelToken = None, preview: bool = False) -> Iterator[Dict[str, Any]]:
+        """Scrape discovered articles, marking each successful one as seen for later crawls
+        
+        Previews don't count as scraped: their articles are still new to the next crawl.
+        """
+        crawler = self._get_crawler()
+        try:
+            for article_data in self.iter_scrape_multiple_sources(article_urls, max_workers=max_workers, engine=engine,
+                                                                  deadline=deadline, priority=priority, cancel=cancel,
+                                                                  preview=preview):
+                url = article_data['url']
+                source = self._crawl_sources.pop(url, None)
+                if 'error' not in article_data and not article_data.get('partial'):
+                    crawler.mark_seen([url], source)
+                yield article_data
+        finally:
+            # Articles without a result (deadline, cancel or the caller stopping early) are done with too
+            for url in article_urls:
+                self._crawl_sources.pop(url, None)
+    
+    def iter_crawl_sources(self, category_urls: List[str], max_workers: int = 5, engine: str = None,
+                           deadline: float = None, priority: str = INTERACTIVE,
+                           cancel: CancelToken = None, preview: bool = False) -> Iterator[Dict[str, Any]]:
+        """Discover new articles on category pages and scrape only those, yielding each as it completes
+        
+        The deadline (seconds) covers both the crawl and the article fetches.
+        """
+        started = time.monotonic()
+        article_urls = self.discover_article_urls(category_urls, max_workers=max_workers, deadline=deadline,
+                                                  priority=priority, cancel=cancel)
+        yield from self.iter_scrape_new_articles(article_urls, max_workers=max_workers, engine=engine,
+                                                 deadline=remaining_deadline(started, deadline), priority=priority,
+                                                 cancel=cancel, preview=preview)
     
-    def _scrape_url_worker(self, url: str) -> Dict[str, Any]:
+    def crawl_sources(self, category_urls: List[str], max_workers: int = 5, engine: str = None,
+                      deadline: float = None, priority: str = INTERACTIVE,
+                      cancel: CancelToken = None, preview: bool = False) -> List[Dict[str, Any]]:
+        """Discover new articles on category pages and scrape only those"""
+        return list(self.iter_crawl_sources(category_urls, max_workers=max_workers, engine=engine, deadline=deadline,
+                                            priority=priority, cancel=cancel, preview=preview))
+    
+    def _scrape_url_worker(self, url: str, priority: str = INTERACTIVE) -> Dict[str, Any]:
         """Worker function for parallel scraping"""
         print(f"Scraping {url}...")
-        return self.scrape_article(url)
+        return self.scrape_article(url, priority)
+    
+    def _preview_url_worker(self, url: str, priority: str = INTERACTIVE) -> Dict[str, Any]:
+        """Worker function for parallel previews"""
+        print(f"Previewing {url}...")
+        return self.preview_article(url, priority)
+    
+    def scrape_multiple_sources(self, urls: List[str], max_workers: int = 5, engine: str = None,
+                                deadline: float = None, priority: str = INTERACTIVE,
+                                cancel: CancelToken = None, preview: bool = False) -> List[Dict[str, Any]]:
+        """Scrape multiple news sources in parallel.
+        
+        engine is 'thread' (blocking workers from the process-wide pool, max_workers at a time) or
+        'async' (asyncio fetches limited by ASYNC_ENGINE_CONFIG); defaults to SCRAPER_CONFIG['engine'].
+        With a deadline (seconds), sources not finished in time come back as
+        errors marked 'timed_out' and their pending fetches are cancelled.
+        priority ('interactive', 'scheduled' or 'bulk') decides who gets a host's
+        capacity first when several scrapes share it; see HOST_SCHEDULER_CONFIG.
+        The thread engine raises PoolSaturatedError when the shared pool is full.
+        Once cancel is cancelled, no more fetches start and the sources without a
+        result are left out. With preview, only each page's <head> is read and
+        the results are partial articles (see preview_article).
+        """
+        return list(self.iter_scrape_multiple_sources(urls, max_workers=max_workers, engine=engine, deadline=deadline,
+                                                      priority=priority, cancel=cancel, preview=preview))
+    
+    def iter_scrape_multiple_sources(self, urls: List[str], max_workers: int = 5, engine: str = None,
+                                     deadline: float = None, priority: str = INTERACTIVE,
+                                     cancel: CancelToken = None, preview: bool = False) -> Iterator[Dict[str, Any]]:
+        """Scrape multiple news sources in parallel, yielding each article as soon as it completes
+        
+        Stops early, without results for the unfinished sources, when cancel is cancelled.
+        Previews always run on the thread engine: their fetches end after the
+        page's head, so there is little waiting for the async engine to overlap.
+        """
+        engine = engine or config.SCRAPER_CONFIG['engine']
+        # Fast, reliable and frequently changing sources first
+        urls = self.source_stats.fetch_order(urls)
+        if engine == 'async' and not preview:
+            yield from self._iter_scrape_async(urls, deadline, priority, cancel)
+            return
+        if engine not in ('thread', 'async'):
+            raise ValueError(f"Unknown scraping engine: {engine}")
+        
+        # Up to max_workers of our URLs at a time run on the shared pool (raises PoolSaturatedError when it's full)
+        batch = self.worker_pool.batch(max_workers, priority)
+        
+        # Submit all scraping tasks, alternating hosts so one paced host doesn't hold every worker
+        worker = self._preview_url_worker if preview else self._scrape_url_worker
+        future_to_url = {batch.submit(worker, url, priority): url for url in interleave_by_host(urls)}
+        finished = set()
+        # Completes on cancellation, waking the wait below
+        stop = cancel.as_future() if cancel is not None else None
+        
+        # Process results as they complete
+        try:
+            try:
+                for future in concurrent.futures.as_completed(list(future_to_url) + ([stop] if stop else []),
+                                                              timeout=deadline):
+                    if future is stop:
+                        print(f"Scrape cancelled with {len(future_to_url) - len(finished)} sources unfinished")
+                        return
+                    finished.add(future)
+                    yield self._future_result(future, future_to_url[future])
+                    # Only the cancel future is left
+                    if len(finished) == len(future_to_url):
+                        break
+            except concurrent.futures.TimeoutError:
+                unfinished = [future for future in future_to_url if future not in finished]
+                print(f"Deadline of {deadline:g}s reached with {len(unfinished)} sources unfinished")
+                for future in unfinished:
+                    # Finished just now, after the deadline fired: still worth returning
+                    if future.done() and not future.cancelled():
+                        yield self._future_result(future, future_to_url[future])
+                    else:
+                        yield timed_out_result(future_to_url[future], deadline)
+        finally:
+            # On a deadline, a cancel or an early stop, don't start the URLs still waiting for a worker.
+            # Fetches already running finish in the background and still fill the cache.
+            batch.close()
+    
+    @staticmethod
+    def _future_result(future, url: str) -> Dict[str, Any]:
+        try:
+            return future.result()
+        except Exception as e:
+            print(f"Error processing {url}: {str(e)}")
+            return {'url': url, 'error': str(e)}
+    
+    def _iter_scrape_async(self, urls: List[str], deadline: float = None, priority: str = INTERACTIVE,
+                           cancel: CancelToken = None) -> Iterator[Dict[str, Any]]:
+        """Run the asyncio engine on a thread of the shared worker pool and yield its results as they complete
+        
+        The engine's event loop takes one slot of the pool under priority, so
+        async scrapes count against the same budget as thread-engine ones
+        (PoolSaturatedError when it is used up), and its fetches share the
+        process-wide max_in_flight limit with every other async scrape.
+        
+        When the deadline (seconds) expires, the engine is cancelled and the
+        URLs without a result are yielded as timed out. When cancel is
+        cancelled, the engine is cancelled and nothing more is yielded.
+        """
+        started = time.monotonic()
+        finished_urls = set()
+        results = queue.Queue()
+        done = object()
+        cancelled = object()
+        engines = []
+        stopped = threading.Event()
+        
+        def register_engine(engine):
+            engines.append(engine)
+            if stopped.is_set():
+                engine.cancel()
+        
+        def run():
+            try:
+                self._scrape_multiple_async(urls, on_result=results.put, on_engine=register_engine, priority=priority)
+            except Exception as e:
+                print(f"Error in async scraping: {str(e)}")
+                results.put(e)
+            finally:
+                results.put(done)
+        
+        batch = self.worker_pool.batch(1, priority)
+        runner = batch.submit(run)
+        # A run that never started (the batch was closed first) must still end the wait below
+        runner.add_done_callback(lambda future: future.cancelled() and results.put(done))
+        if cancel is not None:
+            cancel.on_cancel(lambda: results.put(cancelled))
+        try:
+            while True:
+                try:
+                    item = results.get(timeout=remaining_deadline(started, deadline))
+                except queue.Empty:
+                    print(f"Deadline of {deadline:g}s reached with {len(set(urls) - finished_urls)} sources unfinished")
+                    for url in dict.fromkeys(urls):
+                        if url not in finished_urls:
+                            yield timed_out_result(url, deadline)
+                    return
+                if item is done:
+                    break
+                if item is cancelled:
+                    print(f"Scrape cancelled with {len(set(urls) - finished_urls)} sources unfinished")
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                finished_urls.add(item['url'])
+                yield item
+        finally:
+            # On a deadline, a cancel or an early stop, cancel the fetches that are still pending
+            stopped.set()
+            for engine in engines:
+                engine.cancel()
+            batch.close()
+    
+    def _get_parse_executor(self):
+        """Get the worker pool that parses pages fetched by the async engine"""
+        if self._parse_executor is None:
+            workers = config.ASYNC_ENGINE_CONFIG['parse_workers']
+            if config.ASYNC_ENGINE_CONFIG['parse_executor'] == 'process':
+                self._parse_executor = concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+            else:
+                self._parse_executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+        return self._parse_executor
     
-    def scrape_multiple_sources(self, urls: List[str], max_workers: int = 5) -> List[Dict[str, Any]]:
-        """Scrape multiple news sources in parallel."""
+    def _scrape_multiple_async(self,
+                               urls: List[str],
+                               on_result: Callable[[Dict[str, Any]], None] = None,
+                               on_engine: Callable[[AsyncScrapeEngine], None] = None,
+                               priority: str = INTERACTIVE) -> List[Dict[str, Any]]:
+        """Scrape multiple sources with the asyncio engine, serving cache hits first
+        
+        on_engine, if given, receives the engine before it starts so the caller can cancel it.
+        """
         results = []
+        urls_to_fetch = []
+        stale_entries = {}
+        flights = {}       # url -> Flight this call leads
+        followers = {}     # url -> Flight led by another thread of this process
+        leased_elsewhere = []  # URLs another worker process is fetching
+        copies = {}        # url -> times it appears in urls
+        for url in urls:
+            copies[url] = copies.get(url, 0) + 1
+        
+        def finish(article_data):
+            for _ in range(copies.get(article_data['url'], 1)):
+                results.append(article_data)
+                if on_result is not None:
+                    on_result(article_data)
+        
+        def lead(url, article_data):
+            self._inflight.finish(url, flights.pop(url), article_data)
+            finish(article_data)
         
-        # Use ThreadPoolExecutor for parallel scraping
-        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-            # Submit all scraping tasks
-            future_to_url = {executor.submit(self._scrape_url_worker, url): url for url in urls}
+        for url in copies:
+            flight, leader = self._inflight.begin(url)
+            if not leader:
+                followers[url] = flight
+                continue
+            flights[url] = flight
             
-            # Process results as they complete
-            for future in concurrent.futures.as_completed(future_to_url):
-                url = future_to_url[future]
-                try:
-                    article_data = future.result()
-                    results.append(article_data)
-                except Exception as e:
-                    print(f"Error processing {url}: {str(e)}")
-                    results.append({'url': url, 'error': str(e)})
+            cached_article = self.get_cached_article(url)
+            if cached_article:
+                lead(url, cached_article)
+            elif not self.article_cache.acquire_lease(url):
+                leased_elsewhere.append(url)
+            else:
+                urls_to_fetch.append(url)
+                stale = self.article_cache.get_stale(url)
+                # Validators of a light variant's response don't apply to the full page
+                if stale and 'variant_url' not in stale[1]:
+                    stale_entries[url] = stale
+        
+        def wait_for_others():
+            """Collect URLs being fetched by other threads or worker processes"""
+            for url in leased_elsewhere:
+                article_data = self.article_cache.wait_for_lease(url)
+                if not article_data:
+                    # The other worker failed or gave up: fetch it ourselves
+                    article_data = self._fetch_article(url, priority=priority)
+                lead(url, article_data)
+            for url, flight in followers.items():
+                flight.wait()
+                # An abandoned flight (its scrape was cancelled) is retried as our own
+                finish(self.scrape_article(url, priority) if flight.abandoned else flight.value())
+        
+        waiter = None
+        try:
+            if not urls_to_fetch:
+                wait_for_others()
+                return results
+            
+            # Profiles are looked up here: the parse pool may be other processes
+            profiles = {url: self._profile_for(url) for url in urls_to_fetch}
+            engine = AsyncScrapeEngine(
+                functools.partial(parse_profiled_html, profiles),
+                self._get_parse_executor(),
+                max_in_flight=config.ASYNC_ENGINE_CONFIG['max_in_flight'],
+                per_host_limit=config.ASYNC_ENGINE_CONFIG['per_host_limit'],
+                timeout=config.SCRAPER_CONFIG['timeout_seconds'],
+                connect_timeout=config.SCRAPER_CONFIG['connect_timeout_seconds'],
+                read_timeout=config.SCRAPER_CONFIG['read_timeout_seconds'],
+                max_page_bytes=config.SCRAPER_CONFIG['max_page_bytes'],
+                host_scheduler=self.host_scheduler,
+                retry_policy=self.retry_policy,
+                circuit_breakers=self.circuit_breakers,
+                priority=priority,
+                fetch_limit=shared_fetch_limit(config.ASYNC_ENGINE_CONFIG['max_in_flight'])
+            )
+            
+            if on_engine is not None:
+                on_engine(engine)
+            
+            def on_fetched(article_data):
+                url = article_data['url']
+                if article_data.get('not_modified'):
+                    # Unchanged since we cached it: extend the TTL and reuse the parsed article
+                    self.source_stats.record_success(url, engine.latencies.get(url))
+                    self.article_cache.touch(url)
+                    article_data = stale_entries[url][0]
+                elif 'error' not in article_data:
+                    article_data = self._record_extraction(url, article_data)
+                    self.source_stats.record_success(url, engine.latencies.get(url), content_hash(article_data))
+                    self.cache_article(url, article_data, engine.validators.get(url))
+                elif not engine.cancelled:
+                    self.source_stats.record_failure(url)
+                self.article_cache.release_lease(url)
+                if engine.cancelled and 'error' in article_data:
+                    # Our caller stopped waiting; other callers should not inherit the cancellation
+                    self._inflight.finish(url, flights.pop(url), abandoned=True)
+                    finish(article_data)
+                else:
+                    lead(url, article_data)
+            
+            # Waiting on other fetches happens alongside our own
+            waiter = threading.Thread(target=wait_for_others, name='async-scrape-waiter', daemon=True)
+            waiter.start()
+            cached_validators = {url: stale[1] for url, stale in stale_entries.items()}
+            engine.run(urls_to_fetch, cached_validators, on_result=on_fetched)
+            waiter.join()
+        finally:
+            # Fetches that never completed: let waiting callers fetch them themselves
+            for url in list(flights):
+                if waiter is None or url in urls_to_fetch:
+                    self.article_cache.release_lease(url)
+                    self._inflight.finish(url, flights.pop(url), abandoned=True)
         
         return results
     
@@ -362,4 +1023,8 @@ As Tunisia continues its digital journey, telecommunications providers like Oran
     
     def close(self):
         """Clean up resources"""
-        pass
\ No newline at end of file
+        self.session.close()
+        self.article_cache.close()
+        if self._parse_executor is not None:
+            self._parse_executor.shutdown()
+            self._parse_executor = None
\ No newline at end of file
@@ -0,0 +1,335 @@
+import functools
+from typing import List, Dict, Any, Union, Optional
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup
+
+from charsets import DEFAULT_ENCODING, decode_html
+
+from extraction import DEFAULT_EXTRACTOR, FIELD_SELECTORS, FIELD_KEYS, GENERIC_TITLES, MIN_FALLBACK_PARAGRAPH_LENGTH
+from structured_data import STRUCTURED_SOURCES, extract_structured_data
+
+# C-backed parsers are optional; html.parser is always available
+try:
+    import lxml  # noqa: F401
+    HAS_LXML = True
+except ImportError:
+    HAS_LXML = False
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+# Fastest first; 'auto' picks the first one that is installed
+BACKEND_PRIORITY = ['selectolax', 'lxml', 'html.parser']
+
+# Elements whose text is never article text; removed before the DOM selectors run
+NON_CONTENT_TAGS = ['script', 'style', 'noscript']
+
+
+class ParserBackend:
+    """Turns a page's HTML into the fields of article_data.
+
+    html may be the raw response bytes, in which case encoding names the
+    charset sniffed from the response and the backend decodes it itself.
+    """
+
+    name = None
+
+    def extract(self, html: Union[str, bytes], url: str, encoding: str = None,
+                profile: Dict[str, List[str]] = None, structured_data: bool = True) -> Dict[str, Any]:
+        """Return title, content, publish_date, author and image_url (None when not found)
+
+        Also returns 'selectors', the selector each field came from,
+        'fallbacks', the fields for which the profile's selectors (see
+        SinglePassExtractor.extract) missed and the full lists were used, and
+        'amphtml', the absolute URL of the page's AMP version (or None).
+
+        With structured_data, fields are first taken from the page's JSON-LD
+        and OpenGraph tags (their selector is 'json-ld' or 'opengraph'); the
+        DOM selectors only look for the fields still missing, and are skipped
+        when nothing is.
+        """
+        tree = self._parse(html, encoding)
+        if not structured_data:
+            return dict(self._extract_dom(tree, url, profile), amphtml=self._link_href(tree, 'amphtml', url))
+
+        found = extract_structured_data(self._ld_json_blocks(tree), self._meta(tree), url)
+        sources = found['sources']
+        profile = profile or {}
+        dom_profile = {}
+        fallbacks = []
+        for field in FIELD_SELECTORS:
+            if field in sources:
+                dom_profile[field] = []
+            elif field in profile:
+                selectors = [selector for selector in profile[field] if selector not in STRUCTURED_SOURCES]
+                if selectors or not profile[field]:
+                    dom_profile[field] = selectors
+                else:
+                    # The site's pages usually have this field in structured data, this one doesn't
+                    fallbacks.append(field)
+
+        if 'title' in found and all(field in sources for field in FIELD_SELECTORS):
+            fields = {'title': None, 'content': None, 'publish_date': None, 'author': None, 'image_url': None,
+                      'selectors': {}, 'fallbacks': []}
+        else:
+            fields = self._extract_dom(tree, url, dom_profile)
+
+        if 'title' in found:
+            fields['title'] = found['title']
+        for field in FIELD_SELECTORS:
+            if field in sources:
+                fields[FIELD_KEYS[field]] = found[field]
+                fields['selectors'][field] = sources[field]
+        fields['fallbacks'] = [field for field in FIELD_SELECTORS if field in fallbacks + fields['fallbacks']]
+        fields['amphtml'] = self._link_href(tree, 'amphtml', url)
+        return fields
+
+    def extract_head(self, html: Union[str, bytes], url: str, encoding: str = None) -> Dict[str, Any]:
+        """Return title, description, publish_date, author and image_url from a page's <head> alone
+
+        Meant for the head section of a page read without its body: only the
+        <title>, JSON-LD and <meta> tags are looked at. Fields that were not
+        found are None.
+        """
+        tree = self._parse(html, encoding)
+        found = extract_structured_data(self._ld_json_blocks(tree), self._meta(tree), url)
+        return {
+            'title': found.get('title') or self._title_tag(tree),
+            'description': found.get('description'),
+            'publish_date': found.get('date'),
+            'author': found.get('author'),
+            'image_url': found.get('image')
+        }
+
+    def _parse(self, html: Union[str, bytes], encoding: str = None):
+        """Parse the page into the backend's tree"""
+        raise NotImplementedError
+
+    def _ld_json_blocks(self, tree) -> List[str]:
+        """Text of every <script type="application/ld+json"> in document order"""
+        raise NotImplementedError
+
+    def _meta(self, tree) -> Dict[str, str]:
+        """Content of each <meta> tag by its lowercased property (or name), first occurrence winning"""
+        raise NotImplementedError
+
+    def _title_tag(self, tree) -> Optional[str]:
+        """Text of the page's <title>, or None when it is missing or empty"""
+        raise NotImplementedError
+
+    def _link_href(self, tree, rel: str, url: str) -> Optional[str]:
+        """Absolute href of the first <link> with the given rel, or None"""
+        raise NotImplementedError
+
+    def _extract_dom(self, tree, url: str, profile: Dict[str, List[str]] = None) -> Dict[str, Any]:
+        """The fields found by the DOM selectors, as returned by extract()
+
+        Runs after the JSON-LD blocks were read: it removes NON_CONTENT_TAGS from tree.
+        """
+        raise NotImplementedError
+
+    def extract_links(self, html: Union[str, bytes], url: str, encoding: str = None) -> List[Dict[str, Any]]:
+        """Return every <a href> and <link href> in document order as {'href', 'rel', 'text'}"""
+        raise NotImplementedError
+
+
+class BeautifulSoupBackend(ParserBackend):
+    """BeautifulSoup tree with the single-pass extractor; lxml builds the tree in C"""
+
+    def __init__(self, features: str = 'html.parser'):
+        self.name = features
+        self.features = features
+
+    def _parse(self, html: Union[str, bytes], encoding: str = None) -> BeautifulSoup:
+        # Bytes are decoded by the tree builder itself (in C for lxml)
+        if isinstance(html, bytes):
+            return BeautifulSoup(html, self.features, from_encoding=encoding or DEFAULT_ENCODING)
+        return BeautifulSoup(html, self.features)
+
+    def _ld_json_blocks(self, tree) -> List[str]:
+        return [script.get_text() for script in tree.find_all('script', type=_is_ld_json)]
+
+    def _meta(self, tree) -> Dict[str, str]:
+        meta = {}
+        for element in tree.find_all('meta'):
+            key = (element.get('property') or element.get('name') or '').strip().lower()
+            if key and key not in meta:
+                meta[key] = element.get('content') or ''
+        return meta
+
+    def _title_tag(self, tree) -> Optional[str]:
+        if tree.title is None:
+            return None
+        return tree.title.get_text().strip() or None
+
+    def _link_href(self, tree, rel: str, url: str) -> Optional[str]:
+        # rel is multi-valued: the match is tried on each of its values, ignoring case like browsers
+        element = tree.find('link', rel=lambda value: bool(value) and value.lower() == rel, href=True)
+        return urljoin(url, element['href'].strip()) if element is not None else None
+
+    def _extract_dom(self, tree, url: str, profile: Dict[str, List[str]] = None) -> Dict[str, Any]:
+        # get_text() already skips script and style strings, but not <noscript> fallbacks
+        for element in tree.find_all('noscript'):
+            element.decompose()
+        return DEFAULT_EXTRACTOR.extract(tree, url, profile)
+
+    def extract_links(self, html: Union[str, bytes], url: str, encoding: str = None) -> List[Dict[str, Any]]:
+        return [
+            {'href': element['href'], 'rel': element.get('rel') or [], 'text': element.get_text(' ', strip=True)}
+            for element in self._parse(html, encoding).find_all(['a', 'link'], href=True)
+        ]
+
+
+class SelectolaxBackend(ParserBackend):
+    """Lexbor (C) parser; each selector is matched in C with css_first()"""
+
+    name = 'selectolax'
+
+    def _parse(self, html: Union[str, bytes], encoding: str = None):
+        # Lexbor reads bytes as UTF-8, so other charsets are decoded here first
+        if isinstance(html, bytes) and (encoding or DEFAULT_ENCODING) != DEFAULT_ENCODING:
+            html = decode_html(html, encoding)
+        return LexborHTMLParser(html)
+
+    def _ld_json_blocks(self, tree) -> List[str]:
+        return [node.text() for node in tree.css('script[type]') if _is_ld_json(node.attributes.get('type'))]
+
+    def _meta(self, tree) -> Dict[str, str]:
+        meta = {}
+        for node in tree.css('meta'):
+            key = (node.attributes.get('property') or node.attributes.get('name') or '').strip().lower()
+            if key and key not in meta:
+                meta[key] = node.attributes.get('content') or ''
+        return meta
+
+    def _title_tag(self, tree) -> Optional[str]:
+        node = tree.css_first('title')
+        if node is None:
+            return None
+        return node.text().strip() or None
+
+    def _link_href(self, tree, rel: str, url: str) -> Optional[str]:
+        node = tree.css_first(f'link[rel~="{rel}" i][href]')
+        return urljoin(url, node.attributes['href'].strip()) if node is not None else None
+
+    def _extract_dom(self, tree, url: str, profile: Dict[str, List[str]] = None) -> Dict[str, Any]:
+        # text() would include the code of inline scripts and styles
+        tree.strip_tags(NON_CONTENT_TAGS)
+        profile = profile or {}
+        selectors = {}
+        fallbacks = []
+
+        def find(field, find_in):
+            """Try the profile's selectors for field, then the full list unless the profile rules the field out"""
+            if field in profile:
+                value, selectors[field] = find_in(profile[field])
+                if selectors[field] is not None or not profile[field]:
+                    return value
+                fallbacks.append(field)
+            value, selectors[field] = find_in(FIELD_SELECTORS[field])
+            return value
+
+        # Title: <title>, or the first <h1> when the title is missing or generic
+        title = None
+        title_node = tree.css_first('title')
+        if title_node is not None:
+            title = title_node.text().strip()
+        if not title or title.lower() in GENERIC_TITLES:
+            h1_node = tree.css_first('h1')
+            if h1_node is not None:
+                title = h1_node.text().strip()
+
+        # Content: paragraphs of the first element matched by the best selector that has any
+        content = find('content', functools.partial(self._content, tree))
+        if not content:
+            texts = [p.text().strip() for p in tree.css('p')]
+            content = " ".join([text for text in texts if len(text) > MIN_FALLBACK_PARAGRAPH_LENGTH])
+
+        node_text = lambda node: node.text().strip()
+        publish_date = find('date', functools.partial(self._best_value, tree, node_value=node_text))
+        author = find('author', functools.partial(self._best_value, tree, node_value=node_text))
+        image_url = find('image', functools.partial(self._best_value, tree,
+                                                    node_value=lambda node: node.attributes.get('src') or ''))
+
+        # Handle relative URLs
+        if image_url and not image_url.startswith(('http://', 'https://')):
+            image_url = urljoin(url, image_url)
+
+        return {
+            'title': title,
+            'content': content,
+            'publish_date': publish_date,
+            'author': author,
+            'image_url': image_url,
+            'selectors': selectors,
+            'fallbacks': fallbacks
+        }
+
+    def extract_links(self, html: Union[str, bytes], url: str, encoding: str = None) -> List[Dict[str, Any]]:
+        links = []
+        for node in self._parse(html, encoding).css('a[href], link[href]'):
+            rel = node.attributes.get('rel') or ''
+            links.append({'href': node.attributes['href'], 'rel': rel.split(), 'text': node.text(separator=' ', strip=True)})
+        return links
+
+    @staticmethod
+    def _content(tree, selectors: List[str]):
+        for selector in selectors:
+            node = tree.css_first(selector)
+            if node is None:
+                continue
+            # css() also matches the node itself; only descendants count
+            paragraphs = [p for p in node.css('p') if p.mem_id != node.mem_id]
+            if paragraphs:
+                return " ".join([p.text().strip() for p in paragraphs]), selector
+        return "", None
+
+    @staticmethod
+    def _best_value(tree, selectors: List[str], node_value):
+        for selector in selectors:
+            node = tree.css_first(selector)
+            if node is not None:
+                if node.tag == 'meta':
+                    return node.attributes.get('content') or '', selector
+                return node_value(node), selector
+        return None, None
+
+
+def _is_ld_json(script_type) -> bool:
+    return bool(script_type) and script_type.strip().lower() == 'application/ld+json'
+
+
+def available_backends() -> List[str]:
+    """Names of the installed parser backends, fastest first"""
+    installed = {
+        'selectolax': LexborHTMLParser is not None,
+        'lxml': HAS_LXML,
+        'html.parser': True
+    }
+    return [name for name in BACKEND_PRIORITY if installed[name]]
+
+
+_backends = {}
+
+
+def get_parser_backend(name: str = 'auto') -> ParserBackend:
+    """Get a parser backend by name, falling back to html.parser when it is not installed"""
+    if name in _backends:
+        return _backends[name]
+
+    installed = available_backends()
+    resolved = name
+    if name == 'auto':
+        resolved = installed[0]
+    elif name not in BACKEND_PRIORITY:
+        raise ValueError(f"Unknown parser backend: {name}")
+    elif name not in installed:
+        print(f"Parser backend '{name}' is not installed, falling back to html.parser")
+        resolved = 'html.parser'
+
+    backend = SelectolaxBackend() if resolved == 'selectolax' else BeautifulSoupBackend(resolved)
+    _backends[name] = backend
+    return backend
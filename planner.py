@@ -0,0 +1,73 @@
+from collections import OrderedDict
+from typing import Dict, Any, List
+
+from urls import canonicalize_url, source_key
+from host_scheduler import host_of
+
+
+class SourcePlan:
+    """The distinct sources behind a list of requested URLs, ready to dispatch.
+
+    Requested URLs that only differ by scheme, trailing slash, tracking
+    parameters, letter case of the host or a default port are one source
+    and are fetched (and cached) once. The plan remembers which requested
+    URLs each fetched URL stands for, so results can be reported against
+    all of them.
+    """
+
+    def __init__(self):
+        self.urls = []      # URLs to fetch, in the order they were first requested
+        self.aliases = {}   # URL to fetch -> the requested URLs it stands for, repeats included
+        self._keys = {}     # source key -> URL to fetch
+
+    def add(self, requested_url: str):
+        canonical = canonicalize_url(requested_url)
+        if canonical is None:
+            # Not an HTTP(S) URL: passed through as is, the scrape reports the error
+            key = canonical = requested_url
+        else:
+            key = source_key(canonical)
+
+        url = self._keys.get(key)
+        if url is None:
+            self._keys[key] = canonical
+            self.urls.append(canonical)
+            self.aliases[canonical] = [requested_url]
+            return
+
+        self.aliases[url].append(requested_url)
+        # Prefer the https variant when both were requested
+        if url.startswith('http:') and canonical.startswith('https:'):
+            self._keys[key] = canonical
+            self.urls[self.urls.index(url)] = canonical
+            self.aliases[canonical] = self.aliases.pop(url)
+
+    @property
+    def requested(self) -> int:
+        """Number of requested URLs, duplicates included"""
+        return sum(len(aliases) for aliases in self.aliases.values())
+
+    def by_host(self) -> Dict[str, List[str]]:
+        """URLs to fetch grouped by host, hosts in order of first appearance"""
+        hosts = OrderedDict()
+        for url in self.urls:
+            hosts.setdefault(host_of(url), []).append(url)
+        return hosts
+
+    def annotate(self, article_data: Dict[str, Any]) -> Dict[str, Any]:
+        """article_data with 'requested_urls' added when the source was requested under other URLs"""
+        aliases = list(dict.fromkeys(self.aliases.get(article_data.get('url'), [])))
+        if not aliases or aliases == [article_data['url']]:
+            return article_data
+        return dict(article_data, requested_urls=aliases)
+
+    def summary(self) -> str:
+        return f"{self.requested} requested URLs, {len(self.urls)} distinct sources on {len(self.by_host())} hosts"
+
+
+def plan_sources(urls: List[str]) -> SourcePlan:
+    """Canonicalize and deduplicate requested source URLs"""
+    plan = SourcePlan()
+    for url in urls:
+        plan.add(url)
+    return plan
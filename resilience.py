@@ -0,0 +1,159 @@
+import time
+import random
+import threading
+from typing import Dict, Any, Optional
+
+from host_scheduler import host_of
+
+# Responses worth another attempt: throttling and transient server errors
+RETRYABLE_STATUSES = (429, 500, 502, 503, 504)
+
+# Circuit breaker states
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending a request to a host whose circuit is open"""
+    pass
+
+
+class RetryPolicy:
+    """Bounded retries with exponential backoff and full jitter"""
+
+    def __init__(self, max_attempts: int = 3, backoff_base: float = 0.5, backoff_max: float = 8.0):
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+    @classmethod
+    def from_config(cls, retry_config: Dict[str, Any]) -> 'RetryPolicy':
+        """Build a retry policy from a RETRY_CONFIG-style dict"""
+        return cls(
+            max_attempts=retry_config.get('max_attempts', 3),
+            backoff_base=retry_config.get('backoff_base_seconds', 0.5),
+            backoff_max=retry_config.get('backoff_max_seconds', 8.0)
+        )
+
+    def can_retry(self, attempt: int) -> bool:
+        """Whether another attempt is allowed after the given (0-based) attempt failed"""
+        return attempt + 1 < self.max_attempts
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Seconds to wait before the next attempt; a server's Retry-After is a lower bound"""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        if retry_after:
+            delay = max(delay, min(retry_after, self.backoff_max))
+        return delay
+
+
+class CircuitBreaker:
+    """Stops sending requests to a host after consecutive failures.
+
+    After failure_threshold consecutive failures the circuit opens and
+    requests fail immediately. Once reset_timeout has passed, one probe
+    request is let through (half-open): success closes the circuit, failure
+    opens it again with the timeout doubled, up to max_reset_timeout.
+    """
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30.0, max_reset_timeout: float = 300.0):
+        self.failure_threshold = failure_threshold
+        self.base_reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+
+        self.state = CLOSED
+        self.failures = 0
+        self.reset_timeout = reset_timeout
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+        self._stats = {'failures': 0, 'rejected': 0, 'opened': 0}
+
+    def before_request(self, host: str = ''):
+        """Raise CircuitOpenError unless a request to the host may be sent now"""
+        with self._lock:
+            if self.state == CLOSED:
+                return
+            remaining = self.opened_at + self.reset_timeout - time.monotonic()
+            if self.state == OPEN and remaining <= 0:
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return
+            self._stats['rejected'] += 1
+
+        raise CircuitOpenError(f"{host or 'Host'} is unavailable, not retrying for {max(remaining, 0):.0f}s")
+
+    def record_success(self):
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self.reset_timeout = self.base_reset_timeout
+            self._probe_in_flight = False
+
+    def abandon(self):
+        """The request ended without telling us anything about the host (e.g. it was cancelled)"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._stats['failures'] += 1
+            if self.state == HALF_OPEN:
+                # The probe failed: back off harder before the next one
+                self.reset_timeout = min(self.max_reset_timeout, self.reset_timeout * 2)
+                self._open()
+            elif self.state == CLOSED and self.failures >= self.failure_threshold:
+                self._open()
+
+    def _open(self):
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self._probe_in_flight = False
+        self._stats['opened'] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update({
+                'state': self.state,
+                'consecutive_failures': self.failures,
+                'reset_timeout': self.reset_timeout
+            })
+            return stats
+
+
+class CircuitBreakers:
+    """One circuit breaker per host"""
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30.0, max_reset_timeout: float = 300.0):
+        self.settings = {
+            'failure_threshold': failure_threshold,
+            'reset_timeout': reset_timeout,
+            'max_reset_timeout': max_reset_timeout
+        }
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, breaker_config: Dict[str, Any]) -> 'CircuitBreakers':
+        """Build the per-host breakers from a CIRCUIT_BREAKER_CONFIG-style dict"""
+        return cls(
+            failure_threshold=breaker_config.get('failure_threshold', 3),
+            reset_timeout=breaker_config.get('reset_timeout_seconds', 30.0),
+            max_reset_timeout=breaker_config.get('max_reset_timeout_seconds', 300.0)
+        )
+
+    def for_url(self, url: str) -> CircuitBreaker:
+        host = host_of(url)
+        with self._lock:
+            if host not in self._breakers:
+                self._breakers[host] = CircuitBreaker(**self.settings)
+            return self._breakers[host]
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {host: breaker.snapshot() for host, breaker in breakers.items()}
@@ -0,0 +1,167 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+from typing import Dict, Any, List, Optional
+
+
+class ResultStore:
+    """Scraped articles kept server-side as result sets, so clients only handle ids and previews.
+
+    Result sets live in a SQLite file shared by every worker process, and
+    expire ttl_seconds after they were created.
+    """
+
+    def __init__(self, sqlite_path: str, ttl_seconds: int = 86400, snippet_length: int = 200):
+        self.sqlite_path = sqlite_path
+        self.ttl_seconds = ttl_seconds
+        self.snippet_length = snippet_length
+        self._local = threading.local()
+
+        directory = os.path.dirname(sqlite_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = self._connection()
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS result_sets ('
+            'id TEXT PRIMARY KEY, created_at REAL NOT NULL, cancel_requested INTEGER NOT NULL DEFAULT 0)'
+        )
+        # Stores created before scrapes could be cancelled lack the column
+        columns = [row[1] for row in conn.execute('PRAGMA table_info(result_sets)')]
+        if 'cancel_requested' not in columns:
+            conn.execute('ALTER TABLE result_sets ADD COLUMN cancel_requested INTEGER NOT NULL DEFAULT 0')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS result_articles ('
+            'set_id TEXT NOT NULL, position INTEGER NOT NULL, data TEXT NOT NULL, '
+            'PRIMARY KEY (set_id, position))'
+        )
+        conn.commit()
+
+    @classmethod
+    def from_config(cls, result_config: Dict[str, Any]) -> 'ResultStore':
+        """Build a result store from a RESULT_STORE_CONFIG-style dict"""
+        return cls(
+            result_config.get('sqlite_path', 'cache/results.sqlite3'),
+            ttl_seconds=result_config.get('ttl_seconds', 86400),
+            snippet_length=result_config.get('snippet_length', 200)
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        """Get this thread's connection to the result store"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.sqlite_path, timeout=10)
+            self._local.conn = conn
+        return conn
+
+    def create(self) -> str:
+        """Start a new, empty result set and return its id"""
+        self.purge_expired()
+
+        result_set_id = uuid.uuid4().hex
+        conn = self._connection()
+        with conn:
+            conn.execute('INSERT INTO result_sets (id, created_at) VALUES (?, ?)', (result_set_id, time.time()))
+        return result_set_id
+
+    def add(self, result_set_id: str, position: int, article_data: Dict[str, Any]):
+        """Store one article of a result set at the given position"""
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO result_articles (set_id, position, data) VALUES (?, ?, ?)',
+                (result_set_id, position, json.dumps(article_data, ensure_ascii=False))
+            )
+
+    def save(self, articles: List[Dict[str, Any]]) -> str:
+        """Store a complete list of articles as a new result set and return its id"""
+        result_set_id = self.create()
+        conn = self._connection()
+        with conn:
+            conn.executemany(
+                'INSERT INTO result_articles (set_id, position, data) VALUES (?, ?, ?)',
+                [(result_set_id, position, json.dumps(article, ensure_ascii=False))
+                 for position, article in enumerate(articles)]
+            )
+        return result_set_id
+
+    def request_cancel(self, result_set_id: str) -> bool:
+        """Ask the scrape filling a result set to stop; False if the result set does not exist"""
+        conn = self._connection()
+        with conn:
+            cursor = conn.execute('UPDATE result_sets SET cancel_requested = 1 WHERE id = ?', (result_set_id,))
+        return cursor.rowcount > 0
+
+    def is_cancel_requested(self, result_set_id: str) -> bool:
+        row = self._connection().execute(
+            'SELECT cancel_requested FROM result_sets WHERE id = ?', (result_set_id,)
+        ).fetchone()
+        return bool(row and row[0])
+
+    def _is_live(self, result_set_id: str) -> bool:
+        row = self._connection().execute(
+            'SELECT created_at FROM result_sets WHERE id = ?', (result_set_id,)
+        ).fetchone()
+        return row is not None and time.time() - row[0] <= self.ttl_seconds
+
+    def get_articles(self, result_set_id: str) -> Optional[List[Dict[str, Any]]]:
+        """All articles of a result set in order, or None if it is unknown or expired"""
+        if not self._is_live(result_set_id):
+            return None
+        rows = self._connection().execute(
+            'SELECT data FROM result_articles WHERE set_id = ? ORDER BY position', (result_set_id,)
+        ).fetchall()
+        return [json.loads(data) for (data,) in rows]
+
+    def get_article(self, result_set_id: str, position: int) -> Optional[Dict[str, Any]]:
+        """One article of a result set, or None if it does not exist"""
+        if not self._is_live(result_set_id):
+            return None
+        row = self._connection().execute(
+            'SELECT data FROM result_articles WHERE set_id = ? AND position = ?', (result_set_id, position)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def preview(self, article_data: Dict[str, Any], position: int) -> Dict[str, Any]:
+        """Lightweight view of an article for listing: title, url, date and a content snippet"""
+        if 'error' in article_data:
+            preview = {'index': position, 'url': article_data.get('url', ''), 'error': article_data['error']}
+            if article_data.get('timed_out'):
+                preview['timed_out'] = True
+        else:
+            # Partial articles (previews) have no content, only the page's description
+            content = article_data.get('content', article_data.get('description', ''))
+            snippet = content[:self.snippet_length]
+            if len(content) > self.snippet_length:
+                snippet = snippet.rsplit(' ', 1)[0] + '...'
+
+            preview = {
+                'index': position,
+                'url': article_data.get('url', ''),
+                'title': article_data.get('title', ''),
+                'publish_date': article_data.get('publish_date', ''),
+                'snippet': snippet
+            }
+
+        if article_data.get('partial'):
+            preview['partial'] = True
+
+        # The URLs the client asked for, when they differ from the one fetched
+        if article_data.get('requested_urls'):
+            preview['requested_urls'] = article_data['requested_urls']
+        return preview
+
+    def purge_expired(self):
+        """Delete result sets older than the TTL"""
+        cutoff = time.time() - self.ttl_seconds
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                'DELETE FROM result_articles WHERE set_id IN (SELECT id FROM result_sets WHERE created_at < ?)',
+                (cutoff,)
+            )
+            conn.execute('DELETE FROM result_sets WHERE created_at < ?', (cutoff,))
@@ -0,0 +1,85 @@
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+class Flight:
+    """One in-progress call that other callers for the same key can wait on"""
+
+    def __init__(self):
+        self.result = None
+        self.error = None
+        self.abandoned = False
+        self._done = threading.Event()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the leader finishes; False if the timeout expired first"""
+        return self._done.wait(timeout)
+
+    def value(self) -> Any:
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+class SingleFlight:
+    """Coalesces concurrent calls for the same key into one.
+
+    The first caller for a key becomes the leader and does the work; callers
+    arriving while it runs wait for it and share its result. If the leader
+    abandons the call (e.g. it was cancelled), the waiters start over and one
+    of them leads instead.
+    """
+
+    def __init__(self):
+        self._flights = {}  # key -> Flight
+        self._lock = threading.Lock()
+        self._stats = {'leaders': 0, 'coalesced': 0}
+
+    def begin(self, key: str) -> Tuple[Flight, bool]:
+        """Join the key's flight, starting one if there is none; returns (flight, is_leader)"""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                self._stats['coalesced'] += 1
+                return flight, False
+            flight = self._flights[key] = Flight()
+            self._stats['leaders'] += 1
+            return flight, True
+
+    def finish(self, key: str, flight: Flight, result: Any = None, error: BaseException = None,
+               abandoned: bool = False):
+        """Publish the leader's outcome and wake the waiters"""
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+        flight.result = result
+        flight.error = error
+        flight.abandoned = abandoned
+        flight._done.set()
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """Call fn() unless a call for key is already running, in which case return its result"""
+        while True:
+            flight, leader = self.begin(key)
+            if leader:
+                break
+            flight.wait()
+            if not flight.abandoned:
+                return flight.value()
+
+        try:
+            result = fn()
+        except Exception as e:
+            self.finish(key, flight, error=e)
+            raise
+        except BaseException:
+            self.finish(key, flight, abandoned=True)
+            raise
+        self.finish(key, flight, result)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['in_flight'] = len(self._flights)
+        return stats
@@ -0,0 +1,200 @@
+import os
+import time
+import hashlib
+import sqlite3
+import threading
+from typing import Dict, Any, List, Optional
+
+# How long stats read from the store are trusted before re-reading changes made by other processes
+RELOAD_SECONDS = 60
+
+
+def content_hash(article_data: Dict[str, Any]) -> str:
+    """Hash of an article's extracted title and text; page chrome and ads don't count as changes"""
+    text = f"{article_data.get('title', '')}\n{article_data.get('content', '')}"
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+class SourceStats:
+    """How often each source changes, how fast it answers and how often it fails.
+
+    Every fetch updates the source's revisit interval: it is cut by
+    speedup_factor when the content changed since the last fetch and grown by
+    backoff_factor when it did not, within [min_revisit, max_revisit]. The
+    interval is stretched further for sources that fail often or answer more
+    slowly than slow_latency_seconds. Latency and failure rate are
+    exponentially weighted moving averages.
+
+    Stats live in a SQLite file shared by all worker processes.
+    """
+
+    def __init__(self,
+                 sqlite_path: str,
+                 initial_revisit: float = 3600,
+                 min_revisit: float = 300,
+                 max_revisit: float = 86400,
+                 speedup_factor: float = 0.5,
+                 backoff_factor: float = 1.5,
+                 slow_latency_seconds: float = 5.0,
+                 smoothing: float = 0.3):
+        self.sqlite_path = sqlite_path
+        self.initial_revisit = initial_revisit
+        self.min_revisit = min_revisit
+        self.max_revisit = max_revisit
+        self.speedup_factor = speedup_factor
+        self.backoff_factor = backoff_factor
+        self.slow_latency_seconds = slow_latency_seconds
+        self.smoothing = smoothing
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._sources = {}  # url -> (loaded_at, stats dict or None), read from the store on demand
+
+        directory = os.path.dirname(sqlite_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = self._connection()
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS source_stats ('
+            'url TEXT PRIMARY KEY, content_hash TEXT, revisit_seconds REAL NOT NULL, latency REAL, '
+            'failure_rate REAL NOT NULL DEFAULT 0, fetches INTEGER NOT NULL DEFAULT 0, '
+            'changes INTEGER NOT NULL DEFAULT 0, failures INTEGER NOT NULL DEFAULT 0, '
+            'last_fetched REAL, last_changed REAL)'
+        )
+        conn.commit()
+
+    @classmethod
+    def from_config(cls, stats_config: Dict[str, Any], initial_revisit: float = 3600) -> 'SourceStats':
+        """Build source stats from a SOURCE_STATS_CONFIG-style dict; new sources start at initial_revisit"""
+        return cls(
+            stats_config.get('sqlite_path', 'cache/source_stats.sqlite3'),
+            initial_revisit=initial_revisit,
+            min_revisit=stats_config.get('min_revisit_seconds', 300),
+            max_revisit=stats_config.get('max_revisit_seconds', 86400),
+            speedup_factor=stats_config.get('speedup_factor', 0.5),
+            backoff_factor=stats_config.get('backoff_factor', 1.5),
+            slow_latency_seconds=stats_config.get('slow_latency_seconds', 5.0),
+            smoothing=stats_config.get('smoothing', 0.3)
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        """Get this thread's connection to the stats store"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.sqlite_path, timeout=10)
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        """Stats for one source, or None if it was never fetched"""
+        with self._lock:
+            loaded = self._sources.get(url)
+        if loaded is not None and time.monotonic() - loaded[0] < RELOAD_SECONDS:
+            return loaded[1]
+
+        row = self._connection().execute('SELECT * FROM source_stats WHERE url = ?', (url,)).fetchone()
+        source = dict(row) if row is not None else None
+        with self._lock:
+            self._sources[url] = (time.monotonic(), source)
+        return source
+
+    def _save(self, source: Dict[str, Any]):
+        with self._lock:
+            self._sources[source['url']] = (time.monotonic(), source)
+
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO source_stats (url, content_hash, revisit_seconds, latency, failure_rate, '
+                'fetches, changes, failures, last_fetched, last_changed) '
+                'VALUES (:url, :content_hash, :revisit_seconds, :latency, :failure_rate, '
+                ':fetches, :changes, :failures, :last_fetched, :last_changed)',
+                source
+            )
+
+    def _new_source(self, url: str) -> Dict[str, Any]:
+        return {
+            'url': url, 'content_hash': None, 'revisit_seconds': self.initial_revisit, 'latency': None,
+            'failure_rate': 0.0, 'fetches': 0, 'changes': 0, 'failures': 0,
+            'last_fetched': None, 'last_changed': None
+        }
+
+    def _average(self, previous: Optional[float], sample: float) -> float:
+        return sample if previous is None else previous + self.smoothing * (sample - previous)
+
+    def record_success(self, url: str, latency: Optional[float], digest: Optional[str] = None):
+        """Record a successful fetch; digest is the content hash, or None when the server said 304"""
+        source = dict(self.get(url) or self._new_source(url))
+        now = time.time()
+
+        changed = digest is not None and source['content_hash'] is not None and digest != source['content_hash']
+        # Nothing to compare the first fetch with
+        if source['content_hash'] is not None or digest is None:
+            factor = self.speedup_factor if changed else self.backoff_factor
+            source['revisit_seconds'] = min(self.max_revisit,
+                                            max(self.min_revisit, source['revisit_seconds'] * factor))
+        if changed:
+            source['changes'] += 1
+            source['last_changed'] = now
+        if digest is not None:
+            source['content_hash'] = digest
+
+        source['fetches'] += 1
+        source['last_fetched'] = now
+        source['failure_rate'] = self._average(source['failure_rate'], 0.0)
+        if latency is not None:
+            source['latency'] = self._average(source['latency'], latency)
+        self._save(source)
+
+    def record_failure(self, url: str):
+        source = dict(self.get(url) or self._new_source(url))
+        source['fetches'] += 1
+        source['failures'] += 1
+        source['last_fetched'] = time.time()
+        source['failure_rate'] = self._average(source['failure_rate'] if source['fetches'] > 1 else None, 1.0)
+        self._save(source)
+
+    def revisit_interval(self, url: str) -> Optional[float]:
+        """Seconds a fetched copy of url stays fresh, or None for sources without history"""
+        source = self.get(url)
+        if source is None:
+            return None
+
+        interval = source['revisit_seconds'] * (1 + source['failure_rate'])
+        if source['latency'] and source['latency'] > self.slow_latency_seconds:
+            interval *= source['latency'] / self.slow_latency_seconds
+        return min(self.max_revisit, interval)
+
+    def fetch_order(self, urls: List[str]) -> List[str]:
+        """urls sorted so fast, reliable and frequently changing sources are fetched first.
+
+        Sources without history are ranked as if they had the median latency.
+        """
+        sources = {url: self.get(url) for url in urls}
+        latencies = sorted(source['latency'] for source in sources.values() if source and source['latency'])
+        default_latency = latencies[len(latencies) // 2] if latencies else 0.0
+
+        def cost(url):
+            source = sources[url]
+            if source is None:
+                return default_latency, self.initial_revisit
+            # Expected time per successful fetch, then how quickly the content changes
+            latency = source['latency'] if source['latency'] is not None else default_latency
+            return latency / max(0.05, 1 - source['failure_rate']), source['revisit_seconds']
+
+        return sorted(urls, key=cost)
+
+    def snapshot(self, urls: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Stats and effective revisit interval per source (all sources in the store by default)"""
+        if urls is None:
+            urls = [url for (url,) in self._connection().execute('SELECT url FROM source_stats')]
+        snapshot = {}
+        for url in urls:
+            source = self.get(url)
+            if source is not None:
+                stats = {key: value for key, value in source.items() if key not in ('url', 'content_hash')}
+                stats['revisit_interval'] = self.revisit_interval(url)
+                snapshot[url] = stats
+        return snapshot
@@ -3,14 +3,17 @@
 // Global state
 const state = {
     apiKey: localStorage.getItem('orangeNewsApiKey') || '',
-    scrapedData: [],
+    scrapedData: [],     // Article previews; full articles stay on the server
+    resultSetId: null,   // Server-side result set holding the scraped articles
     currentArticle: null,
     analyticsData: {
         sentiment: {},
         keywords: [],
         images: []
     },
-    urls: []
+    urls: [],
+    scrapeTotalUrls: 0,
+    scrapeController: null  // Aborts the running scrape's stream
 };
 
 // Document ready
@@ -79,6 +82,16 @@ function setupEventListeners() {
         startScraping();
     });
     
+    $('.cancel-scraping-btn').on('click', function() {
+        console.log("Cancel scraping button clicked");
+        cancelScraping();
+    });
+    
+    // Rows are added while results stream in, so view buttons use a delegated handler
+    $('#articles-tbody').on('click', '.view-article', function() {
+        showArticlePreview($(this).data('index'));
+    });
+    
     // Article Generation
     $('#generate-form').on('submit', function(e) {
         console.log("Generate form submitted");
@@ -213,6 +226,8 @@ function startScraping() {
     const topic = $('#topic-select').val();
     const searchKeyword = $('#search-keyword').val().trim();
     const maxWorkers = $('#max-workers').val();
+    const crawl = $('#crawl-sources').is(':checked');
+    const preview = $('#preview-only').is(':checked');
     
     console.log(`Scraping with topic: ${topic}, keyword: ${searchKeyword}, workers: ${maxWorkers}`);
     console.log(`URLs to scrape: ${state.urls}`);
@@ -234,56 +249,159 @@ function startScraping() {
         topic: topic,
         custom_urls: state.urls,
         search_keyword: searchKeyword,
-        max_workers: parseInt(maxWorkers)
+        max_workers: parseInt(maxWorkers),
+        crawl: crawl,
+        preview: preview
     };
     
     console.log("Sending request data:", JSON.stringify(requestData));
     
-    // API request
-    $.ajax({
-        url: '/api/scrape',
-        type: 'POST',
-        contentType: 'application/json',
-        data: JSON.stringify(requestData),
-        success: function(response) {
-            console.log("Scraping successful:", response);
-            hideLoading();
-            
-            // Update progress
-            $('#scraping-progress-bar').css('width', '100%');
-            
-            // Update state
-            state.scrapedData = response.results;
-            
-            // Update UI
-            $('#scraping-status').removeClass('alert-warning alert-danger')
-                .addClass('alert-success')
-                .html(`<i class="fas fa-check-circle"></i> Successfully scraped ${response.total} articles.`);
-            
-            // Update table
-            updateScrapedArticles();
-            
-            // After a delay, hide the progress bar
-            setTimeout(function() {
-                $('#scraping-progress-container').hide();
-            }, 2000);
-        },
-        error: function(xhr, status, error) {
-            console.error("Scraping error:", error);
-            console.error("Response:", xhr.responseText);
+    // Reset results; rows are added as each article arrives
+    state.scrapedData = [];
+    state.resultSetId = null;
+    updateScrapedArticles();
+    
+    state.scrapeController = new AbortController();
+    $('#start-scraping-btn').prop('disabled', true);
+    $('.cancel-scraping-btn').prop('disabled', false).show();
+    
+    // Streaming API request: one JSON event per line (NDJSON)
+    fetch('/api/scrape/stream', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify(requestData),
+        signal: state.scrapeController.signal
+    })
+        .then(response => {
+            if (!response.ok) {
+                return response.json().then(body => {
+                    throw new Error(body.error || response.statusText);
+                });
+            }
+            return readNdjsonStream(response, handleScrapeEvent);
+        })
+        .catch(error => {
             hideLoading();
             
             // Update UI
-            $('#scraping-status').removeClass('alert-warning alert-success')
-                .addClass('alert-danger')
-                .html(`<i class="fas fa-exclamation-circle"></i> Error: ${xhr.responseJSON?.error || error}`);
+            if (error.name === 'AbortError') {
+                console.log("Scraping cancelled before it started returning results");
+                $('#scraping-status').removeClass('alert-warning alert-success alert-danger')
+                    .addClass('alert-info')
+                    .html('<i class="fas fa-ban"></i> Scraping cancelled.');
+            } else {
+                console.error("Scraping error:", error);
+                $('#scraping-status').removeClass('alert-warning alert-success')
+                    .addClass('alert-danger')
+                    .html(`<i class="fas fa-exclamation-circle"></i> Error: ${error.message}`);
+            }
             
             // Hide progress bar
             $('#scraping-progress-container').hide();
+        })
+        .finally(() => {
+            state.scrapeController = null;
+            $('#start-scraping-btn').prop('disabled', false);
+            $('.cancel-scraping-btn').hide();
+        });
+}
+
+// Stop the running scrape, keeping the articles that already arrived
+function cancelScraping() {
+    if (!state.scrapeController) {
+        return;
+    }
+    $('.cancel-scraping-btn').prop('disabled', true);
+    $('#scraping-status').html('<i class="fas fa-spinner fa-spin"></i> Cancelling...');
+    
+    if (!state.resultSetId) {
+        // The server has not started streaming yet: dropping the connection stops it
+        state.scrapeController.abort();
+        return;
+    }
+    
+    // Ask the server to stop; the stream then ends with a summary of what was scraped
+    $.ajax({
+        url: `/api/scrape/${state.resultSetId}/cancel`,
+        type: 'POST',
+        error: function(xhr) {
+            console.error("Error cancelling scrape:", xhr.responseText);
+            if (state.scrapeController) {
+                state.scrapeController.abort();
+            }
         }
     });
 }
 
+// Read a newline-delimited JSON response, calling onEvent for each object as it arrives
+function readNdjsonStream(response, onEvent) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    
+    function pump() {
+        return reader.read().then(({ done, value }) => {
+            buffer += decoder.decode(value || new Uint8Array(), { stream: !done });
+            
+            const lines = buffer.split('\n');
+            buffer = lines.pop();
+            lines.filter(line => line.trim()).forEach(line => onEvent(JSON.parse(line)));
+            
+            if (done) {
+                if (buffer.trim()) {
+                    onEvent(JSON.parse(buffer));
+                }
+                return;
+            }
+            return pump();
+        });
+    }
+    
+    return pump();
+}
+
+// Handle one event from the streaming scrape endpoint
+function handleScrapeEvent(event) {
+    if (event.type === 'start') {
+        state.scrapeTotalUrls = event.total_urls;
+        state.resultSetId = event.result_set_id;
+        $('#scraping-progress-bar').css('width', '0%');
+    } else if (event.type === 'article') {
+        // First result is in: the table can take over from the overlay
+        hideLoading();
+        
+        const percent = state.scrapeTotalUrls ? Math.round(100 * event.completed / state.scrapeTotalUrls) : 100;
+        $('#scraping-progress-bar').css('width', `${percent}%`);
+        $('#scraping-status').html(`<i class="fas fa-spinner fa-spin"></i> Scraping in progress... (${event.completed}/${state.scrapeTotalUrls})`);
+        
+        // Articles filtered out by the search keyword arrive as null
+        if (event.article) {
+            appendScrapedArticle(event.article);
+        }
+    } else if (event.type === 'summary') {
+        console.log("Scraping successful:", event);
+        hideLoading();
+        
+        // Update progress
+        $('#scraping-progress-bar').css('width', '100%');
+        
+        // Update UI
+        $('#scraping-status').removeClass('alert-warning alert-danger')
+            .addClass('alert-success')
+            .html((event.cancelled
+                ? `<i class="fas fa-ban"></i> Scraping cancelled after ${event.total} articles.`
+                : `<i class="fas fa-check-circle"></i> Successfully scraped ${event.total} articles.`) +
+                (event.timed_out ? ` ${event.timed_out} sources did not respond in time.` : ''));
+        
+        // After a delay, hide the progress bar
+        setTimeout(function() {
+            $('#scraping-progress-container').hide();
+        }, 2000);
+    } else if (event.type === 'error') {
+        throw new Error(event.error);
+    }
+}
+
 // Update scraped articles table
 function updateScrapedArticles() {
     console.log("Updating scraped articles table");
@@ -300,69 +418,120 @@ function updateScrapedArticles() {
         return;
     }
     
+    state.scrapedData.forEach((article, index) => renderArticleRow(article, index));
+}
+
+// Add a streamed article to the state and the table
+function appendScrapedArticle(article) {
+    state.scrapedData.push(article);
+    renderArticleRow(article, state.scrapedData.length - 1);
+}
+
+// Render one table row (articles with errors are skipped)
+function renderArticleRow(article, index) {
+    if ('error' in article) {
+        console.log(`Skipping article with error: ${article.error}`);
+        return; // Skip articles with errors
+    }
+    
     $('#no-articles-message').hide();
     $('#articles-table').show();
     
-    let validCount = 0;
+    const title = article.title || 'Untitled';
+    const source = article.url || '';
+    const date = article.publish_date || 'Unknown';
     
-    state.scrapedData.forEach((article, index) => {
-        if ('error' in article) {
-            console.log(`Skipping article with error: ${article.error}`);
-            return; // Skip articles with errors
-        }
-        
-        validCount++;
-        
-        const title = article.title || 'Untitled';
-        const source = article.url || '';
-        const date = article.publish_date || 'Unknown';
-        
-        console.log(`Adding article: ${title}`);
-        
-        const row = $('<tr></tr>');
-        row.html(`
-            <td>${title}</td>
-            <td><a href="${source}" target="_blank">${source.substring(0, 30)}...</a></td>
-            <td>${date}</td>
-            <td>
-                <button class="btn btn-sm btn-outline-primary view-article" data-index="${index}">
-                    <i class="fas fa-eye"></i>
-                </button>
-            </td>
-        `);
-        
-        tbody.append(row);
-    });
+    console.log(`Adding article: ${title}`);
+    
+    const row = $('<tr></tr>');
+    row.html(`
+        <td>${title}${article.partial ? ' <span class="badge bg-secondary">Preview</span>' : ''}</td>
+        <td><a href="${source}" target="_blank">${source.substring(0, 30)}...</a></td>
+        <td>${date}</td>
+        <td>
+            <button class="btn btn-sm btn-outline-primary view-article" data-index="${index}">
+                <i class="fas fa-eye"></i>
+            </button>
+        </td>
+    `);
+    
+    $('#articles-tbody').append(row);
     
     // Update article count
+    const validCount = state.scrapedData.filter(a => !('error' in a)).length;
     $('#article-count').text(validCount);
+}
+
+// Fetch a scraped article from the server's result set and show it in the preview modal
+function showArticlePreview(index) {
+    const preview = state.scrapedData[index];
     
-    // Add event listener for view buttons
-    $('.view-article').on('click', function() {
-        const index = $(this).data('index');
-        const article = state.scrapedData[index];
-        
-        // Show article in modal
-        $('#preview-title').text(article.title || 'Untitled');
-        $('#preview-date').text(article.publish_date || 'Unknown date');
-        $('#preview-source').text(article.url || '');
-        
-        // Format content for better readability
-        const formattedContent = article.content ? article.content.replace(/\n/g, '<br>') : 'No content available';
-        $('#preview-content').html(formattedContent);
-        
-        // Show image if available
-        if (article.image_url) {
-            $('#preview-image').attr('src', article.image_url).show();
-        } else {
-            $('#preview-image').hide();
+    if (preview.partial) {
+        promoteArticle(index);
+        return;
+    }
+    
+    $.ajax({
+        url: `/api/results/${state.resultSetId}/${preview.index}`,
+        type: 'GET',
+        success: function(response) {
+            renderArticlePreview(response.article);
+        },
+        error: function(xhr, status, error) {
+            console.error("Error loading article:", error);
+            // Fall back to the preview we already have
+            renderArticlePreview(Object.assign({}, preview, { content: preview.snippet }));
         }
-        
-        // Show the modal
-        $('#articlePreviewModal').modal('show');
     });
 }
 
+// Scrape the full article behind a preview-only result, replacing the preview, and show it
+function promoteArticle(index) {
+    const preview = state.scrapedData[index];
+    showLoading('Scraping the full article...');
+    
+    $.ajax({
+        url: `/api/results/${state.resultSetId}/${preview.index}/full`,
+        type: 'POST',
+        contentType: 'application/json',
+        data: JSON.stringify({ api_key: state.apiKey }),
+        success: function(response) {
+            hideLoading();
+            state.scrapedData[index] = response.preview;
+            updateScrapedArticles();
+            renderArticlePreview(response.article);
+        },
+        error: function(xhr, status, error) {
+            hideLoading();
+            console.error("Error scraping full article:", error);
+            // Fall back to the metadata we already have
+            renderArticlePreview(Object.assign({}, preview, { content: preview.snippet }));
+        }
+    });
+}
+
+// Fill and open the preview modal for a full article
+function renderArticlePreview(article) {
+    // Show article in modal
+    $('#preview-title').text(article.title || 'Untitled');
+    $('#preview-date').text(article.publish_date || 'Unknown date');
+    $('#preview-source').text(article.url || '');
+    
+    // Format content for better readability
+    const formattedContent = article.content ? article.content.replace(/\n/g, '<br>') : 'No content available';
+    $('#preview-content').html(formattedContent);
+    
+    // Show image if available
+    if (article.image_url) {
+        $('#preview-image').attr('src', article.image_url).show();
+    } else {
+        $('#preview-image').hide();
+    }
+    
+    // Show the modal
+    $('#articlePreviewModal').modal('show');
+}
+
 // Update template defaults
 function updateTemplateDefaults() {
     const template = $('#template-select').val();
@@ -405,7 +574,7 @@ function generateArticle() {
         return;
     }
     
-    if (!state.scrapedData || state.scrapedData.length === 0) {
+    if (!state.resultSetId || !state.scrapedData || state.scrapedData.length === 0) {
         console.log("No scraped data available");
         $('#generation-status').removeClass('alert-info alert-success alert-warning')
             .addClass('alert-danger')
@@ -442,7 +611,7 @@ function generateArticle() {
         contentType: 'application/json',
         data: JSON.stringify({
             api_key: state.apiKey,
-            scraped_data: state.scrapedData,
+            result_set_id: state.resultSetId,
             template: template,
             topic: customTopic,
             audience: audience,
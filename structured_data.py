@@ -0,0 +1,135 @@
+import re
+import json
+import html
+from typing import List, Dict, Any, Optional
+from urllib.parse import urljoin
+
+# Names reported in place of a CSS selector for fields taken from structured data
+JSON_LD = 'json-ld'
+OPENGRAPH = 'opengraph'
+STRUCTURED_SOURCES = (JSON_LD, OPENGRAPH)
+
+# schema.org types whose properties describe the article itself
+ARTICLE_TYPES = {
+    'Article', 'NewsArticle', 'BlogPosting', 'Report', 'ReportageNewsArticle', 'AnalysisNewsArticle',
+    'OpinionNewsArticle', 'BackgroundNewsArticle', 'LiveBlogPosting', 'TechArticle', 'ScholarlyArticle'
+}
+
+# <meta property> (or name) values per field, in priority order
+OPENGRAPH_PROPERTIES = {
+    'title': ['og:title'],
+    'description': ['og:description', 'description'],
+    'date': ['article:published_time'],
+    'image': ['og:image:secure_url', 'og:image:url', 'og:image']
+}
+
+_WHITESPACE = re.compile(r'\s+')
+_TAGS = re.compile(r'<[^>]+>')
+
+
+def _text(value: Any) -> Optional[str]:
+    """Plain text of a JSON-LD string value (entities decoded, markup and extra whitespace removed)"""
+    if not isinstance(value, str):
+        return None
+    text = _WHITESPACE.sub(' ', html.unescape(_TAGS.sub(' ', value))).strip()
+    return text or None
+
+
+def _types(item: Dict[str, Any]) -> List[str]:
+    types = item.get('@type') or []
+    return [types] if isinstance(types, str) else [t for t in types if isinstance(t, str)]
+
+
+def _article_items(data: Any) -> List[Dict[str, Any]]:
+    """Article objects in a JSON-LD document, looking inside lists and @graph"""
+    items = []
+    stack = [data]
+    while stack:
+        node = stack.pop(0)
+        if isinstance(node, list):
+            stack.extend(node)
+        elif isinstance(node, dict):
+            if ARTICLE_TYPES.intersection(_types(node)):
+                items.append(node)
+            if '@graph' in node:
+                stack.append(node['@graph'])
+    return items
+
+
+def _author(value: Any) -> Optional[str]:
+    """Author names of a JSON-LD author property (a string, a Person/Organization or a list of them)"""
+    if isinstance(value, list):
+        names = [_author(author) for author in value]
+        names = [name for name in names if name]
+        return ', '.join(dict.fromkeys(names)) or None
+    if isinstance(value, dict):
+        return _text(value.get('name'))
+    text = _text(value)
+    # Some sites put the author's profile URL here, which is no name
+    if text and text.startswith(('http://', 'https://')):
+        return None
+    return text
+
+
+def _image(value: Any) -> Optional[str]:
+    """URL of the first image of a JSON-LD image property (a URL, an ImageObject or a list of them)"""
+    if isinstance(value, list):
+        for image in value:
+            url = _image(image)
+            if url:
+                return url
+        return None
+    if isinstance(value, dict):
+        return _text(value.get('url') or value.get('contentUrl'))
+    return _text(value)
+
+
+def parse_json_ld(blocks: List[str]) -> Dict[str, Any]:
+    """Article fields found in the page's application/ld+json blocks (invalid blocks are skipped)"""
+    fields = {}
+    for block in blocks:
+        try:
+            data = json.loads(block, strict=False)
+        except ValueError:
+            continue
+        for item in _article_items(data):
+            values = {
+                'title': _text(item.get('headline')) or _text(item.get('name')),
+                'description': _text(item.get('description')),
+                'content': _text(item.get('articleBody')),
+                'date': _text(item.get('datePublished')) or _text(item.get('dateCreated')),
+                'author': _author(item.get('author')),
+                'image': _image(item.get('image'))
+            }
+            for field, value in values.items():
+                if value and field not in fields:
+                    fields[field] = value
+    return fields
+
+
+def extract_structured_data(ld_json_blocks: List[str], meta: Dict[str, str], url: str) -> Dict[str, Any]:
+    """Article fields from JSON-LD, completed with OpenGraph <meta> tags.
+
+    meta maps each <meta> tag's property (or name) to its content. Returns
+    the fields that were found, keyed by field name like FIELD_SELECTORS
+    plus 'title' and 'description', and 'sources' naming where each one
+    came from.
+    """
+    fields = parse_json_ld(ld_json_blocks)
+    sources = {field: JSON_LD for field in fields}
+
+    for field, properties in OPENGRAPH_PROPERTIES.items():
+        if field in fields:
+            continue
+        for name in properties:
+            value = (meta.get(name) or '').strip()
+            if value:
+                fields[field] = value
+                sources[field] = OPENGRAPH
+                break
+
+    if 'image' in fields and not fields['image'].startswith(('http://', 'https://')):
+        fields['image'] = urljoin(url, fields['image'])
+
+    fields['sources'] = sources
+    return fields
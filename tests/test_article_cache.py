@@ -0,0 +1,46 @@
+"""Entries expire, stay revalidatable and get purged according to their URL's own TTL."""
+import time
+
+import pytest
+
+from article_cache import ArticleCache
+
+HOUR = 3600
+DAY = 24 * HOUR
+SLOW_URL = 'https://www.example.tn/2024/05/slow-changing-page/'
+OTHER_URL = 'https://www.example.tn/2024/05/other-page/'
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ArticleCache(ttl_seconds=HOUR, backend='sqlite', sqlite_path=str(tmp_path / 'articles.sqlite3'),
+                         revalidation_window=DAY)
+    cache.ttl_policy = lambda url: 3 * DAY if url == SLOW_URL else None
+    yield cache
+    cache.close()
+
+
+def cache_aged(cache, url, age):
+    """Cache an article for url as if it had been fetched age seconds ago"""
+    entry = (time.time() - age, {'url': url, 'title': 'Title'}, {'etag': '"v1"'})
+    with cache._lock:
+        cache._insert(url, entry)
+    cache._store_set(url, entry)
+
+
+def test_long_ttl_entry_stays_revalidatable(cache):
+    # Expired under its own 3-day TTL but within the revalidation window after it
+    cache_aged(cache, SLOW_URL, 3 * DAY + HOUR)
+    assert cache.get(SLOW_URL) is None
+    assert cache.get_stale(SLOW_URL) == ({'url': SLOW_URL, 'title': 'Title'}, {'etag': '"v1"'})
+
+
+def test_purge_keeps_entries_within_their_own_ttl(cache):
+    cache_aged(cache, SLOW_URL, 2 * DAY)
+    cache_aged(cache, OTHER_URL, 2 * DAY)
+    # Every write purges the store
+    cache.set('https://www.example.tn/2024/05/new-page/', {'title': 'New'})
+
+    assert cache._store_get(SLOW_URL) is not None
+    assert cache._store_get(OTHER_URL) is None
+    assert cache.get(SLOW_URL) == {'url': SLOW_URL, 'title': 'Title'}
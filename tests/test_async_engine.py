@@ -0,0 +1,51 @@
+"""A host waiting out its pacing must not hold the global fetch slots other hosts need."""
+import time
+import asyncio
+
+import pytest
+
+pytest.importorskip('aiohttp')
+
+from async_engine import AsyncScrapeEngine, SharedFetchLimit
+from host_scheduler import HostScheduler
+
+
+class Response:
+    status = 404
+    headers = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class Session:
+    def get(self, url, headers=None):
+        return Response()
+
+
+def test_paced_host_does_not_hold_the_global_limit():
+    scheduler = HostScheduler(requests_per_second=0.5, burst=1)
+    engine = AsyncScrapeEngine(None, None, host_scheduler=scheduler, fetch_limit=SharedFetchLimit(1))
+    slow, fast = 'https://slow.example.tn/a-b-c', 'https://fast.example.tn/a-b-c'
+
+    async def fetch(url):
+        await engine._get(Session(), url, {}, engine.fetch_limit, asyncio.Semaphore(8))
+        return time.monotonic()
+
+    async def scenario():
+        engine._loop = asyncio.get_running_loop()
+        await fetch(slow)
+        started = time.monotonic()
+        # The second request to the slow host waits about 2 s for a token
+        paced = asyncio.ensure_future(fetch(slow))
+        await asyncio.sleep(0.05)
+        fast_done = await fetch(fast)
+        assert fast_done - started < 1
+        paced.cancel()
+        await asyncio.gather(paced, return_exceptions=True)
+
+    asyncio.run(scenario())
+    assert engine.fetch_limit.in_use() == 0
@@ -0,0 +1,37 @@
+"""Hand-written overrides win over learned selectors, including 'this site has no such field'."""
+import os
+
+import pytest
+
+from extraction_profiles import ExtractionProfiles
+from parsers import available_backends, get_parser_backend
+
+PAGE = os.path.join(os.path.dirname(__file__), 'fixtures', 'inline_script_style.html')
+URL = 'https://www.example.tn/2024/05/inline-script-style.html'
+
+
+@pytest.fixture
+def profiles(tmp_path):
+    return ExtractionProfiles(str(tmp_path / 'profiles.sqlite3'),
+                              overrides={'www.example.tn': {'content': ['article'], 'image': [], 'author': ['[bad']}})
+
+
+def test_empty_override_is_kept(profiles):
+    assert profiles.overrides == {'example.tn': {'content': ['article'], 'image': []}}
+
+
+@pytest.mark.parametrize('backend', available_backends())
+def test_empty_override_stops_extraction_of_the_field(profiles, backend):
+    with open(PAGE, 'rb') as f:
+        body = f.read()
+    parser = get_parser_backend(backend)
+    assert parser.extract(body, URL, structured_data=False)['image_url'] is not None
+
+    # Learned selectors for the field don't bring it back either
+    for _ in range(profiles.min_hits):
+        profiles.record(URL, {'image': 'article img:first-of-type'}, [], profiled=False)
+    profile = profiles.profile('example.tn')
+    assert profile['image'] == []
+
+    article = parser.extract(body, URL, profile=profile, structured_data=False)
+    assert article['image_url'] is None
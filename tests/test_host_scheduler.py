@@ -0,0 +1,37 @@
+"""Only what a host did may move its concurrency window; giving up on a request is not the host's fault."""
+import asyncio
+
+import pytest
+
+from host_scheduler import HostLimiter, RequestSlot
+
+
+def make_limiter():
+    return HostLimiter(rate=100, burst=100, initial_concurrency=4, min_concurrency=1, max_concurrency=8,
+                       slow_latency_seconds=5, decrease_factor=0.5)
+
+
+def leave_slot(limiter, error):
+    assert limiter.try_acquire() == 0
+    with pytest.raises(type(error)):
+        with RequestSlot(limiter):
+            raise error
+
+
+def test_cancelled_request_keeps_the_window():
+    limiter = make_limiter()
+    leave_slot(limiter, asyncio.CancelledError())
+
+    snapshot = limiter.snapshot()
+    assert snapshot['concurrency_limit'] == 4
+    assert snapshot['in_flight'] == 0
+    assert snapshot['cancelled'] == 1 and snapshot['failed'] == 0
+
+
+def test_failed_request_shrinks_the_window():
+    limiter = make_limiter()
+    leave_slot(limiter, ConnectionError('reset'))
+
+    snapshot = limiter.snapshot()
+    assert snapshot['concurrency_limit'] == 2
+    assert snapshot['in_flight'] == 0 and snapshot['failed'] == 1
@@ -0,0 +1,39 @@
+"""Head-only reads stop at the real end of <head>, not at tags that merely start like it."""
+import pytest
+
+from http_pool import find_head_end, read_head
+
+HEAD = b'<html><head><title>T</title><meta name="description" content="D">'
+
+
+class Response:
+    """Streams a body in fixed-size chunks and records whether it was closed"""
+
+    def __init__(self, body, chunk_bytes):
+        self.body = body
+        self.chunk_bytes = chunk_bytes
+        self.closed = False
+
+    def iter_content(self, chunk_size):
+        for i in range(0, len(self.body), self.chunk_bytes):
+            yield self.body[i:i + self.chunk_bytes]
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.mark.parametrize('tag', [b'<body-wrapper>', b'<bodyfoo>', b'<HEADER>', b'</header>'])
+def test_lookalike_tags_do_not_end_the_head(tag):
+    assert find_head_end(HEAD + tag + b'<title>x</title>') == -1
+
+
+@pytest.mark.parametrize('tag', [b'</head>', b'</HEAD >', b'<body>', b'<body class="home">', b'<BODY\n>'])
+def test_real_tags_end_the_head(tag):
+    assert find_head_end(HEAD + tag + b'<p>text</p>') == len(HEAD)
+
+
+@pytest.mark.parametrize('chunk_bytes', [1, 3, 7, 64])
+def test_read_head_finds_a_tag_split_across_chunks(chunk_bytes):
+    response = Response(HEAD + b'<body-wrapper><p>x</p></body-wrapper><body>' + b'<p>body</p>' * 100, chunk_bytes)
+    assert read_head(response, 0) == HEAD + b'<body-wrapper><p>x</p></body-wrapper>'
+    assert response.closed
@@ -0,0 +1,39 @@
+"""Jobs left unfinished by a worker process that died must not stay 'running' forever."""
+import time
+
+import pytest
+
+from jobs import FAILED, RUNNING, SUCCEEDED, JobManager, JobStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return JobStore(str(tmp_path / 'jobs.sqlite3'))
+
+
+def test_startup_fails_jobs_of_a_dead_process(store):
+    store.create('dead', 'scrape', {})
+    store.update('dead', status=RUNNING, started_at=time.time() - 600, heartbeat_at=time.time() - 600)
+    store.create('alive', 'scrape', {})
+    store.update('alive', status=RUNNING, started_at=time.time() - 600)
+    store.heartbeat(['alive'])
+
+    manager = JobManager(store, max_workers=1, heartbeat_seconds=30)
+    try:
+        dead, alive = store.get('dead'), store.get('alive')
+        assert dead['status'] == FAILED and dead['finished_at'] is not None
+        assert alive['status'] == RUNNING
+    finally:
+        manager.shutdown()
+
+
+def test_running_jobs_keep_their_heartbeat(store):
+    manager = JobManager(store, max_workers=1, heartbeat_seconds=0.05)
+    try:
+        job_id = manager.submit('scrape', {}, lambda context: time.sleep(0.3) or 'done')
+        time.sleep(0.2)
+        assert time.time() - store.get(job_id)['heartbeat_at'] < 0.15
+        time.sleep(0.3)
+        assert store.get(job_id)['status'] == SUCCEEDED
+    finally:
+        manager.shutdown()
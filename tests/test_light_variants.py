@@ -0,0 +1,18 @@
+"""A site's learned AMP pattern is only guessed for article pages."""
+from light_variants import LightVariants
+
+
+def test_pattern_is_guessed_only_when_asked(tmp_path):
+    variants = LightVariants(str(tmp_path / 'variants.sqlite3'), min_hits=2)
+    for slug in ('first-story-here', 'second-story-here'):
+        url = f'https://www.example.tn/2024/05/{slug}/'
+        variants.learn(url, url + 'amp/')
+
+    new_article = 'https://www.example.tn/2024/05/third-story-here/'
+    assert variants.variant_for(new_article) == new_article + 'amp/'
+    assert variants.variant_for(new_article, guess=False) is None
+
+    # A link the page announced itself is used either way
+    listing = 'https://www.example.tn/category/economie/'
+    variants.learn(listing, 'https://www.example.tn/category/economie/amp/')
+    assert variants.variant_for(listing, guess=False) == listing + 'amp/'
@@ -0,0 +1,73 @@
+"""Every installed parser backend must turn the saved pages in fixtures/ into identical article data."""
+import os
+import glob
+
+import pytest
+
+from charsets import sniff_encoding
+from parsers import available_backends, get_parser_backend
+
+FIXTURES = sorted(glob.glob(os.path.join(os.path.dirname(__file__), 'fixtures', '*.html')))
+BACKENDS = available_backends()
+# html.parser is always installed and always last
+REFERENCE = BACKENDS[-1]
+
+
+def load(path):
+    """Raw bytes of a fixture, its sniffed charset and the URL it is parsed as"""
+    with open(path, 'rb') as f:
+        body = f.read()
+    return body, sniff_encoding(None, body), 'https://www.example.tn/2024/05/' + os.path.basename(path)
+
+
+def fixture_id(path):
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+@pytest.mark.parametrize('structured_data', [True, False])
+@pytest.mark.parametrize('backend', BACKENDS)
+@pytest.mark.parametrize('path', FIXTURES, ids=fixture_id)
+def test_extract_matches_reference(path, backend, structured_data):
+    body, encoding, url = load(path)
+    expected = get_parser_backend(REFERENCE).extract(body, url, encoding, structured_data=structured_data)
+    assert get_parser_backend(backend).extract(body, url, encoding, structured_data=structured_data) == expected
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+@pytest.mark.parametrize('path', FIXTURES, ids=fixture_id)
+def test_extract_head_matches_reference(path, backend):
+    body, encoding, url = load(path)
+    expected = get_parser_backend(REFERENCE).extract_head(body, url, encoding)
+    assert get_parser_backend(backend).extract_head(body, url, encoding) == expected
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_script_and_style_text_is_not_extracted(backend):
+    body, encoding, url = load(os.path.join(os.path.dirname(__file__), 'fixtures', 'inline_script_style.html'))
+    fields = get_parser_backend(backend).extract(body, url, encoding, structured_data=False)
+    for code in ('googletag', 'display: none', 'Activez JavaScript', 'template'):
+        assert code not in fields['content']
+    assert fields['content'].startswith("Orange Tunisie a annoncé mardi le lancement d'une offre 5G  destinée")
+    assert fields['author'] == 'Par Sami Ben Ali'
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_non_utf8_pages_are_decoded(backend):
+    fixtures = os.path.join(os.path.dirname(__file__), 'fixtures')
+    body, encoding, url = load(os.path.join(fixtures, 'windows1256_arabic.html'))
+    fields = get_parser_backend(backend).extract(body, url, encoding)
+    assert fields['title'] == 'أورنج تونس تطلق خدمة جديدة'
+    assert fields['author'] == 'وكالة تونس إفريقيا للأنباء'
+
+    body, encoding, url = load(os.path.join(fixtures, 'iso8859_structured_data.html'))
+    fields = get_parser_backend(backend).extract(body, url, encoding)
+    assert fields['author'] == 'Hélène Dupré'
+    assert fields['content'].startswith('Le Tunindex a clôturé la séance')
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_malformed_markup_does_not_repeat_paragraphs(backend):
+    body, encoding, url = load(os.path.join(os.path.dirname(__file__), 'fixtures', 'malformed_markup.html'))
+    fields = get_parser_backend(backend).extract(body, url, encoding)
+    assert fields['content'].count('Deuxième paragraphe') == 1
+    assert fields['content'].endswith('trimestre')
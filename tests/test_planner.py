@@ -0,0 +1,24 @@
+"""Requested URLs collapse into distinct sources without losing count of them or changing what is fetched."""
+from planner import plan_sources
+from urls import canonicalize_url
+
+
+def test_requested_counts_exact_repeats():
+    plan = plan_sources(['https://example.tn/news', 'https://example.tn/news', 'http://example.tn/news/'])
+    assert plan.urls == ['https://example.tn/news']
+    assert plan.requested == 3
+    assert plan.annotate({'url': 'https://example.tn/news'})['requested_urls'] == [
+        'https://example.tn/news', 'http://example.tn/news/'
+    ]
+
+
+def test_repeats_of_one_url_are_not_reported_as_aliases():
+    plan = plan_sources(['https://example.tn/news', 'https://example.tn/news'])
+    assert plan.requested == 2
+    assert 'requested_urls' not in plan.annotate({'url': 'https://example.tn/news'})
+
+
+def test_query_parameters_are_kept_as_written():
+    assert canonicalize_url('https://example.tn/story?amp') == 'https://example.tn/story?amp'
+    assert canonicalize_url('https://example.tn/story?amp=') == 'https://example.tn/story?amp='
+    assert canonicalize_url('https://example.tn/s?q=a%20b&utm_source=x&id=3#top') == 'https://example.tn/s?q=a%20b&id=3'
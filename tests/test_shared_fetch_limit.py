@@ -0,0 +1,53 @@
+"""Async scrapes on different event loops must stay within one process-wide fetch budget."""
+import asyncio
+import threading
+
+from async_engine import SharedFetchLimit
+
+
+def test_limit_holds_across_event_loops():
+    limit = SharedFetchLimit(3)
+    lock = threading.Lock()
+    counts = {'active': 0, 'peak': 0, 'done': 0}
+
+    async def fetch():
+        async with limit:
+            with lock:
+                counts['active'] += 1
+                counts['peak'] = max(counts['peak'], counts['active'])
+            await asyncio.sleep(0.01)
+            with lock:
+                counts['active'] -= 1
+                counts['done'] += 1
+
+    async def scrape():
+        await asyncio.gather(*(fetch() for _ in range(20)))
+
+    threads = [threading.Thread(target=asyncio.run, args=(scrape(),)) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+
+    assert counts['done'] == 60
+    assert counts['peak'] == 3
+    assert limit.in_use() == 0
+
+
+def test_cancelled_waiter_gives_its_slot_back():
+    limit = SharedFetchLimit(1)
+
+    async def scenario():
+        await limit.__aenter__()
+        waiter = asyncio.ensure_future(limit.__aenter__())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        await limit.__aexit__(None, None, None)
+
+        # The slot must be free again, not stuck with the cancelled waiter
+        await asyncio.wait_for(limit.__aenter__(), timeout=1)
+        await limit.__aexit__(None, None, None)
+
+    asyncio.run(scenario())
+    assert limit.in_use() == 0
@@ -0,0 +1,39 @@
+"""A refreshed source must not come due again before half of its TTL has passed."""
+import time
+
+from article_cache import ArticleCache
+from warmer import CacheWarmer
+
+URL = 'https://www.example.tn/2024/05/hot-source/'
+
+
+class Scraper:
+    def __init__(self, ttl):
+        self.article_cache = ArticleCache(ttl_seconds=3600)
+        self.article_cache.ttl_policy = lambda url: ttl
+        self.refreshed = []
+
+    def refresh_article(self, url):
+        self.refreshed.append(url)
+        self.article_cache.set(url, {'url': url, 'title': 'Title'})
+        return {'url': url}
+
+
+def test_short_ttl_source_is_not_refreshed_on_every_check():
+    # The adaptive TTL's floor is no longer than refresh ahead plus the spread
+    scraper = Scraper(ttl=300)
+    warmer = CacheWarmer(scraper, [URL], refresh_ahead_seconds=300, spread_seconds=120)
+    scraper.refresh_article(URL)
+
+    assert warmer.due_at(URL) >= time.time() + 149
+    warmer.run_once()
+    assert scraper.refreshed == [URL]
+
+
+def test_long_ttl_source_is_refreshed_ahead_of_expiry():
+    scraper = Scraper(ttl=3600)
+    warmer = CacheWarmer(scraper, [URL], refresh_ahead_seconds=300, spread_seconds=120)
+    scraper.refresh_article(URL)
+
+    lead = scraper.article_cache.expires_at(URL) - warmer.due_at(URL)
+    assert 300 <= lead <= 420
@@ -0,0 +1,75 @@
+"""Bulk work must never keep an interactive scrape waiting for the shared worker pool."""
+import time
+import threading
+
+import pytest
+
+from host_scheduler import BULK, INTERACTIVE, SCHEDULED
+from worker_pool import PoolSaturatedError, WorkerPool
+
+
+@pytest.fixture
+def pool():
+    pool = WorkerPool(max_workers=2, max_queued=2, max_workers_per_call=2, interactive_workers=1)
+    yield pool
+    pool.shutdown()
+
+
+def test_bulk_batches_leave_room_for_interactive(pool):
+    release = threading.Event()
+    bulk = [pool.batch(2, BULK), pool.batch(2, BULK)]
+    blocked = [batch.submit(release.wait) for batch in bulk for _ in range(2)]
+    try:
+        with pytest.raises(PoolSaturatedError):
+            pool.batch(1, BULK)
+        assert pool.saturated(BULK) and not pool.saturated(INTERACTIVE)
+
+        interactive = pool.batch(2, INTERACTIVE)
+        assert interactive.submit(lambda: 'done').result(timeout=5) == 'done'
+        interactive.close()
+    finally:
+        release.set()
+        for future in blocked:
+            future.result(timeout=5)
+        for batch in bulk:
+            batch.close()
+
+
+def test_queued_tasks_start_in_priority_order():
+    pool = WorkerPool(max_workers=1, max_queued=3, max_workers_per_call=1, interactive_workers=0)
+    release = threading.Event()
+    blocker = pool.batch(1, BULK)
+    blocked = blocker.submit(release.wait)
+    started = []
+    batches = [pool.batch(1, priority) for priority in (BULK, SCHEDULED, INTERACTIVE)]
+    futures = [batch.submit(started.append, batch.priority) for batch in batches]
+
+    release.set()
+    for future in [blocked] + futures:
+        future.result(timeout=5)
+    assert started == [INTERACTIVE, SCHEDULED, BULK]
+    pool.shutdown()
+
+
+def test_batch_runs_in_parallel_once_threads_exist(pool):
+    # Leave an idle thread behind, as every pool has after its first task
+    warm = pool.batch(1, INTERACTIVE)
+    warm.submit(lambda: None).result(timeout=5)
+    warm.close()
+    time.sleep(0.05)
+
+    batch = pool.batch(2, BULK)
+    names = set()
+
+    def record_thread():
+        time.sleep(0.3)
+        names.add(threading.current_thread().name)
+
+    started = time.monotonic()
+    futures = [batch.submit(record_thread) for _ in range(2)]
+    for future in futures:
+        future.result(timeout=5)
+    batch.close()
+
+    assert len(names) == 2
+    assert time.monotonic() - started < 0.55
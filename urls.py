@@ -0,0 +1,69 @@
+from typing import Optional
+from urllib.parse import urljoin, urlsplit, urlunsplit, unquote_plus
+
+# Query parameters that only track where a click came from
+TRACKING_PARAM_PREFIXES = ('utm_',)
+TRACKING_PARAMS = {'fbclid', 'gclid', 'dclid', 'msclkid', 'mc_cid', 'mc_eid', 'igshid', '_ga'}
+
+_DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+def _is_tracking_param(name: str) -> bool:
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PARAM_PREFIXES)
+
+
+def canonicalize_url(url: str, base: str = None) -> Optional[str]:
+    """Canonical form of a link, resolved against base; None for non-HTTP links.
+
+    Lowercases the scheme and host, drops default ports, fragments and
+    tracking parameters, so the same page always maps to the same string.
+    """
+    if not url:
+        return None
+    url = url.strip()
+    if base:
+        url = urljoin(base, url)
+
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    if scheme not in _DEFAULT_PORTS or not parts.hostname:
+        return None
+
+    netloc = parts.hostname.lower()
+    try:
+        port = parts.port
+    except ValueError:
+        return None
+    if port and port != _DEFAULT_PORTS[scheme]:
+        netloc = f"{netloc}:{port}"
+
+    # Parameters are kept as written: some servers tell '?amp' and '?amp=' apart
+    query = '&'.join(
+        pair for pair in parts.query.split('&')
+        if pair and not _is_tracking_param(unquote_plus(pair.split('=', 1)[0]))
+    )
+
+    return urlunsplit((scheme, netloc, parts.path or '/', query, ''))
+
+
+def site_of(url: str) -> str:
+    """Host name of a URL without a leading www., used to tell internal links from external ones"""
+    host = (urlsplit(url).hostname or '').lower()
+    return host[4:] if host.startswith('www.') else host
+
+
+def same_site(url: str, other: str) -> bool:
+    return site_of(url) == site_of(other)
+
+
+def source_key(url: str) -> Optional[str]:
+    """Key shared by the variants of a source URL: canonical form ignoring the scheme and a trailing slash.
+
+    None for non-HTTP URLs.
+    """
+    canonical = canonicalize_url(url)
+    if canonical is None:
+        return None
+    parts = urlsplit(canonical)
+    return urlunsplit(('', parts.netloc, parts.path.rstrip('/') or '/', parts.query, ''))
@@ -0,0 +1,164 @@
+import time
+import zlib
+import threading
+from typing import Dict, Any, Iterable, List, Optional
+
+from planner import plan_sources
+
+
+def configured_urls(news_sources: Dict[str, List[str]], topics: Optional[Iterable[str]] = None) -> List[str]:
+    """Source URLs of the given topics (all topics by default), each distinct source once"""
+    topics = news_sources.keys() if topics is None else topics
+    return plan_sources([url for topic in topics for url in news_sources.get(topic, [])]).urls
+
+
+class CacheWarmer:
+    """Re-scrapes sources shortly before their cache entries expire, so interactive scrapes find them warm.
+
+    Each URL comes due refresh_ahead_seconds before its entry expires, moved
+    earlier by a fixed per-URL offset of up to spread_seconds so sources that
+    were cached together are not refreshed in one burst. The lead never
+    exceeds half the entry's own TTL, so sources whose adaptive TTL is short
+    are not due again right after being refreshed. Every
+    check_interval_seconds at most max_refreshes_per_check due URLs are
+    refreshed, one at a time. A URL whose refresh failed waits
+    failure_backoff_seconds before it is tried again.
+
+    Expiry times are read from the article cache, so with the sqlite backend
+    warmers in several worker processes see each other's refreshes.
+    """
+
+    def __init__(self,
+                 scraper,
+                 urls: List[str],
+                 refresh_ahead_seconds: float = 300,
+                 spread_seconds: float = 120,
+                 check_interval_seconds: float = 15,
+                 max_refreshes_per_check: int = 3,
+                 failure_backoff_seconds: float = 300):
+        self.scraper = scraper
+        self.urls = plan_sources(urls).urls
+        self.refresh_ahead_seconds = refresh_ahead_seconds
+        self.spread_seconds = spread_seconds
+        self.check_interval_seconds = check_interval_seconds
+        self.max_refreshes_per_check = max_refreshes_per_check
+        self.failure_backoff_seconds = failure_backoff_seconds
+
+        self._started_at = time.time()
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._last_run = None
+        self._sources = {url: {'refreshes': 0, 'failures': 0, 'last_refreshed': None, 'last_error': None,
+                               'retry_at': 0.0} for url in self.urls}
+
+    @classmethod
+    def from_config(cls, scraper, warmer_config: Dict[str, Any], urls: List[str]) -> 'CacheWarmer':
+        """Build a warmer for urls from a WARMER_CONFIG-style dict"""
+        return cls(
+            scraper,
+            urls,
+            refresh_ahead_seconds=warmer_config.get('refresh_ahead_seconds', 300),
+            spread_seconds=warmer_config.get('spread_seconds', 120),
+            check_interval_seconds=warmer_config.get('check_interval_seconds', 15),
+            max_refreshes_per_check=warmer_config.get('max_refreshes_per_check', 3),
+            failure_backoff_seconds=warmer_config.get('failure_backoff_seconds', 300)
+        )
+
+    def _offset(self, url: str) -> float:
+        """Stable per-URL share of the spread window"""
+        return zlib.crc32(url.encode('utf-8')) % 1000 / 1000 * self.spread_seconds
+
+    def due_at(self, url: str) -> float:
+        """Unix time at which url should next be refreshed"""
+        expires_at = self.scraper.article_cache.expires_at(url)
+        if expires_at is None:
+            # Never cached: warm it soon after startup, staggered like the refreshes
+            due = self._started_at + self._offset(url)
+        else:
+            lead = min(self.refresh_ahead_seconds + self._offset(url), self.scraper.article_cache.ttl_for(url) / 2)
+            due = expires_at - lead
+        with self._lock:
+            return max(due, self._sources[url]['retry_at'])
+
+    def run_once(self) -> Dict[str, Any]:
+        """Refresh the URLs that are due, most overdue first"""
+        started = time.time()
+        schedule = sorted((self.due_at(url), url) for url in self.urls)
+        due = [url for due_at, url in schedule if due_at <= started][:self.max_refreshes_per_check]
+
+        refreshed = failed = 0
+        for url in due:
+            if self._stop.is_set():
+                break
+            article_data = self.scraper.refresh_article(url)
+            now = time.time()
+            with self._lock:
+                source = self._sources[url]
+                if 'error' in article_data:
+                    failed += 1
+                    source['failures'] += 1
+                    source['last_error'] = article_data['error']
+                    source['retry_at'] = now + self.failure_backoff_seconds
+                else:
+                    refreshed += 1
+                    source['refreshes'] += 1
+                    source['last_refreshed'] = now
+                    source['last_error'] = None
+                    source['retry_at'] = 0.0
+
+        last_run = {
+            'started_at': started,
+            'finished_at': time.time(),
+            'due': len(due),
+            'refreshed': refreshed,
+            'failed': failed
+        }
+        with self._lock:
+            self._last_run = last_run
+        return last_run
+
+    def run(self):
+        """Refresh due URLs every check interval until stop() is called (blocking)"""
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"Cache warmer run failed: {str(e)}")
+            self._stop.wait(self.check_interval_seconds)
+
+    def start(self):
+        """Run the warmer in a background thread"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name='cache-warmer', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def status(self) -> Dict[str, Any]:
+        """Settings, last run and the upcoming refresh time of every URL"""
+        schedule = []
+        for url in self.urls:
+            due_at = self.due_at(url)
+            expires_at = self.scraper.article_cache.expires_at(url)
+            with self._lock:
+                source = dict(self._sources[url])
+            del source['retry_at']
+            source.update({'url': url, 'due_at': due_at, 'expires_at': expires_at})
+            schedule.append(source)
+        schedule.sort(key=lambda source: source['due_at'])
+
+        with self._lock:
+            last_run = self._last_run
+        return {
+            'running': self._thread is not None and self._thread.is_alive(),
+            'refresh_ahead_seconds': self.refresh_ahead_seconds,
+            'check_interval_seconds': self.check_interval_seconds,
+            'last_run': last_run,
+            'schedule': schedule
+        }
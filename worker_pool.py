@@ -0,0 +1,258 @@
+import threading
+import collections
+import concurrent.futures
+from typing import Dict, Any, Callable
+
+from host_scheduler import INTERACTIVE, PRIORITIES
+
+
+class PoolSaturatedError(Exception):
+    """Raised instead of queueing more work when the shared worker pool is full"""
+    pass
+
+
+class TaskBatch:
+    """One caller's share of a WorkerPool: at most max_parallel of its tasks are handed to the pool at once.
+
+    submit() returns a regular Future straight away; the task starts when one
+    of the batch's earlier tasks finishes. Call close() when done with the
+    batch: tasks that have not started are cancelled and the batch's share
+    of the pool is given back as its running tasks finish. Tasks are queued
+    in the pool under the batch's priority class.
+    """
+
+    def __init__(self, pool: 'WorkerPool', max_parallel: int, priority: str = INTERACTIVE):
+        self.pool = pool
+        self.max_parallel = max_parallel
+        self.priority = priority
+        self._reserved = max_parallel
+        self._running = 0
+        self._waiting = collections.deque()  # (future, fn, args, kwargs) not yet handed to the pool
+        self._futures = []
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def submit(self, fn: Callable, *args, **kwargs) -> concurrent.futures.Future:
+        future = concurrent.futures.Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError('Cannot submit to a closed batch')
+            self._waiting.append((future, fn, args, kwargs))
+            self._futures.append(future)
+        self._start_waiting()
+        return future
+
+    def _start_waiting(self):
+        while True:
+            with self._lock:
+                if self._closed or not self._waiting or self._running >= self.max_parallel:
+                    return
+                task = self._waiting.popleft()
+                self._running += 1
+            self.pool._execute(task, self._task_done, self.priority)
+
+    def _task_done(self):
+        with self._lock:
+            self._running -= 1
+            give_back = 0
+            if self._closed:
+                # Closed while this task ran: its slot goes back to the pool now
+                self._reserved -= 1
+                give_back = 1
+        if give_back:
+            self.pool._release(give_back)
+        self._start_waiting()
+
+    def close(self):
+        """Cancel the tasks that have not started and free the batch's unused share of the pool"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._waiting.clear()
+            futures = list(self._futures)
+            give_back = self._reserved - self._running
+            self._reserved = self._running
+        for future in futures:
+            future.cancel()
+        self.pool._release(give_back)
+
+
+class WorkerPool:
+    """Process-wide, fixed-size thread pool shared by every scrape.
+
+    Capacity is max_workers running tasks plus max_queued queued ones. Each
+    batch reserves slots for its parallelism up front, at most
+    max_workers_per_call. When the pool is full, new batches are rejected
+    with PoolSaturatedError instead of queueing without bound.
+
+    Queued tasks start in priority order (interactive, scheduled, bulk; see
+    host_scheduler.PRIORITIES), first come first served within a class. On
+    top of that, interactive_workers threads and as many slots are kept for
+    interactive batches, so a user's scrape neither waits for bulk tasks to
+    finish nor finds the pool full of them.
+    """
+
+    def __init__(self, max_workers: int = 32, max_queued: int = 64, max_workers_per_call: int = 16,
+                 interactive_workers: int = 4):
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.max_workers_per_call = max_workers_per_call
+        self.interactive_workers = interactive_workers
+        self.capacity = max_workers + max_queued + interactive_workers
+
+        self._queues = {priority: collections.deque() for priority in PRIORITIES}
+        self._threads = []
+        self._idle = {'shared': 0, 'interactive': 0}
+        self._shutdown = False
+        self._reserved = 0
+        self._lock = threading.Lock()
+        self._work = threading.Condition(self._lock)
+        self._stats = {'batches': 0, 'rejected': 0, 'tasks': 0}
+
+    @classmethod
+    def from_config(cls, pool_config: Dict[str, Any]) -> 'WorkerPool':
+        """Build a pool from a WORKER_POOL_CONFIG-style dict"""
+        return cls(
+            max_workers=pool_config.get('max_workers', 32),
+            max_queued=pool_config.get('max_queued', 64),
+            max_workers_per_call=pool_config.get('max_workers_per_call', 16),
+            interactive_workers=pool_config.get('interactive_workers', 4)
+        )
+
+    def _capacity_for(self, priority: str) -> int:
+        """Slots batches of a priority class may reserve: the interactive share is only for interactive ones"""
+        return self.capacity if priority == INTERACTIVE else self.capacity - self.interactive_workers
+
+    def batch(self, max_parallel: int, priority: str = INTERACTIVE) -> TaskBatch:
+        """Reserve up to max_parallel slots (fewer if that is all that's left) for one caller's tasks"""
+        wanted = max(1, min(max_parallel, self.max_workers_per_call))
+        with self._lock:
+            available = self._capacity_for(priority) - self._reserved
+            if available <= 0:
+                self._stats['rejected'] += 1
+                raise PoolSaturatedError(f"All {self.capacity} scraping slots are in use, try again shortly")
+            granted = min(wanted, available)
+            self._reserved += granted
+            self._stats['batches'] += 1
+        return TaskBatch(self, granted, priority)
+
+    def saturated(self, priority: str = INTERACTIVE) -> bool:
+        with self._lock:
+            return self._reserved >= self._capacity_for(priority)
+
+    def _release(self, slots: int):
+        with self._lock:
+            self._reserved -= slots
+
+    def _execute(self, task, on_done: Callable[[], None], priority: str = INTERACTIVE):
+        with self._work:
+            if self._shutdown:
+                raise RuntimeError('Cannot run tasks on a pool that was shut down')
+            self._stats['tasks'] += 1
+            self._queues[priority].append((task, on_done))
+            self._start_thread()
+            # Interactive-only threads can't take other classes, so wake everyone
+            self._work.notify_all()
+
+    def _start_thread(self):
+        """Start a thread if queued tasks outnumber the idle threads that can take them (lock held)
+
+        Queued tasks are unclaimed ones, and a woken thread stays idle until it
+        claims one, so the comparison holds while wakeups are under way.
+        """
+        shared = sum(1 for thread in self._threads if not thread.interactive_only)
+        interactive = len(self._queues[INTERACTIVE])
+        queued = sum(len(queue) for queue in self._queues.values())
+        # Interactive-only threads take nothing but interactive tasks
+        unclaimed = queued - self._idle['shared'] - min(self._idle['interactive'], interactive)
+        if unclaimed > 0 and shared < self.max_workers:
+            interactive_only = False
+        elif (interactive > self._idle['shared'] + self._idle['interactive']
+                and len(self._threads) - shared < self.interactive_workers):
+            interactive_only = True
+        else:
+            return
+        thread = threading.Thread(target=self._worker, args=(interactive_only,), daemon=True,
+                                  name=f"scrape-worker{'-interactive' if interactive_only else ''}_{len(self._threads)}")
+        thread.interactive_only = interactive_only
+        self._threads.append(thread)
+        thread.start()
+
+    def _next_task(self, interactive_only: bool):
+        """Highest priority queued task this thread may run, or None (lock held)"""
+        for priority in ((INTERACTIVE,) if interactive_only else PRIORITIES):
+            if self._queues[priority]:
+                return self._queues[priority].popleft()
+        return None
+
+    def _worker(self, interactive_only: bool):
+        kind = 'interactive' if interactive_only else 'shared'
+        while True:
+            with self._work:
+                item = self._next_task(interactive_only)
+                while item is None:
+                    if self._shutdown:
+                        return
+                    self._idle[kind] += 1
+                    self._work.wait()
+                    self._idle[kind] -= 1
+                    item = self._next_task(interactive_only)
+            self._run(*item)
+
+    @staticmethod
+    def _run(task, on_done: Callable[[], None]):
+        future, fn, args, kwargs = task
+        try:
+            # Skipped if the batch was closed while this task sat in the queue
+            if future.set_running_or_notify_cancel():
+                try:
+                    result = fn(*args, **kwargs)
+                except BaseException as e:
+                    future.set_exception(e)
+                else:
+                    future.set_result(result)
+        finally:
+            on_done()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update({
+                'max_workers': self.max_workers,
+                'interactive_workers': self.interactive_workers,
+                'capacity': self.capacity,
+                'reserved': self._reserved,
+                'queued': {priority: len(queue) for priority, queue in self._queues.items()}
+            })
+        return stats
+
+    def shutdown(self, wait: bool = True):
+        """Stop the threads once they are idle; queued tasks are cancelled"""
+        with self._work:
+            self._shutdown = True
+            queued = [item for queue in self._queues.values() for item in queue]
+            for queue in self._queues.values():
+                queue.clear()
+            threads = list(self._threads)
+            self._work.notify_all()
+        for (future, _, _, _), on_done in queued:
+            future.cancel()
+            on_done()
+        if wait:
+            for thread in threads:
+                if thread is not threading.current_thread():
+                    thread.join()
+
+
+_shared_pool = None
+_shared_pool_lock = threading.Lock()
+
+
+def shared_worker_pool(pool_config: Dict[str, Any]) -> WorkerPool:
+    """The process-wide pool, created from pool_config on first use"""
+    global _shared_pool
+    with _shared_pool_lock:
+        if _shared_pool is None:
+            _shared_pool = WorkerPool.from_config(pool_config)
+        return _shared_pool